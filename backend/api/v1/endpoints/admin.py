@@ -0,0 +1,29 @@
+# backend/api/v1/endpoints/admin.py
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from backend.core import profiling
+
+router = APIRouter()
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)):
+    """Las rutas de administración usan el mismo token que el perfilado bajo demanda."""
+    if not profiling.is_authorized(x_profile_token):
+        raise HTTPException(status_code=403, detail="Token de perfilado inválido o perfilado deshabilitado.")
+
+
+@router.get("/profiles", summary="Lista los perfiles de peticiones guardados", dependencies=[Depends(require_profiling_token)])
+def list_profiles():
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{profile_id}", summary="Descarga un perfil (collapsed stacks o informe de cProfile)",
+            response_class=PlainTextResponse, dependencies=[Depends(require_profiling_token)])
+def get_profile(profile_id: str):
+    record = profiling.get_profile(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado.")
+    return PlainTextResponse(record.content)
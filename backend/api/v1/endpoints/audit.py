@@ -1,22 +1,35 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from backend.services import jumpseller_service, firestore_service
+from backend.core.profiling import ProfilingRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfilingRoute)
+
+async def _fetch_both(jumpseller_call, firestore_call):
+    """
+    Ejecuta en paralelo la consulta a Jumpseller y la de Firestore. asyncio.to_thread
+    copia el contexto de la petición, así las lecturas de Firestore se contabilizan
+    (X-Firestore-* y /metrics/firestore). Los errores se devuelven, no se lanzan.
+    """
+    return await asyncio.gather(asyncio.to_thread(jumpseller_call), asyncio.to_thread(firestore_call),
+                                return_exceptions=True)
 
 @router.get("/order/{order_id}", summary="Auditar datos de una orden entre Jumpseller y Firestore")
-def audit_order_data(order_id: int):
+async def audit_order_data(order_id: int):
     """
     Obtiene los datos de una orden desde Jumpseller y los documentos
     correspondientes desde Firestore para una comparación lado a lado.
     """
-    # 1. Obtener datos de Jumpseller
-    try:
-        jumpseller_data = jumpseller_service.get_orders(order_id=order_id)
-    except Exception:
-        raise HTTPException(status_code=404, detail=f"Orden ID {order_id} no encontrada en Jumpseller.")
+    # 1. Lanzar en paralelo Jumpseller y Firestore (el ID es un string en Firestore)
+    jumpseller_data, firestore_data = await _fetch_both(
+        lambda: jumpseller_service.get_orders(order_id=order_id),
+        lambda: firestore_service.get_firestore_data_for_audit(str(order_id)))
 
-    # 2. Obtener datos de Firestore (el ID es un string en Firestore)
-    firestore_data = firestore_service.get_firestore_data_for_audit(str(order_id))
+    # 2. Revisar ambos resultados
+    if isinstance(jumpseller_data, Exception):
+        raise HTTPException(status_code=404, detail=f"Orden ID {order_id} no encontrada en Jumpseller.")
+    if isinstance(firestore_data, BaseException):
+        raise firestore_data
 
     if firestore_data.get("error"):
         raise HTTPException(status_code=404, detail=firestore_data["error"])
@@ -27,20 +40,21 @@ def audit_order_data(order_id: int):
     }
 
 @router.get("/service/{service_id}", summary="Auditar datos de un servicio entre Jumpseller y Firestore")
-def audit_service_data(service_id: int):
+async def audit_service_data(service_id: int):
     """
     Obtiene los datos de un producto/servicio desde Jumpseller y los documentos
     correspondientes desde Firestore para una comparación.
     """
-    # 1. Obtener datos de Jumpseller (asumiendo que tienes una función para esto en el servicio)
-    try:
-        # Necesitaremos una función en jumpseller_service para obtener un solo producto
-        jumpseller_data = jumpseller_service.get_product_by_id(service_id)
-    except Exception:
-        raise HTTPException(status_code=404, detail=f"Producto ID {service_id} no encontrado en Jumpseller.")
+    # 1. Lanzar en paralelo Jumpseller y Firestore (el ID es un string en Firestore)
+    jumpseller_data, firestore_data = await _fetch_both(
+        lambda: jumpseller_service.get_product_by_id(service_id),
+        lambda: firestore_service.get_firestore_service_data_for_audit(str(service_id)))
 
-    # 2. Obtener datos de Firestore (el ID es un string)
-    firestore_data = firestore_service.get_firestore_service_data_for_audit(str(service_id))
+    # 2. Revisar ambos resultados
+    if isinstance(jumpseller_data, Exception):
+        raise HTTPException(status_code=404, detail=f"Producto ID {service_id} no encontrado en Jumpseller.")
+    if isinstance(firestore_data, BaseException):
+        raise firestore_data
 
     if firestore_data.get("error"):
         raise HTTPException(status_code=404, detail=firestore_data["error"])
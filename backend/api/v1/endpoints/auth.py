@@ -10,8 +10,9 @@ from backend.core.config import settings
 
 
 from backend.services import firestore_service
+from backend.core.profiling import ProfilingRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfilingRoute)
 
 # --- Modelos de Datos para Pydantic ---
 class UserLogin(BaseModel):
@@ -1,11 +1,13 @@
 # backend/api/v1/endpoints/crud.py
 
-from fastapi import APIRouter, HTTPException, Body, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Body, Depends, BackgroundTasks, Request
 from typing import List, Dict, Any
-from backend.services import firestore_service
+from backend.services import firestore_service, catalog_service
+from backend.core.profiling import ProfilingRoute
+from backend.core.responses import table_response
 from pydantic import BaseModel, EmailStr
 
-router = APIRouter()
+router = APIRouter(route_class=ProfilingRoute)
 
 # --- Pydantic Models for Data Validation ---
 class ServiceUpdate(BaseModel):
@@ -24,8 +26,8 @@ class AddressUpdate(BaseModel):
 # ===================================================================
 
 @router.get("/users", summary="Listar todos los usuarios", tags=["CRUD - Users & Customers"])
-def list_users():
-    return firestore_service.get_all_documents("users")
+def list_users(request: Request):
+    return table_response(request, firestore_service.get_all_documents("users"))
 
 @router.get("/users/{user_id}/profile", summary="Obtener el perfil de un cliente", tags=["CRUD - Users & Customers"])
 def get_customer_profile(user_id: str):
@@ -66,16 +68,16 @@ def update_address(user_id: str, address_id: str, address_data: AddressUpdate):
 # ===================================================================
 
 @router.get("/services", summary="Listar todos los servicios", tags=["CRUD - Services"])
-def list_services():
+def list_services(request: Request):
     try:
-        return firestore_service.get_all_documents("services")
+        return table_response(request, catalog_service.list_catalog_documents("services"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/services/{service_id}", summary="Obtener un servicio por ID", tags=["CRUD - Services"])
 def get_service(service_id: str):
     try:
-        service = firestore_service.get_document_by_id("services", service_id)
+        service = catalog_service.get_catalog_document("services", service_id)
         if not service:
             raise HTTPException(status_code=404, detail="Servicio no encontrado")
         return service
@@ -111,13 +113,18 @@ class CategoryUpdate(BaseModel):
 # ===================================================================
 
 @router.get("/categories", summary="Listar todas las categorías", tags=["CRUD - Categories"])
-def list_categories():
+def list_categories(request: Request):
     try:
-        # Reutilizamos nuestra función genérica
-        return firestore_service.get_all_documents("categories")
+        # Servido desde el catálogo en memoria (o desde Firestore si no está al día)
+        return table_response(request, catalog_service.list_catalog_documents("categories"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/catalog/status", summary="Estado del catálogo en memoria", tags=["Admin Tools"])
+def catalog_status():
+    """Tamaño, versión y desfase (staleness) del catálogo sincronizado por listeners."""
+    return catalog_service.hot_catalog.status()
+
 @router.put("/categories/{category_id}", summary="Actualizar una categoría", tags=["CRUD - Categories"])
 def update_category(category_id: str, category_data: CategoryUpdate):
     try:
@@ -272,8 +279,8 @@ def add_variant_to_service(service_id: str, variant: VariantPayload):
 
 
 @router.get("/customers", summary="Obtener todos los clientes")
-def get_all_customers_endpoint():
-    return firestore_service.get_all_customers()
+def get_all_customers_endpoint(request: Request):
+    return table_response(request, firestore_service.get_all_customers())
 
 @router.get("/customers/{customer_id}", summary="Obtener un cliente por ID")
 def get_customer_endpoint(customer_id: str):
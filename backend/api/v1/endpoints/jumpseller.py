@@ -4,10 +4,11 @@ from fastapi import APIRouter, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from backend.services import jumpseller_service
+from backend.core.profiling import ProfilingRoute
 
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfilingRoute)
 
 # --- Pydantic Models ---
 class CategoryCreate(BaseModel):
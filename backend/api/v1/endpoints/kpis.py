@@ -1,9 +1,12 @@
 # backend/api/v1/endpoints/kpis.py
-from fastapi import APIRouter, Query, HTTPException
+import sys
+from fastapi import APIRouter, Query, HTTPException, Request
 from datetime import datetime, timedelta, timezone
-from backend.services import firestore_service
+from backend.services import firestore_service, kpi_cache
+from backend.core.responses import FastJSONResponse, table_response
+from backend.core.profiling import ProfilingRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfilingRoute)
 
 def get_date_range(start_date: str, end_date: str) -> tuple[datetime, datetime]:
     """
@@ -23,45 +26,64 @@ def get_date_range(start_date: str, end_date: str) -> tuple[datetime, datetime]:
     except ValueError:
         raise HTTPException(status_code=400, detail="Formato de fecha inválido. Usa YYYY-MM-DD.")
 
+# Los endpoints devuelven FastJSONResponse directamente: los resultados contienen
+# escalares numpy y DataFrames que se serializan con orjson sin pasar por jsonable_encoder.
+
+def _get_cached_kpis(family: str, start_date: str, end_date: str) -> dict:
+    """KPIs de la familia para el rango pedido, servidos desde kpi_cache."""
+    range_start, range_end = get_date_range(start_date, end_date)
+    key = kpi_cache.range_key(start_date, end_date)
+    try:
+        return kpi_cache.get_kpis(family, key, range_start, range_end)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"No se pudieron calcular los KPIs '{family}': {e}")
+
+def _cached_kpis(family: str, start_date: str, end_date: str) -> FastJSONResponse:
+    return FastJSONResponse(_get_cached_kpis(family, start_date, end_date))
+
 @router.get("/acquisition", summary="Obtener KPIs de Adquisición")
 def get_kpis_acquisition_endpoint(start_date: str = None, end_date: str = None):
     """
     Endpoint para los KPIs de la página de Adquisición.
     """
-    range_start, range_end = get_date_range(start_date, end_date)
-    return firestore_service.get_acquisition_kpis(range_start, range_end)
+    return _cached_kpis("acquisition", start_date, end_date)
 
 @router.get("/engagement", summary="Obtener KPIs de Engagement y Conversión")
 def get_kpis_engagement_endpoint(start_date: str = None, end_date: str = None):
     """
     Endpoint para los KPIs de la página de Engagement y Conversión.
     """
-    range_start, range_end = get_date_range(start_date, end_date)
-    return firestore_service.get_engagement_kpis(range_start, range_end)
+    return _cached_kpis("engagement", start_date, end_date)
 
 @router.get("/operations", summary="Obtener KPIs de Operaciones y Calidad")
 def get_kpis_operations_endpoint(start_date: str = None, end_date: str = None):
     """
     Endpoint para los KPIs de la página de Operaciones y Calidad.
     """
-    range_start, range_end = get_date_range(start_date, end_date)
-    return firestore_service.get_operations_kpis(range_start, range_end)
+    return _cached_kpis("operations", start_date, end_date)
 
 @router.get("/retention", summary="Obtener KPIs de Retención y Lealtad")
 def get_kpis_retention_endpoint(start_date: str = None, end_date: str = None):
     """
     Endpoint para los KPIs de la página de Retención y Lealtad.
     """
-    range_start, range_end = get_date_range(start_date, end_date)
-    return firestore_service.get_retention_kpis(range_start, range_end)
+    return _cached_kpis("retention", start_date, end_date)
 
 @router.get("/segmentation", summary="Obtener Segmentación RFM de Clientes")
 def get_kpis_segmentation_endpoint(start_date: str = None, end_date: str = None):
     """
     Endpoint para el análisis de segmentación RFM.
     """
+    return _cached_kpis("segmentation", start_date, end_date)
+
+@router.get("/segmentation/customers", summary="Paginar los clientes de un segmento RFM")
+def get_segment_customers_endpoint(segment: str, start_date: str = None, end_date: str = None,
+                                   page: int = Query(1, ge=1), page_size: int = Query(25, ge=1, le=500)):
+    """
+    Devuelve una página de clientes del segmento indicado, ordenados por monto.
+    """
     range_start, range_end = get_date_range(start_date, end_date)
-    return firestore_service.get_rfm_segmentation(range_start, range_end)
+    return FastJSONResponse(firestore_service.get_rfm_segment_customers(range_start, range_end, segment, page, page_size))
 
 # --- Endpoint para KPIs básicos de la colección 'pedidos' ---
 @router.get("/basic-pedidos", summary="Obtener KPIs básicos de la colección 'pedidos'")
@@ -69,5 +91,27 @@ def get_basic_pedidos_kpis_endpoint(start_date: str = None, end_date: str = None
     """
     Endpoint para KPIs básicos de la colección 'pedidos'.
     """
-    range_start, range_end = get_date_range(start_date, end_date)
-    return firestore_service.get_basic_pedidos_kpis(range_start, range_end)
\ No newline at end of file
+    return _cached_kpis("basic-pedidos", start_date, end_date)
+
+# --- Tablas de los KPIs, por separado y con negociación de contenido ---
+def _is_table(content) -> bool:
+    """Un DataFrame o una lista de registros (ej: 'acquisition_by_commune')."""
+    if isinstance(content, list):
+        return all(isinstance(row, dict) for row in content)
+    # Si hay un DataFrame en el resultado, pandas ya está importado.
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(content, pd.DataFrame)
+
+@router.get("/{family}/tables/{table}", summary="Obtener una tabla de los KPIs (JSON o Arrow)")
+def get_kpi_table_endpoint(family: str, table: str, request: Request, start_date: str = None, end_date: str = None):
+    """
+    Devuelve una de las tablas de una familia de KPIs (ej: 'segmentation' / 'rfm_segments')
+    desde el mismo resultado cacheado que el endpoint de la familia. Se sirve en Arrow IPC
+    si el cliente lo pide en 'Accept' y en JSON en caso contrario.
+    """
+    if family not in kpi_cache.KPI_FAMILIES:
+        raise HTTPException(status_code=404, detail=f"Familia de KPIs '{family}' no encontrada.")
+    content = _get_cached_kpis(family, start_date, end_date).get(table)
+    if not _is_table(content):
+        raise HTTPException(status_code=404, detail=f"Los KPIs '{family}' no tienen una tabla '{table}'.")
+    return table_response(request, content)
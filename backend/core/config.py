@@ -1,4 +1,6 @@
 # Archivo: backend/core/config.py
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -26,6 +28,15 @@ class Settings(BaseSettings):
     FIREBASE_WEB_API_KEY: str
     
     PORT: int = 8080
+
+    # Catálogo de servicios/categorías en memoria, sincronizado con listeners de Firestore.
+    CATALOG_LISTENERS_ENABLED: bool = True
+
+    # Precalcular los KPIs del rango por defecto al arrancar (GET /health/ready espera a que termine).
+    KPI_WARMUP_ENABLED: bool = True
+
+    # Token para perfilar peticiones bajo demanda (cabecera X-Profile-Token). Sin token, deshabilitado.
+    PROFILING_TOKEN: Optional[str] = None
     
     model_config = SettingsConfigDict(env_file=".env")
 
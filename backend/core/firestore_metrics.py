@@ -0,0 +1,301 @@
+# Archivo: backend/core/firestore_metrics.py
+"""
+Contabilidad de uso de Firestore por petición.
+
+'instrument(client)' envuelve el cliente de Firestore en un proxy que cuenta
+documentos leídos, documentos escritos y consultas (idas y vueltas al servidor).
+Los contadores se acumulan en el FirestoreUsage de la petición en curso (un
+ContextVar que fija FirestoreUsageMiddleware). El proxy se enlaza a ese objeto al
+crearse, así que las lecturas hechas en hilos de un ThreadPoolExecutor también se
+atribuyen a la petición que las originó.
+
+Fuera de una petición (ETL, listeners, arranque) el cliente se usa tal cual.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from backend.core.metrics import FIRESTORE_OPERATION_DURATION
+
+USAGE_HEADERS = ("X-Firestore-Reads", "X-Firestore-Writes", "X-Firestore-Queries")
+# Rutas que se excluyen del acumulado (métricas y health checks no deben medirse a sí mismas).
+EXCLUDED_PATH_PREFIXES = ("/metrics", "/health")
+
+
+@dataclass
+class FirestoreUsage:
+    """Contadores de una petición. Se actualizan desde varios hilos."""
+    reads: int = 0
+    writes: int = 0
+    queries: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, reads: int = 0, writes: int = 0, queries: int = 0) -> None:
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+            self.queries += queries
+
+    def as_headers(self) -> Dict[str, str]:
+        return dict(zip(USAGE_HEADERS, (str(self.reads), str(self.writes), str(self.queries))))
+
+
+_current_usage: ContextVar[Optional[FirestoreUsage]] = ContextVar("firestore_usage", default=None)
+
+
+def current_usage() -> Optional[FirestoreUsage]:
+    return _current_usage.get()
+
+
+# ===================================================================
+# ===                    PROXIES DEL CLIENTE                      ===
+# ===================================================================
+
+def _unwrap(obj: Any) -> Any:
+    return obj._target if isinstance(obj, _Proxy) else obj
+
+
+class _Proxy:
+    """Delegación genérica: lo que no se intercepta pasa directo al objeto real."""
+    __slots__ = ("_target", "_usage")
+
+    def __init__(self, target, usage: FirestoreUsage):
+        self._target = target
+        self._usage = usage
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __repr__(self):
+        return f"<instrumented {self._target!r}>"
+
+
+class _SnapshotProxy(_Proxy):
+    """DocumentSnapshot cuya 'reference' también queda instrumentada (ej: doc.reference.delete())."""
+    __slots__ = ()
+
+    @property
+    def reference(self):
+        return _DocumentProxy(self._target.reference, self._usage)
+
+    def to_dict(self):
+        return self._target.to_dict()
+
+
+def _count_stream(snapshots: Iterable[Any], usage: FirestoreUsage, operation: str):
+    usage.add(queries=1)
+    started = time.perf_counter()
+    try:
+        for snapshot in snapshots:
+            # Firestore cobra una lectura por documento devuelto (o por documento inexistente en get_all).
+            usage.add(reads=1)
+            yield _SnapshotProxy(snapshot, usage)
+    finally:
+        # Incluye el tiempo del llamador entre documentos: es la latencia que percibe el endpoint.
+        FIRESTORE_OPERATION_DURATION.labels(operation).observe(time.perf_counter() - started)
+
+
+class _QueryProxy(_Proxy):
+    """CollectionReference / Query: los métodos que encadenan devuelven otro proxy."""
+    __slots__ = ()
+    _CHAINABLE = frozenset({
+        "where", "order_by", "limit", "limit_to_last", "offset", "select",
+        "start_at", "start_after", "end_at", "end_before",
+    })
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in self._CHAINABLE:
+            def _chain(*args, **kwargs):
+                args = [_unwrap(a) for a in args]
+                return _QueryProxy(attr(*args, **kwargs), self._usage)
+            return _chain
+        return attr
+
+    def stream(self, *args, **kwargs):
+        return _count_stream(self._target.stream(*args, **kwargs), self._usage, "query")
+
+    def get(self, *args, **kwargs):
+        return list(self.stream(*args, **kwargs))
+
+    def document(self, *args, **kwargs):
+        return _DocumentProxy(self._target.document(*args, **kwargs), self._usage)
+
+    def add(self, *args, **kwargs):
+        self._usage.add(writes=1)
+        return self._target.add(*args, **kwargs)
+
+
+class _DocumentProxy(_Proxy):
+    __slots__ = ()
+
+    def get(self, *args, **kwargs):
+        self._usage.add(reads=1, queries=1)
+        with FIRESTORE_OPERATION_DURATION.labels("document_get").time():
+            return _SnapshotProxy(self._target.get(*args, **kwargs), self._usage)
+
+    def _write(self, method: str, *args, **kwargs):
+        self._usage.add(writes=1)
+        with FIRESTORE_OPERATION_DURATION.labels("document_write").time():
+            return getattr(self._target, method)(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self._write("set", *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write("delete", *args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        return self._write("create", *args, **kwargs)
+
+    def collection(self, *args, **kwargs):
+        return _QueryProxy(self._target.collection(*args, **kwargs), self._usage)
+
+
+class _BatchProxy(_Proxy):
+    """WriteBatch / Transaction: las escrituras se cuentan al confirmar el lote."""
+    __slots__ = ("_pending",)
+
+    def __init__(self, target, usage: FirestoreUsage):
+        super().__init__(target, usage)
+        self._pending = 0
+
+    def _stage(self, method: str, reference, *args, **kwargs):
+        self._pending += 1
+        return getattr(self._target, method)(_unwrap(reference), *args, **kwargs)
+
+    def set(self, reference, *args, **kwargs):
+        return self._stage("set", reference, *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        return self._stage("update", reference, *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        return self._stage("delete", reference, *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        return self._stage("create", reference, *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        with FIRESTORE_OPERATION_DURATION.labels("commit").time():
+            result = self._target.commit(*args, **kwargs)
+        self._usage.add(writes=self._pending, queries=1)
+        self._pending = 0
+        return result
+
+
+class InstrumentedClient(_Proxy):
+    """Cliente de Firestore que atribuye lecturas, escrituras y consultas a un FirestoreUsage."""
+    __slots__ = ()
+
+    def collection(self, *args, **kwargs):
+        return _QueryProxy(self._target.collection(*args, **kwargs), self._usage)
+
+    def collection_group(self, *args, **kwargs):
+        return _QueryProxy(self._target.collection_group(*args, **kwargs), self._usage)
+
+    def document(self, *args, **kwargs):
+        return _DocumentProxy(self._target.document(*args, **kwargs), self._usage)
+
+    def get_all(self, references, *args, **kwargs):
+        return _count_stream(self._target.get_all([_unwrap(r) for r in references], *args, **kwargs), self._usage, "get_all")
+
+    def batch(self):
+        return _BatchProxy(self._target.batch(), self._usage)
+
+    @property
+    def raw(self):
+        """El cliente sin instrumentar (ej: para 'firestore.transactional' o listeners)."""
+        return self._target
+
+
+def instrument(client):
+    """Envuelve el cliente si hay una petición en curso; si no, lo devuelve tal cual."""
+    usage = _current_usage.get()
+    return client if usage is None else InstrumentedClient(client, usage)
+
+
+# ===================================================================
+# ===          MIDDLEWARE Y ACUMULADO POR RUTA                    ===
+# ===================================================================
+
+class _RouteTotals:
+    """Acumulado en memoria del uso de Firestore por ruta (plantilla de la ruta, no la URL)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._started_at = time.time()
+
+    def record(self, route: str, usage: FirestoreUsage) -> None:
+        with self._lock:
+            totals = self._routes.setdefault(route, {"requests": 0, "reads": 0, "writes": 0, "queries": 0, "max_reads": 0})
+            totals["requests"] += 1
+            totals["reads"] += usage.reads
+            totals["writes"] += usage.writes
+            totals["queries"] += usage.queries
+            totals["max_reads"] = max(totals["max_reads"], usage.reads)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {route: dict(totals) for route, totals in self._routes.items()}
+        for totals in routes.values():
+            totals["avg_reads"] = round(totals["reads"] / totals["requests"], 1)
+        return {
+            "since": self._started_at,
+            # Las rutas más costosas primero.
+            "routes": dict(sorted(routes.items(), key=lambda item: item[1]["reads"], reverse=True)),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._started_at = time.time()
+
+
+route_totals = _RouteTotals()
+
+
+def route_template(scope) -> str:
+    """Plantilla de la ruta resuelta por el router (ej: /api/v1/crud/services/{service_id})."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return f"{scope.get('method', '')} {path or scope.get('path', '')}"
+
+
+class FirestoreUsageMiddleware:
+    """
+    Middleware ASGI que abre un FirestoreUsage por petición, añade las cabeceras
+    X-Firestore-Reads/Writes/Queries a la respuesta y acumula el uso por ruta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = FirestoreUsage()
+        token = _current_usage.set(usage)
+
+        async def send_with_usage(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.extend((k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in usage.as_headers().items())
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_usage)
+        finally:
+            _current_usage.reset(token)
+            if not scope.get("path", "").startswith(EXCLUDED_PATH_PREFIXES):
+                route_totals.record(route_template(scope), usage)
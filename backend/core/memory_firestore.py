@@ -0,0 +1,685 @@
+# Archivo: backend/core/memory_firestore.py
+"""
+Firestore en memoria para benchmarks y pruebas sin conexión.
+
+Implementa el subconjunto del cliente de Firestore que usan backend/services y
+etl/modules/load.py: colecciones y subcolecciones, documentos, where (posicional,
+FieldFilter, And/Or), order_by, limit, offset, select, stream/get, get_all,
+WriteBatch, transacciones (compatibles con @firestore.transactional), los
+transforms ArrayUnion/ArrayRemove/Increment/Maximum/Minimum, SERVER_TIMESTAMP y
+DELETE_FIELD, y listeners on_snapshot.
+
+Se activa con la variable de entorno FIRESTORE_BACKEND=memory: los
+get_db_client() de la API y del ETL devuelven entonces el cliente compartido de
+este módulo. FIRESTORE_MEMORY_LATENCY_MS agrega una latencia fija por llamada
+(cada stream, get, get_all, escritura o commit), o se puede pasar una función
+con 'set_latency' para simular jitter.
+
+Como Firestore, guarda y devuelve copias de los datos, normaliza las fechas sin
+zona horaria a UTC y limita los lotes a 500 operaciones.
+"""
+
+import itertools
+import math
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.base_query import And, FieldFilter, Or
+
+BACKEND_ENV_VAR = "FIRESTORE_BACKEND"
+LATENCY_ENV_VAR = "FIRESTORE_MEMORY_LATENCY_MS"
+MAX_BATCH_OPERATIONS = 500
+
+_MISSING = object()
+
+
+def is_enabled() -> bool:
+    return os.environ.get(BACKEND_ENV_VAR, "").lower() == "memory"
+
+
+# ===================================================================
+# ===                       VALORES Y CAMPOS                      ===
+# ===================================================================
+
+def _copy(value: Any) -> Any:
+    """Copia profunda de mapas y arreglos (el resto de los valores de Firestore es inmutable)."""
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_copy(v) for v in value]
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Any:
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set_field(data: Dict[str, Any], field_path: str, value: Any) -> None:
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        child = data.get(part)
+        if not isinstance(child, dict):
+            child = data[part] = {}
+        data = child
+    _assign(data, parts[-1], value)
+
+
+def _assign(data: Dict[str, Any], key: str, value: Any) -> None:
+    """Asigna un valor aplicando los sentinels y transforms de Firestore."""
+    current = data.get(key, _MISSING)
+    if value is transforms.DELETE_FIELD:
+        data.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        data[key] = datetime.now(timezone.utc)
+    elif isinstance(value, transforms.Increment):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        data[key] = base + value.value
+    elif isinstance(value, transforms.Maximum):
+        data[key] = value.value if not isinstance(current, (int, float)) else max(current, value.value)
+    elif isinstance(value, transforms.Minimum):
+        data[key] = value.value if not isinstance(current, (int, float)) else min(current, value.value)
+    elif isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        result.extend(_copy(v) for v in value.values if v not in result)
+        data[key] = result
+    elif isinstance(value, transforms.ArrayRemove):
+        data[key] = [v for v in current if v not in value.values] if isinstance(current, list) else []
+    elif isinstance(value, dict):
+        # Los mapas anidados pueden traer transforms en sus campos.
+        nested: Dict[str, Any] = {}
+        for k, v in value.items():
+            _assign(nested, k, v)
+        data[key] = nested
+    else:
+        data[key] = _copy(value)
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any]) -> None:
+    """set(..., merge=True): los mapas se combinan recursivamente."""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            _assign(target, key, value)
+
+
+def _type_rank(value: Any) -> int:
+    """Orden de tipos de Firestore: null < bool < número < fecha < texto < bytes < referencia < arreglo < mapa."""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, MemoryDocumentReference):
+        return 6
+    if isinstance(value, (list, tuple)):
+        return 8
+    return 9
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    if isinstance(value, MemoryDocumentReference):
+        return value.path
+    return value
+
+
+def _sort_key(value: Any):
+    if value is _MISSING:
+        return (-1, 0)
+    rank = _type_rank(value)
+    if rank in (8, 9):
+        return (rank, repr(value))
+    return (rank, _normalize(value))
+
+
+def _compare(left: Any, op: str, right: Any) -> bool:
+    if op in ("==", "!="):
+        equal = _type_rank(left) == _type_rank(right) and _normalize(left) == _normalize(right)
+        return equal if op == "==" else not equal
+    if op == "in":
+        return any(_compare(left, "==", r) for r in right)
+    if op == "not-in":
+        return not any(_compare(left, "==", r) for r in right)
+    if op in ("array_contains", "array-contains"):
+        return isinstance(left, list) and any(_compare(item, "==", right) for item in left)
+    if op in ("array_contains_any", "array-contains-any"):
+        return isinstance(left, list) and any(_compare(item, "==", r) for item in left for r in right)
+    # Los filtros de rango solo comparan valores del mismo tipo.
+    if _type_rank(left) != _type_rank(right) or _type_rank(left) in (0, 8, 9):
+        return False
+    left, right = _normalize(left), _normalize(right)
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    if op == ">=":
+        return left >= right
+    raise ValueError(f"Operador no soportado: {op}")
+
+
+def _matches(data: Dict[str, Any], flt) -> bool:
+    if isinstance(flt, (And, Or)):
+        results = (_matches(data, f) for f in flt.filters)
+        return all(results) if isinstance(flt, And) else any(results)
+    value = _get_field(data, flt.field_path)
+    op = getattr(flt.op_string, "name", flt.op_string)
+    if op == "IS_NULL":
+        return value is None
+    if op == "IS_NOT_NULL":
+        return value is not _MISSING and value is not None
+    if op in ("IS_NAN", "IS_NOT_NAN"):
+        is_nan = isinstance(value, float) and math.isnan(value)
+        return is_nan if op == "IS_NAN" else (value is not _MISSING and not is_nan)
+    if value is _MISSING:
+        return False
+    return _compare(value, op, flt.value)
+
+
+# ===================================================================
+# ===                     SNAPSHOTS Y REFERENCIAS                 ===
+# ===================================================================
+
+class MemoryDocumentSnapshot:
+    def __init__(self, reference: "MemoryDocumentReference", data: Optional[Dict[str, Any]],
+                 field_paths: Optional[Iterable[str]] = None):
+        self.reference = reference
+        self._data = data
+        self._field_paths = list(field_paths) if field_paths is not None else None
+        self.read_time = datetime.now(timezone.utc)
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        if self._data is None:
+            return None
+        if self._field_paths is None:
+            return _copy(self._data)
+        projected: Dict[str, Any] = {}
+        for path in self._field_paths:
+            value = _get_field(self._data, path)
+            if value is not _MISSING:
+                _set_field(projected, path, _copy(value))
+        return projected
+
+    def get(self, field_path: str) -> Any:
+        value = _get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client: "MemoryFirestore", path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> "MemoryCollectionReference":
+        return MemoryCollectionReference(self._client, self.path.rsplit("/", 1)[0])
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f"<MemoryDocumentReference {self.path}>"
+
+    def collection(self, collection_id: str) -> "MemoryCollectionReference":
+        return MemoryCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def collections(self) -> List["MemoryCollectionReference"]:
+        return self._client._child_collections(self.path)
+
+    def get(self, field_paths: Optional[Iterable[str]] = None, transaction=None, **kwargs) -> MemoryDocumentSnapshot:
+        self._client._wait()
+        return self._client._snapshot(self, field_paths)
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False, **kwargs):
+        return self._client._commit([("set", self, document_data, merge)])
+
+    def create(self, document_data: Dict[str, Any], **kwargs):
+        return self._client._commit([("create", self, document_data, False)])
+
+    def update(self, field_updates: Dict[str, Any], **kwargs):
+        return self._client._commit([("update", self, field_updates, False)])
+
+    def delete(self, **kwargs):
+        return self._client._commit([("delete", self, None, False)])
+
+    def on_snapshot(self, callback: Callable):
+        return self._client._listen(self.parent.path, callback, doc_id=self.id)
+
+
+# ===================================================================
+# ===                           CONSULTAS                         ===
+# ===================================================================
+
+class MemoryQuery:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, client: "MemoryFirestore", path: str, all_descendants: bool = False,
+                 filters: Tuple = (), orders: Tuple = (), limit: Optional[int] = None,
+                 limit_to_last: bool = False, offset: int = 0, projection: Optional[Tuple[str, ...]] = None,
+                 cursor: Optional[Tuple[str, Any, bool]] = None):
+        self._client = client
+        self._path = path
+        self._all_descendants = all_descendants
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._limit_to_last = limit_to_last
+        self._offset = offset
+        self._projection = projection
+        self._cursor = cursor
+
+    def _copy_with(self, **changes) -> "MemoryQuery":
+        params = {
+            "all_descendants": self._all_descendants, "filters": self._filters, "orders": self._orders,
+            "limit": self._limit, "limit_to_last": self._limit_to_last, "offset": self._offset,
+            "projection": self._projection, "cursor": self._cursor,
+        }
+        params.update(changes)
+        return MemoryQuery(self._client, self._path, **params)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None, *, filter=None) -> "MemoryQuery":
+        flt = filter if filter is not None else FieldFilter(field_path, op_string, value)
+        return self._copy_with(filters=self._filters + (flt,))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "MemoryQuery":
+        return self._copy_with(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "MemoryQuery":
+        return self._copy_with(limit=count, limit_to_last=False)
+
+    def limit_to_last(self, count: int) -> "MemoryQuery":
+        return self._copy_with(limit=count, limit_to_last=True)
+
+    def offset(self, num_to_skip: int) -> "MemoryQuery":
+        return self._copy_with(offset=num_to_skip)
+
+    def select(self, field_paths: Iterable[str]) -> "MemoryQuery":
+        return self._copy_with(projection=tuple(field_paths))
+
+    def start_after(self, document_fields_or_snapshot) -> "MemoryQuery":
+        return self._copy_with(cursor=("after", document_fields_or_snapshot))
+
+    def start_at(self, document_fields_or_snapshot) -> "MemoryQuery":
+        return self._copy_with(cursor=("at", document_fields_or_snapshot))
+
+    def _sort_fields(self) -> List[Tuple[str, str]]:
+        orders = list(self._orders)
+        # Firestore ordena primero por el campo del filtro de desigualdad y al final por ID.
+        if not orders:
+            for flt in self._filters:
+                op = getattr(flt, "op_string", None)
+                if op in ("<", "<=", ">", ">=", "!=", "not-in"):
+                    orders.append((flt.field_path, self.ASCENDING))
+                    break
+        return orders
+
+    def _run(self) -> List[MemoryDocumentSnapshot]:
+        docs = self._client._query_documents(self._path, self._all_descendants)
+        docs = [(path, data) for path, data in docs if all(_matches(data, f) for f in self._filters)]
+        # Un documento sin el campo de orden no aparece en la consulta.
+        orders = self._sort_fields()
+        docs = [(path, data) for path, data in docs if all(_get_field(data, f) is not _MISSING for f, _ in orders)]
+        docs.sort(key=lambda item: item[0].rsplit("/", 1)[-1])
+        for field_path, direction in reversed(orders):
+            docs.sort(key=lambda item: _sort_key(_get_field(item[1], field_path)), reverse=direction == self.DESCENDING)
+
+        if self._cursor is not None:
+            kind, snapshot = self._cursor
+            ids = [path.rsplit("/", 1)[-1] for path, _ in docs]
+            cursor_id = getattr(snapshot, "id", None)
+            if cursor_id in ids:
+                position = ids.index(cursor_id)
+                docs = docs[position + 1:] if kind == "after" else docs[position:]
+
+        docs = docs[self._offset:]
+        if self._limit is not None:
+            docs = docs[-self._limit:] if self._limit_to_last else docs[:self._limit]
+        return [MemoryDocumentSnapshot(MemoryDocumentReference(self._client, path), data, self._projection) for path, data in docs]
+
+    def stream(self, transaction=None, **kwargs) -> Iterator[MemoryDocumentSnapshot]:
+        self._client._wait()
+        return iter(self._run())
+
+    def get(self, transaction=None, **kwargs) -> List[MemoryDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client: "MemoryFirestore", path: str):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> Optional[MemoryDocumentReference]:
+        return MemoryDocumentReference(self._client, self._path.rsplit("/", 1)[0]) if "/" in self._path else None
+
+    def document(self, document_id: Optional[str] = None) -> MemoryDocumentReference:
+        return MemoryDocumentReference(self._client, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        ref = self.document(document_id)
+        ref.create(document_data)
+        return datetime.now(timezone.utc), ref
+
+    def list_documents(self) -> List[MemoryDocumentReference]:
+        with self._client._lock:
+            return [MemoryDocumentReference(self._client, f"{self._path}/{doc_id}")
+                    for doc_id in self._client._collections.get(self._path, {})]
+
+    def on_snapshot(self, callback: Callable):
+        return self._client._listen(self._path, callback)
+
+
+# ===================================================================
+# ===                 ESCRITURAS: LOTES Y TRANSACCIONES           ===
+# ===================================================================
+
+class MemoryWriteBatch:
+    def __init__(self, client: "MemoryFirestore"):
+        self._client = client
+        self._writes: List[Tuple[str, MemoryDocumentReference, Any, bool]] = []
+
+    def _add(self, write) -> None:
+        if len(self._writes) >= MAX_BATCH_OPERATIONS:
+            raise exceptions.InvalidArgument(f"Un lote admite como máximo {MAX_BATCH_OPERATIONS} operaciones.")
+        self._writes.append(write)
+
+    def set(self, reference: MemoryDocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        self._add(("set", reference, document_data, merge))
+
+    def create(self, reference: MemoryDocumentReference, document_data: Dict[str, Any]):
+        self._add(("create", reference, document_data, False))
+
+    def update(self, reference: MemoryDocumentReference, field_updates: Dict[str, Any], **kwargs):
+        self._add(("update", reference, field_updates, False))
+
+    def delete(self, reference: MemoryDocumentReference, **kwargs):
+        self._add(("delete", reference, None, False))
+
+    def __len__(self):
+        return len(self._writes)
+
+    def commit(self, **kwargs):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """Transacción compatible con @firestore.transactional (las escrituras se aplican al confirmar)."""
+    _ids = itertools.count(1)
+
+    def __init__(self, client: "MemoryFirestore", max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    @property
+    def id(self):
+        return self._id
+
+    def get(self, ref_or_query, **kwargs):
+        if isinstance(ref_or_query, MemoryDocumentReference):
+            return iter([ref_or_query.get()])
+        return ref_or_query.stream()
+
+    # --- Interfaz usada por google.cloud.firestore_v1.transaction._Transactional ---
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None) -> None:
+        self._id = f"memory-tx-{next(self._ids)}".encode("ascii")
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+    def _commit(self) -> list:
+        try:
+            return self.commit()
+        finally:
+            self._clean_up()
+
+
+class _Change:
+    class _Type:
+        def __init__(self, name: str):
+            self.name = name
+
+    def __init__(self, kind: str, document: MemoryDocumentSnapshot):
+        self.type = self._Type(kind)
+        self.document = document
+
+
+class MemoryWatch:
+    def __init__(self, client: "MemoryFirestore", key):
+        self._client = client
+        self._key = key
+        self.is_active = True
+
+    def unsubscribe(self) -> None:
+        self.is_active = False
+        self._client._unlisten(self._key)
+
+
+# ===================================================================
+# ===                             CLIENTE                         ===
+# ===================================================================
+
+class MemoryFirestore:
+    def __init__(self, latency: Union[float, Callable[[], float], None] = None):
+        # {ruta de la colección: {id del documento: datos}}
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self._listeners: Dict[int, Tuple[str, Optional[str], Callable]] = {}
+        self._listener_ids = itertools.count(1)
+        self.set_latency(latency)
+
+    # --- Configuración ---
+    def set_latency(self, latency: Union[float, Callable[[], float], None]) -> None:
+        """Latencia por llamada en segundos (número o función que la devuelve)."""
+        self._latency = latency
+
+    def _wait(self) -> None:
+        latency = self._latency() if callable(self._latency) else self._latency
+        if latency:
+            time.sleep(latency)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._collections.clear()
+
+    def load_documents(self, collection_path: str, documents: Iterable[Dict[str, Any]], id_field: str = "id") -> int:
+        """Carga documentos directamente (sin latencia ni límite de lote). Devuelve cuántos cargó."""
+        with self._lock:
+            collection = self._collections.setdefault(collection_path, {})
+            count = 0
+            for document in documents:
+                data: Dict[str, Any] = {}
+                for key, value in document.items():
+                    _assign(data, key, value)
+                collection[str(document.get(id_field) or uuid.uuid4().hex[:20])] = data
+                count += 1
+            return count
+
+    def dump(self, collection_path: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return _copy(self._collections.get(collection_path, {}))
+
+    # --- API del cliente ---
+    def collection(self, *path: str) -> MemoryCollectionReference:
+        return MemoryCollectionReference(self, "/".join(path))
+
+    def document(self, *path: str) -> MemoryDocumentReference:
+        return MemoryDocumentReference(self, "/".join(path))
+
+    def collection_group(self, collection_id: str) -> MemoryQuery:
+        return MemoryQuery(self, collection_id, all_descendants=True)
+
+    def collections(self) -> List[MemoryCollectionReference]:
+        with self._lock:
+            return [MemoryCollectionReference(self, path) for path in self._collections if "/" not in path]
+
+    def get_all(self, references: Iterable[MemoryDocumentReference], field_paths: Optional[Iterable[str]] = None,
+                transaction=None, **kwargs) -> Iterator[MemoryDocumentSnapshot]:
+        self._wait()
+        return iter([self._snapshot(ref, field_paths) for ref in references])
+
+    def batch(self) -> MemoryWriteBatch:
+        return MemoryWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> MemoryTransaction:
+        return MemoryTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def close(self) -> None:
+        pass
+
+    # --- Internos ---
+    def _child_collections(self, doc_path: str) -> List[MemoryCollectionReference]:
+        prefix = doc_path + "/"
+        with self._lock:
+            return [MemoryCollectionReference(self, path) for path in self._collections
+                    if path.startswith(prefix) and "/" not in path[len(prefix):]]
+
+    def _snapshot(self, ref: MemoryDocumentReference, field_paths=None) -> MemoryDocumentSnapshot:
+        collection_path, doc_id = ref.path.rsplit("/", 1)
+        with self._lock:
+            data = self._collections.get(collection_path, {}).get(doc_id)
+        return MemoryDocumentSnapshot(ref, data, field_paths)
+
+    def _query_documents(self, path: str, all_descendants: bool) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            if all_descendants:
+                paths = [p for p in self._collections if p.rsplit("/", 1)[-1] == path]
+            else:
+                paths = [path]
+            return [(f"{p}/{doc_id}", data) for p in paths for doc_id, data in self._collections.get(p, {}).items()]
+
+    def _commit(self, writes) -> list:
+        self._wait()
+        changes: List[Tuple[str, str, str]] = []
+        with self._lock:
+            # Se validan todas las operaciones antes de aplicar ninguna: el lote es atómico.
+            staged: Dict[str, Optional[Dict[str, Any]]] = {}
+            for kind, ref, payload, merge in writes:
+                collection_path, doc_id = ref.path.rsplit("/", 1)
+                existing = staged[ref.path] if ref.path in staged else self._collections.get(collection_path, {}).get(doc_id)
+                if kind == "create" and existing is not None:
+                    raise exceptions.AlreadyExists(f"El documento ya existe: {ref.path}")
+                if kind == "update" and existing is None:
+                    raise exceptions.NotFound(f"No existe el documento: {ref.path}")
+                if kind == "delete":
+                    staged[ref.path] = None
+                    continue
+                data = _copy(existing) if (existing is not None and (merge or kind == "update")) else {}
+                if kind == "update":
+                    for field_path, value in payload.items():
+                        _set_field(data, field_path, value)
+                elif merge:
+                    _merge(data, payload)
+                else:
+                    for key, value in payload.items():
+                        _assign(data, key, value)
+                staged[ref.path] = data
+
+            for path, data in staged.items():
+                collection_path, doc_id = path.rsplit("/", 1)
+                collection = self._collections.setdefault(collection_path, {})
+                existed = doc_id in collection
+                if data is None:
+                    if existed:
+                        del collection[doc_id]
+                        changes.append((collection_path, doc_id, "REMOVED"))
+                else:
+                    collection[doc_id] = data
+                    changes.append((collection_path, doc_id, "MODIFIED" if existed else "ADDED"))
+        self._notify(changes)
+        return [datetime.now(timezone.utc)] * len(writes)
+
+    # --- Listeners (se notifican de forma síncrona tras cada commit) ---
+    def _listen(self, collection_path: str, callback: Callable, doc_id: Optional[str] = None) -> MemoryWatch:
+        key = next(self._listener_ids)
+        with self._lock:
+            self._listeners[key] = (collection_path, doc_id, callback)
+            docs = [(i, d) for i, d in self._collections.get(collection_path, {}).items() if doc_id is None or i == doc_id]
+        snapshots = [MemoryDocumentSnapshot(MemoryDocumentReference(self, f"{collection_path}/{i}"), d) for i, d in docs]
+        callback(snapshots, [_Change("ADDED", s) for s in snapshots], datetime.now(timezone.utc))
+        return MemoryWatch(self, key)
+
+    def _unlisten(self, key: int) -> None:
+        with self._lock:
+            self._listeners.pop(key, None)
+
+    def _notify(self, changes: List[Tuple[str, str, str]]) -> None:
+        if not changes or not self._listeners:
+            return
+        with self._lock:
+            listeners = list(self._listeners.values())
+        for collection_path, doc_id, callback in listeners:
+            relevant = [(i, kind) for p, i, kind in changes if p == collection_path and (doc_id is None or i == doc_id)]
+            if not relevant:
+                continue
+            change_objects = []
+            for i, kind in relevant:
+                ref = MemoryDocumentReference(self, f"{collection_path}/{i}")
+                change_objects.append(_Change(kind, self._snapshot(ref) if kind != "REMOVED" else MemoryDocumentSnapshot(ref, {})))
+            with self._lock:
+                docs = [MemoryDocumentSnapshot(MemoryDocumentReference(self, f"{collection_path}/{i}"), d)
+                        for i, d in self._collections.get(collection_path, {}).items() if doc_id is None or i == doc_id]
+            callback(docs, change_objects, datetime.now(timezone.utc))
+
+
+_client: Optional[MemoryFirestore] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> MemoryFirestore:
+    """Cliente en memoria compartido por el proceso."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            latency_ms = float(os.environ.get(LATENCY_ENV_VAR, "0") or 0)
+            _client = MemoryFirestore(latency=latency_ms / 1000 if latency_ms else None)
+        return _client
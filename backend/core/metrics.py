@@ -0,0 +1,132 @@
+# Archivo: backend/core/metrics.py
+"""
+Métricas de la API en formato Prometheus.
+
+- Latencia de peticiones HTTP por ruta (plantilla, no URL) y código de estado,
+  y peticiones en curso (PrometheusMiddleware).
+- Latencia y reintentos de las llamadas a Jumpseller (jumpseller_service._make_request).
+- Latencia de las consultas a Firestore hechas dentro de una petición (core.firestore_metrics).
+- Peticiones de KPIs resueltas desde la caché (fresca o vencida), calculadas o
+  agrupadas con un cálculo idéntico en curso, y duración de cada cálculo
+  (services.kpi_cache); días servidos desde la caché de agregados diarios
+  (services.daily_cache).
+- Duración de las etapas del último ETL: el ETL corre en otro proceso (Streamlit),
+  así que escribe archivos de texto Prometheus en ETL_METRICS_DIR y aquí se
+  reexponen en cada scrape (EtlTextfileCollector).
+
+Todo se expone en GET /metrics.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+
+logger = logging.getLogger(__name__)
+
+# Buckets en segundos: de consultas de pocos ms a KPIs que recorren colecciones completas.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ETL_METRICS_DIR = Path(__file__).resolve().parents[2] / "etl" / "data" / "metrics"
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "liliapp_http_request_duration_seconds", "Latencia de las peticiones HTTP.",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("liliapp_http_requests_in_flight", "Peticiones HTTP en curso.")
+
+JUMPSELLER_REQUEST_DURATION = Histogram(
+    "liliapp_jumpseller_request_duration_seconds", "Latencia de cada intento de llamada a la API de Jumpseller.",
+    ["method", "endpoint", "status"], buckets=LATENCY_BUCKETS,
+)
+JUMPSELLER_RETRIES = Counter(
+    "liliapp_jumpseller_retries_total", "Reintentos de llamadas a Jumpseller.", ["method", "endpoint", "reason"],
+)
+
+FIRESTORE_OPERATION_DURATION = Histogram(
+    "liliapp_firestore_operation_duration_seconds",
+    "Latencia de las operaciones de Firestore (consultas hasta leer el último documento).",
+    ["operation"], buckets=LATENCY_BUCKETS,
+)
+
+KPI_REQUESTS = Counter(
+    "liliapp_kpi_requests_total",
+    "Peticiones de KPIs por familia y resultado: hit (caché), stale (caché vencida, recalculada en segundo plano), "
+    "miss (calculadas) o coalesced (esperaron un cálculo idéntico en curso).",
+    ["family", "outcome"],
+)
+KPI_COMPUTE_DURATION = Histogram(
+    "liliapp_kpi_compute_duration_seconds", "Duración de cada cálculo de una familia de KPIs.",
+    ["family"], buckets=LATENCY_BUCKETS,
+)
+KPI_COMPUTATIONS_IN_FLIGHT = Gauge("liliapp_kpi_computations_in_flight", "Cálculos de KPIs en curso.", ["family"])
+KPI_DAY_PARTIALS = Counter(
+    "liliapp_kpi_day_partials_total",
+    "Agregados diarios usados al armar un rango: hit (caché), fetched (día leído y guardado) o uncached (extremo parcial o día en curso).",
+    ["dataset", "outcome"],
+)
+
+
+def route_label(scope) -> str:
+    """Plantilla de la ruta resuelta; las URL sin ruta no generan series nuevas."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """Middleware ASGI que mide latencia por ruta/estado y peticiones en curso."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.labels(scope["method"], route_label(scope), status).observe(time.perf_counter() - started)
+
+
+class EtlTextfileCollector:
+    """Reexpone las métricas que el ETL deja en archivos '*.prom' (formato texto de Prometheus)."""
+
+    def __init__(self, directory: Path = ETL_METRICS_DIR):
+        self.directory = directory
+
+    def collect(self):
+        # Cada pipeline escribe su propio archivo con las mismas familias: se fusionan por nombre.
+        families = {}
+        for path in sorted(self.directory.glob("*.prom")):
+            try:
+                for family in text_string_to_metric_families(path.read_text(encoding="utf-8")):
+                    if family.name in families:
+                        families[family.name].samples.extend(family.samples)
+                    else:
+                        families[family.name] = family
+            except (OSError, ValueError) as e:
+                logger.warning("No se pudieron leer las métricas del ETL en %s: %s", path, e)
+        yield from families.values()
+
+
+REGISTRY.register(EtlTextfileCollector())
+
+
+def render_latest() -> bytes:
+    return generate_latest(REGISTRY)
+
@@ -0,0 +1,99 @@
+# Archivo: backend/core/middleware.py
+import zlib
+
+from starlette.responses import PlainTextResponse
+
+# Límites del cuerpo gzip: el comprimido se corta mientras se recibe y el descomprimido
+# se produce por trozos, de modo que un "gzip bomb" pequeño no puede agotar la memoria.
+MAX_COMPRESSED_BYTES = 10 * 1024 * 1024
+MAX_DECOMPRESSED_BYTES = 50 * 1024 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class GZipRequestMiddleware:
+    """
+    Middleware ASGI que descomprime los cuerpos de petición enviados con
+    'Content-Encoding: gzip' (el GZipMiddleware de Starlette solo comprime respuestas).
+    Responde 413 si el cuerpo supera max_compressed_bytes comprimido o
+    max_decompressed_bytes descomprimido, y 400 si el gzip no es válido.
+    """
+
+    def __init__(self, app, max_compressed_bytes: int = MAX_COMPRESSED_BYTES,
+                 max_decompressed_bytes: int = MAX_DECOMPRESSED_BYTES):
+        self.app = app
+        self.max_compressed_bytes = max_compressed_bytes
+        self.max_decompressed_bytes = max_decompressed_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        encoding = request_headers.get(b"content-encoding", b"").lower()
+        if encoding != b"gzip":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            declared = int(request_headers.get(b"content-length", b"0"))
+        except ValueError:
+            declared = 0
+        try:
+            if declared > self.max_compressed_bytes:
+                raise _BodyTooLarge()
+            body = await self._read_decompressed(receive)
+        except _BodyTooLarge:
+            response = PlainTextResponse("Cuerpo de la petición demasiado grande.", status_code=413)
+            await response(scope, receive, send)
+            return
+        except zlib.error:
+            response = PlainTextResponse("Cuerpo gzip inválido.", status_code=400)
+            await response(scope, receive, send)
+            return
+
+        headers = [(k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        # Se modifica el scope original en lugar de copiarlo: el router escribe ahí la ruta
+        # resuelta ('route') que leen los middlewares externos de métricas y de Firestore.
+        scope["headers"] = headers
+
+        body_sent = False
+
+        async def receive_decompressed():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, receive_decompressed, send)
+
+    async def _read_decompressed(self, receive) -> bytes:
+        """Descomprime el cuerpo a medida que llega, sin pasar de los límites."""
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks, compressed, decompressed = [], 0, 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            compressed += len(chunk)
+            if compressed > self.max_compressed_bytes:
+                raise _BodyTooLarge()
+            if decompressor.eof:
+                if chunk:
+                    raise zlib.error("datos después del final del gzip")
+                continue
+            # Se pide un byte más de lo permitido: si llega, el cuerpo excede el límite.
+            out = decompressor.decompress(chunk, self.max_decompressed_bytes - decompressed + 1)
+            decompressed += len(out)
+            if decompressed > self.max_decompressed_bytes:
+                raise _BodyTooLarge()
+            chunks.append(out)
+        if not decompressor.eof or decompressor.unused_data:
+            raise zlib.error("gzip incompleto o con datos adicionales")
+        return b"".join(chunks)
@@ -0,0 +1,226 @@
+# Archivo: backend/core/profiling.py
+"""
+Perfilado bajo demanda de una petición.
+
+Se activa por petición con la cabecera 'X-Profile' (o el parámetro '?profile=')
+y requiere 'X-Profile-Token' igual a settings.PROFILING_TOKEN; sin token
+configurado el perfilado queda deshabilitado. Modos:
+
+- 'sample' (por defecto): un hilo muestrea la pila del hilo que ejecuta el
+  endpoint cada PROFILE_SAMPLE_INTERVAL segundos. El resultado son "collapsed
+  stacks" ('a;b;c 42'), el formato que leen flamegraph.pl y speedscope.
+- 'cprofile': cProfile determinista; el resultado es el informe de pstats.
+
+ProfilingRoute envuelve el endpoint para perfilar en el mismo hilo en el que
+corre (los endpoints síncronos se ejecutan en el threadpool). Sin la cabecera,
+el costo por petición es una lectura de ContextVar.
+Los perfiles se guardan en memoria (los últimos MAX_STORED_PROFILES) y se
+consultan en /api/v1/admin/profiles.
+"""
+
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi.routing import APIRoute
+
+from backend.core.config import settings
+
+PROFILE_MODES = ("sample", "cprofile")
+PROFILE_SAMPLE_INTERVAL = 0.005
+MAX_STORED_PROFILES = 50
+# Líneas del informe de cProfile (funciones ordenadas por tiempo acumulado).
+CPROFILE_REPORT_LINES = 60
+
+
+@dataclass
+class ProfileRecord:
+    id: str
+    method: str
+    path: str
+    route: Optional[str]
+    mode: str
+    started_at: float
+    duration_ms: float = 0.0
+    samples: int = 0
+    content: str = ""
+
+    def summary(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.__dict__.items() if k != "content"}
+
+
+@dataclass
+class _ProfileRequest:
+    mode: str
+    record: Optional[ProfileRecord] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+_requested: ContextVar[Optional[_ProfileRequest]] = ContextVar("profile_request", default=None)
+_profiles: Deque[ProfileRecord] = deque(maxlen=MAX_STORED_PROFILES)
+_profiles_lock = threading.Lock()
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    expected = settings.PROFILING_TOKEN
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    with _profiles_lock:
+        return [record.summary() for record in reversed(_profiles)]
+
+
+def get_profile(profile_id: str) -> Optional[ProfileRecord]:
+    with _profiles_lock:
+        return next((record for record in _profiles if record.id == profile_id), None)
+
+
+# ===================================================================
+# ===                         PERFILADORES                        ===
+# ===================================================================
+
+def _frame_label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+class _StackSampler(threading.Thread):
+    """Muestrea periódicamente la pila de un hilo y cuenta las pilas colapsadas."""
+
+    def __init__(self, target_ident: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+@contextmanager
+def _profile_current_thread(request: _ProfileRequest):
+    record = ProfileRecord(id=uuid.uuid4().hex[:12], mode=request.mode, started_at=time.time(), **request.meta)
+    started = time.perf_counter()
+    if request.mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            stats = pstats.Stats(profiler, stream=out).sort_stats("cumulative")
+            stats.print_stats(CPROFILE_REPORT_LINES)
+            record.samples = stats.total_calls
+            record.content = out.getvalue()
+    else:
+        sampler = _StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            record.samples = sum(sampler.stacks.values())
+            record.content = sampler.collapsed()
+    record.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    request.record = record
+    with _profiles_lock:
+        _profiles.append(record)
+
+
+def _profiled(endpoint):
+    """Envuelve un endpoint: solo perfila si la petición en curso lo pidió."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            request = _requested.get()
+            if request is None or request.record is not None:
+                return await endpoint(*args, **kwargs)
+            with _profile_current_thread(request):
+                return await endpoint(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        request = _requested.get()
+        if request is None or request.record is not None:
+            return endpoint(*args, **kwargs)
+        with _profile_current_thread(request):
+            return endpoint(*args, **kwargs)
+    return wrapper
+
+
+class ProfilingRoute(APIRoute):
+    """APIRoute cuyo endpoint puede perfilarse bajo demanda (ver ProfilingMiddleware)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que, si la petición trae 'X-Profile'/'?profile=' y un token
+    válido, marca la petición para perfilarla y devuelve 'X-Profile-Id'.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_TOKEN:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        mode = headers.get(b"x-profile", b"").decode("latin-1")
+        if not mode and b"profile=" in scope.get("query_string", b""):
+            mode = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [""])[0]
+        token = headers.get(b"x-profile-token")
+        if not mode or not is_authorized(token.decode("latin-1") if token else None):
+            await self.app(scope, receive, send)
+            return
+
+        request = _ProfileRequest(
+            mode=mode if mode in PROFILE_MODES else PROFILE_MODES[0],
+            meta={"method": scope["method"], "path": scope["path"], "route": None},
+        )
+        token_var = _requested.set(request)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start" and request.record is not None:
+                request.record.route = getattr(scope.get("route"), "path", None)
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", request.record.id.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _requested.reset(token_var)
@@ -0,0 +1,187 @@
+# Archivo: backend/core/responses.py
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Filas por record batch en las respuestas Arrow.
+ARROW_BATCH_ROWS = 64_000
+# Metadato del esquema Arrow con las columnas que viajan como texto JSON.
+ARROW_JSON_COLUMNS_KEY = b"liliapp.json_columns"
+
+
+def dataframe_to_columnar(df) -> dict:
+    """
+    Codifica un DataFrame en formato columnar: {"columns": [...], "data": [[...], ...]}.
+    Un índice con significado (no RangeIndex) se conserva como columna.
+    """
+    import pandas as pd
+
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    return {"columns": [str(c) for c in df.columns], "data": df.to_numpy(dtype=object).tolist()}
+
+
+def _default(obj: Any) -> Any:
+    """Serializa los tipos que orjson no conoce (pandas, escalares numpy, sets, Decimal)."""
+    # Solo consultamos pandas/numpy si ya fueron importados: no forzamos su carga.
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        if isinstance(obj, pd.DataFrame):
+            return dataframe_to_columnar(obj)
+        if isinstance(obj, pd.Series):
+            return obj.to_dict()
+        if obj is pd.NaT:
+            return None
+        if isinstance(obj, pd.Timestamp):
+            return obj.isoformat()
+        if isinstance(obj, (pd.Period, pd.Interval)):
+            return str(obj)
+        if obj is pd.NA:
+            return None
+    np = sys.modules.get("numpy")
+    if np is not None:
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def _normalize_key(key: Any) -> Any:
+    if isinstance(key, (str, int, float, bool)) or key is None:
+        return key
+    try:
+        value = _default(key)
+    except TypeError:
+        return str(key)
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+
+def _sanitize(value: Any) -> Any:
+    """Normaliza recursivamente claves de diccionario que orjson no acepta (ej: numpy.int64)."""
+    if isinstance(value, dict):
+        return {_normalize_key(k): _sanitize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_sanitize(v) for v in value]
+    try:
+        converted = _default(value)
+    except TypeError:
+        return value
+    return _sanitize(converted) if isinstance(converted, (dict, list)) else converted
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa a JSON con orjson, con soporte nativo de numpy, pandas y fechas."""
+    try:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    except TypeError:
+        # Camino lento: claves de diccionario no estándar (ej: numpy.int64 de value_counts()).
+        return orjson.dumps(_sanitize(content), default=_default, option=_ORJSON_OPTIONS)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    Respuesta JSON basada en orjson. Devolverla directamente desde un endpoint evita el
+    paso por 'jsonable_encoder' de FastAPI, que es lento y falla con tipos numpy/pandas.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ===================================================================
+# ===          NEGOCIACIÓN DE CONTENIDO: APACHE ARROW IPC         ===
+# ===================================================================
+
+def accepts_arrow(request: Request) -> bool:
+    """Indica si el cliente pidió el formato Arrow IPC (stream) en la cabecera 'Accept'."""
+    return ARROW_STREAM_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _column_to_arrow(values, pa):
+    """
+    Columna Arrow con el tipo inferido, o None si Arrow no puede tiparla (ej: un campo
+    que es texto en unos documentos y número en otros).
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowException, TypeError, ValueError):
+        return None
+
+
+def to_arrow_ipc(content: Any):
+    """
+    Escribe una tabla como stream Arrow IPC. Acepta una lista de documentos (las columnas
+    se construyen directamente desde los registros) o un DataFrame (un índice con
+    significado se conserva como columna, igual que en dataframe_to_columnar).
+    Las columnas que Arrow no puede tipar se envían como texto JSON y se anotan en el
+    esquema. Devuelve un pyarrow.Buffer (soporta el protocolo de buffer, no se copia a bytes).
+    """
+    import pyarrow as pa
+
+    if isinstance(content, list):
+        # Una sola pasada por los documentos: cada valor se coloca en su columna.
+        by_name = {}
+        for i, record in enumerate(content):
+            for key, value in record.items():
+                column = by_name.get(key)
+                if column is None:
+                    column = by_name[key] = [None] * len(content)
+                column[i] = value
+        names, columns = list(by_name), list(by_name.values())
+    else:
+        import pandas as pd
+
+        df = content if isinstance(content.index, pd.RangeIndex) else content.reset_index()
+        names = [str(c) for c in df.columns]
+        columns = [df.iloc[:, i] for i in range(df.shape[1])]
+
+    arrays, json_columns = [], []
+    for name, values in zip(names, columns):
+        array = _column_to_arrow(values, pa)
+        if array is None:
+            array = pa.array([None if v is None else dumps(v).decode("utf-8") for v in values], type=pa.string())
+            json_columns.append(name)
+        arrays.append(array)
+
+    metadata = {ARROW_JSON_COLUMNS_KEY: dumps(json_columns)} if json_columns else None
+    table = pa.Table.from_arrays(arrays, names=names, metadata=metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=ARROW_BATCH_ROWS)
+    return sink.getvalue()
+
+
+class ArrowStreamResponse(Response):
+    """Respuesta tabular (lista de documentos o DataFrame) en formato Apache Arrow IPC (stream)."""
+
+    media_type = ARROW_STREAM_MEDIA_TYPE
+
+    def render(self, content: Any) -> memoryview:
+        return memoryview(to_arrow_ipc(content))
+
+
+def table_response(request: Request, content: Any) -> Response:
+    """
+    Devuelve una tabla en Arrow si el cliente lo pidió en 'Accept'; en caso contrario,
+    como JSON (el comportamiento por defecto: lista de registros, o formato columnar
+    si es un DataFrame).
+    """
+    headers = {"Vary": "Accept"}
+    if accepts_arrow(request):
+        return ArrowStreamResponse(content, headers=headers)
+    return FastJSONResponse(content, headers=headers)
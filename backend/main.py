@@ -1,14 +1,23 @@
 # Archivo: backend/main.py
 import uvicorn
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 import firebase_admin
 from firebase_admin import credentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 
 # 1. Importa la instancia de configuración
 from backend.core.config import settings
-from backend.api.v1.endpoints import kpis, auth, crud, jumpseller, audit
+from backend.core import memory_firestore
+from backend.core.middleware import GZipRequestMiddleware
+from backend.core.firestore_metrics import FirestoreUsageMiddleware, route_totals
+from backend.core.metrics import CONTENT_TYPE_LATEST, PrometheusMiddleware, render_latest
+from backend.core.profiling import ProfilingMiddleware
+from backend.core.responses import FastJSONResponse
+from backend.api.v1.endpoints import kpis, auth, crud, jumpseller, audit, admin
+from backend.services import catalog_service, kpi_cache
 
 
 # 2. Construye el diccionario de credenciales desde las variables de entorno
@@ -27,10 +36,25 @@ cred_dict = {
 }
 
 # 3. Inicializa Firebase con el diccionario de credenciales
-cred = credentials.Certificate(cred_dict)
-firebase_admin.initialize_app(cred)
+# (con FIRESTORE_BACKEND=memory los datos viven en memoria y no hay credenciales reales)
+if not memory_firestore.is_enabled():
+    cred = credentials.Certificate(cred_dict)
+    firebase_admin.initialize_app(cred)
 
-app = FastAPI(title="LiliApp BI API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Catálogo en memoria: la carga inicial llega con el primer snapshot de cada listener.
+    if settings.CATALOG_LISTENERS_ENABLED:
+        catalog_service.hot_catalog.start()
+    # Canal de Firestore y KPIs de los últimos 30 días en segundo plano; /health/ready responde 503 hasta terminar.
+    if settings.KPI_WARMUP_ENABLED:
+        kpi_cache.start_warm_up(*kpis.get_date_range(None, None))
+    else:
+        kpi_cache.readiness.mark_ready()
+    yield
+    catalog_service.hot_catalog.stop()
+
+app = FastAPI(title="LiliApp BI API", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 # Configura CORS
 app.add_middleware(
@@ -41,6 +65,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip de respuestas grandes y descompresión de peticiones gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(GZipRequestMiddleware)
+
+# Lecturas/escrituras de Firestore por petición (cabeceras X-Firestore-*)
+app.add_middleware(FirestoreUsageMiddleware)
+# Perfilado bajo demanda (cabeceras X-Profile y X-Profile-Token)
+app.add_middleware(ProfilingMiddleware)
+# Latencia por ruta y peticiones en curso (el más externo: mide también a los demás middlewares)
+app.add_middleware(PrometheusMiddleware)
+
 
 # Incluir las rutas de los KPIs
 app.include_router(kpis.router, prefix="/api/v1/kpis", tags=["KPIs"])
@@ -48,8 +83,29 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(crud.router, prefix="/api/v1/crud", tags=["CRUD Operations"])
 app.include_router(jumpseller.router, prefix="/api/v1/jumpseller", tags=["Jumpseller API"]) 
 app.include_router(audit.router, prefix="/api/v1/audit", tags=["Audit"]) 
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin Tools"])
 
 @app.get("/")
 def read_root():
     return {"status": "LiliApp BI API is running"}
 
+@app.get("/health/live", include_in_schema=False)
+def liveness():
+    """El proceso responde (no implica que esté listo para recibir tráfico)."""
+    return {"status": "ok"}
+
+@app.get("/health/ready", include_in_schema=False)
+def readiness():
+    """200 cuando terminó el precalentamiento de KPIs; 503 mientras tanto."""
+    state = kpi_cache.readiness.snapshot()
+    return FastJSONResponse(state, status_code=200 if state["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus."""
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/metrics/firestore")
+def firestore_metrics():
+    """Uso acumulado de Firestore por ruta desde el arranque (o el último reinicio de contadores)."""
+    return route_totals.snapshot()
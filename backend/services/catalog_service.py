@@ -0,0 +1,298 @@
+# backend/services/catalog_service.py
+"""
+Capa de consulta del catálogo (servicios y categorías).
+
+- HotCatalog: copia completa en memoria de 'services' y 'categories', cargada al
+  iniciar la API y mantenida al día con listeners 'on_snapshot' de Firestore.
+  Cada cambio construye un nuevo CatalogSnapshot inmutable y lo publica con una
+  sola asignación, así los lectores nunca ven un catálogo a medio actualizar.
+- Si el catálogo en memoria no está listo o quedó desfasado, las consultas
+  vuelven a Firestore: los servicios se leen por referencia de documento con
+  'get_all' (sin el límite de 30 valores de los filtros 'in'), en bloques
+  paralelos, y el resultado se guarda en una caché con TTL.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from cachetools import TTLCache
+from firebase_admin import firestore
+
+from backend.core import memory_firestore
+from backend.core.firestore_metrics import instrument
+
+# Referencias por llamada a get_all y llamadas simultáneas.
+LOOKUP_CHUNK_SIZE = 100
+LOOKUP_MAX_WORKERS = 4
+CACHE_TTL_SECONDS = 600
+CACHE_MAX_ENTRIES = 50_000
+
+UNCATEGORIZED = "Sin Categoría"
+# Colecciones que el catálogo en memoria mantiene sincronizadas.
+CATALOG_COLLECTIONS = ("services", "categories")
+# Segundos que se tolera un listener caído antes de dejar de servir desde memoria.
+MAX_STALENESS_SECONDS = 300
+# Intervalo mínimo entre intentos de reiniciar un listener caído.
+RESTART_INTERVAL_SECONDS = 30
+
+logger = logging.getLogger(__name__)
+
+_service_cache: TTLCache = TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+_category_cache: TTLCache = TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=LOOKUP_MAX_WORKERS, thread_name_prefix="catalog")
+
+
+def get_db_client():
+    if memory_firestore.is_enabled():
+        return instrument(memory_firestore.get_client())
+    return instrument(firestore.client())
+
+
+def category_id_of(service: Dict[str, Any]) -> Optional[str]:
+    """ID de la categoría principal de un servicio (modelo híbrido o normalizado)."""
+    category = service.get("category")
+    if isinstance(category, dict) and category.get("id"):
+        return str(category["id"])
+    return str(service["categoryId"]) if service.get("categoryId") else None
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fetch_docs(collection: str, doc_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Lee documentos por ID en bloques paralelos. Los inexistentes se devuelven como None."""
+    db = get_db_client()
+
+    def _fetch(chunk: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        refs = [db.collection(collection).document(doc_id) for doc_id in chunk]
+        return {snap.id: (snap.to_dict() if snap.exists else None) for snap in db.get_all(refs)}
+
+    found: Dict[str, Optional[Dict[str, Any]]] = {}
+    for result in _executor.map(_fetch, list(_chunks(doc_ids, LOOKUP_CHUNK_SIZE))):
+        found.update(result)
+    return found
+
+
+def _cached_lookup(cache: TTLCache, keys: Iterable[str], loader) -> Dict[str, Any]:
+    """Devuelve {clave: valor} leyendo de la caché y cargando solo las claves que faltan."""
+    keys = {str(k) for k in keys if k is not None}
+    with _cache_lock:
+        hits = {k: cache[k] for k in keys if k in cache}
+    missing = sorted(keys - hits.keys())
+    if missing:
+        loaded = loader(missing)
+        with _cache_lock:
+            for key in missing:
+                cache[key] = loaded.get(key)
+        hits.update({key: loaded.get(key) for key in missing})
+    return hits
+
+
+def get_category_names(category_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Nombre de cada categoría ({category_id: nombre o None})."""
+    def _load(ids: List[str]) -> Dict[str, Optional[str]]:
+        return {cid: (doc or {}).get("name") for cid, doc in _fetch_docs("categories", ids).items()}
+    return _cached_lookup(_category_cache, category_ids, _load)
+
+
+def get_service_categories(service_ids: Iterable[str]) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Resuelve la categoría de cada servicio: {service_id: {"categoryId", "categoryName"}}.
+    Funciona para cualquier cantidad de servicios.
+    """
+    snapshot = hot_catalog.fresh_snapshot()
+    if snapshot is not None:
+        return {str(sid): snapshot.service_category(str(sid)) for sid in service_ids if sid is not None}
+
+    def _load(ids: List[str]) -> Dict[str, Optional[str]]:
+        return {sid: (category_id_of(doc) if doc else None) for sid, doc in _fetch_docs("services", ids).items()}
+
+    service_to_category = _cached_lookup(_service_cache, service_ids, _load)
+    names = get_category_names(cid for cid in service_to_category.values() if cid)
+    return {
+        sid: {"categoryId": cid, "categoryName": names.get(cid) if cid else None}
+        for sid, cid in service_to_category.items()
+    }
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _service_cache.clear()
+        _category_cache.clear()
+
+
+# ===================================================================
+# ===          CATÁLOGO EN MEMORIA (LISTENERS ON_SNAPSHOT)        ===
+# ===================================================================
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Vista inmutable del catálogo. Los documentos no deben modificarse."""
+    services: Mapping[str, Dict[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    categories: Mapping[str, Dict[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    version: int = 0
+
+    def get(self, collection: str) -> Mapping[str, Dict[str, Any]]:
+        return self.services if collection == "services" else self.categories
+
+    def service_category(self, service_id: str) -> Dict[str, Optional[str]]:
+        service = self.services.get(service_id)
+        category_id = category_id_of(service) if service else None
+        category = self.categories.get(category_id) if category_id else None
+        return {"categoryId": category_id, "categoryName": category.get("name") if category else None}
+
+
+class HotCatalog:
+    """Catálogo completo en memoria, sincronizado con listeners de Firestore."""
+
+    def __init__(self):
+        self._snapshot = CatalogSnapshot()
+        self._write_lock = threading.Lock()
+        self._watches: Dict[str, Any] = {}
+        self._loaded: Dict[str, threading.Event] = {name: threading.Event() for name in CATALOG_COLLECTIONS}
+        self._last_update: Dict[str, float] = {}
+        self._degraded_since: Optional[float] = None
+        self._db = None
+        # Colecciones cuyo próximo snapshot reemplaza por completo la copia en memoria.
+        self._resync: set = set()
+        self._restart_lock = threading.Lock()
+        self._last_restart = 0.0
+
+    # --- Ciclo de vida ---
+    def start(self, db=None) -> None:
+        """Registra los listeners. La carga inicial llega de forma asíncrona con el primer snapshot."""
+        self._db = db or get_db_client()
+        for name in CATALOG_COLLECTIONS:
+            if name not in self._watches:
+                self._watches[name] = self._db.collection(name).on_snapshot(self._make_callback(name))
+        logger.info("Catálogo en memoria: listeners iniciados para %s.", ", ".join(CATALOG_COLLECTIONS))
+
+    def _restart_inactive(self) -> None:
+        """Vuelve a registrar los listeners que Firestore cerró por un error no recuperable."""
+        if time.time() - self._last_restart < RESTART_INTERVAL_SECONDS or not self._restart_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_restart = time.time()
+            for name, watch in list(self._watches.items()):
+                if not watch.is_active:
+                    logger.warning("Catálogo en memoria: el listener de '%s' se cerró; se reinicia.", name)
+                    with self._write_lock:
+                        self._resync.add(name)
+                    self._watches[name] = self._db.collection(name).on_snapshot(self._make_callback(name))
+        finally:
+            self._restart_lock.release()
+
+    def stop(self) -> None:
+        for watch in self._watches.values():
+            watch.unsubscribe()
+        self._watches.clear()
+
+    def wait_until_loaded(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for event in self._loaded.values():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not event.wait(remaining):
+                return False
+        return True
+
+    def _make_callback(self, collection: str):
+        def _on_snapshot(docs, changes, read_time):
+            try:
+                self._apply_changes(collection, changes)
+            except Exception:  # Un error en el callback no debe matar el hilo del listener
+                logger.exception("Catálogo en memoria: error aplicando cambios de '%s'.", collection)
+        return _on_snapshot
+
+    def _apply_changes(self, collection: str, changes) -> None:
+        with self._write_lock:
+            current = self._snapshot
+            # Tras reiniciar un listener, su primer snapshot trae la colección completa.
+            updated = {} if collection in self._resync else dict(current.get(collection))
+            self._resync.discard(collection)
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    updated.pop(doc.id, None)
+                else:
+                    updated[doc.id] = {**doc.to_dict(), "id": doc.id}
+            frozen = MappingProxyType(updated)
+            self._snapshot = CatalogSnapshot(
+                services=frozen if collection == "services" else current.services,
+                categories=frozen if collection == "categories" else current.categories,
+                version=current.version + 1,
+            )
+            self._last_update[collection] = time.time()
+        self._loaded[collection].set()
+
+    # --- Lectura ---
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        return self._snapshot
+
+    def is_loaded(self) -> bool:
+        return all(event.is_set() for event in self._loaded.values())
+
+    def _listeners_active(self) -> bool:
+        return bool(self._watches) and all(watch.is_active for watch in self._watches.values())
+
+    def staleness_seconds(self) -> float:
+        """
+        Segundos que el catálogo lleva sin garantía de estar al día: 0 mientras todos
+        los listeners estén activos y la carga inicial haya terminado; si no, el
+        tiempo transcurrido desde que se detectó el problema.
+        """
+        if self.is_loaded() and self._listeners_active():
+            self._degraded_since = None
+            return 0.0
+        if self._degraded_since is None:
+            self._degraded_since = time.time()
+        if self._watches:
+            self._restart_inactive()
+        return time.time() - self._degraded_since
+
+    def fresh_snapshot(self, max_staleness: float = MAX_STALENESS_SECONDS) -> Optional[CatalogSnapshot]:
+        """El snapshot actual si está cargado y al día; None para que el llamador lea de Firestore."""
+        if not self._watches or not self.is_loaded() or self.staleness_seconds() > max_staleness:
+            return None
+        return self._snapshot
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "enabled": bool(self._watches),
+            "loaded": self.is_loaded(),
+            "listeners_active": self._listeners_active(),
+            "staleness_seconds": round(self.staleness_seconds(), 1),
+            "version": snapshot.version,
+            "services": len(snapshot.services),
+            "categories": len(snapshot.categories),
+            "last_update": {name: ts for name, ts in self._last_update.items()},
+        }
+
+
+hot_catalog = HotCatalog()
+
+
+def list_catalog_documents(collection: str) -> List[Dict[str, Any]]:
+    """Todos los documentos de 'services' o 'categories', desde memoria si el catálogo está al día."""
+    snapshot = hot_catalog.fresh_snapshot()
+    if snapshot is not None:
+        return list(snapshot.get(collection).values())
+    return [{**doc.to_dict(), "id": doc.id} for doc in get_db_client().collection(collection).stream()]
+
+
+def get_catalog_document(collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+    """Un servicio o categoría por ID, desde memoria si el catálogo está al día."""
+    snapshot = hot_catalog.fresh_snapshot()
+    if snapshot is not None:
+        return snapshot.get(collection).get(str(doc_id))
+    doc = get_db_client().collection(collection).document(str(doc_id)).get()
+    return {**doc.to_dict(), "id": doc.id} if doc.exists else None
@@ -0,0 +1,131 @@
+# backend/services/cohort_service.py
+"""
+Motor vectorizado de cohortes de retención.
+
+Cada cliente pertenece a la cohorte del mes de su primer pedido, tomado de toda
+su historia ('first_orders') y no solo del rango consultado: así un cliente que
+vuelve no se cuenta como nuevo en el mes de su regreso. Para cada pedido
+se calcula el desfase en meses desde ese primer mes y la matriz cohorte×desfase se
+arma con un único np.bincount sobre los pares (cliente, desfase) únicos, sin
+tablas cliente×mes intermedias. Escala a millones de pedidos: todo el trabajo es
+aritmética entera sobre arreglos numpy.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _months_since_epoch(dates: Iterable[Any]) -> np.ndarray:
+    """Convierte fechas a meses enteros desde 1970-01 (NaT -> -1)."""
+    timestamps = pd.to_datetime(pd.Series(dates), utc=True, errors="coerce")
+    months = timestamps.dt.tz_localize(None).to_numpy(dtype="datetime64[M]")
+    valid = ~np.isnat(months)
+    out = np.full(len(months), -1, dtype=np.int64)
+    out[valid] = months[valid].astype(np.int64)
+    return out
+
+
+def _month_label(month: int) -> str:
+    return f"{1970 + month // 12:04d}-{month % 12 + 1:02d}"
+
+
+def empty_cohort_matrix() -> Dict[str, Any]:
+    return {"cohorts": [], "offsets": [], "sizes": [], "counts": [], "retention": []}
+
+
+def build_cohort_matrix(customer_ids: Iterable[Any], order_dates: Iterable[Any],
+                        last_month: Optional[Any] = None, max_offset: Optional[int] = None,
+                        first_orders: Optional[pd.Series] = None,
+                        first_observed_month: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Construye la matriz de retención por cohortes mensuales.
+
+    Args:
+        customer_ids: ID de cliente de cada pedido.
+        order_dates: fecha de cada pedido (alineada con customer_ids).
+        last_month: último mes observable (por defecto, el del pedido más reciente).
+            Las celdas posteriores a él quedan en None: aún no se pueden observar.
+        max_offset: desfase máximo en meses a incluir (por defecto, todos).
+        first_orders: fecha del primer pedido de cada cliente en toda su historia
+            (Series indexada por customerId). Si se entrega, la cohorte de cada cliente
+            es la de ese primer pedido (no la de su primer pedido en los datos
+            recibidos) y el tamaño de cada cohorte cuenta a todos sus clientes.
+            Los clientes ausentes de la serie usan su primer pedido en los datos.
+        first_observed_month: primer mes con actividad observada (inicio del rango
+            consultado). Las celdas anteriores quedan en None.
+
+    Returns:
+        Un diccionario compacto:
+            cohorts:   etiquetas 'YYYY-MM' de las cohortes (las de clientes con pedidos en los datos).
+            offsets:   desfases en meses [0, 1, ..., W-1].
+            sizes:     clientes de cada cohorte.
+            counts:    matriz cohorte×desfase de clientes activos.
+            retention: matriz de porcentajes (counts / sizes * 100), None si no observable.
+    """
+    customers = pd.Series(customer_ids, dtype=object)
+    months = _months_since_epoch(order_dates)
+    valid = customers.notna().to_numpy() & (months >= 0)
+    if not valid.any():
+        return empty_cohort_matrix()
+
+    codes, uniques = pd.factorize(customers[valid])
+    months = months[valid]
+    n_customers = len(uniques)
+
+    # Mes del primer pedido de cada cliente y desfase de cada pedido respecto a él.
+    first_month = np.full(n_customers, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first_month, codes, months)
+    in_history = np.zeros(n_customers, dtype=bool)
+    history_months = None
+    if first_orders is not None:
+        history_months = pd.Series(_months_since_epoch(first_orders.to_numpy()), index=first_orders.index)
+        history_months = history_months[history_months >= 0]
+        known = history_months.reindex(uniques).to_numpy(dtype=float)
+        in_history = ~np.isnan(known)
+        first_month[in_history] = np.minimum(first_month[in_history], known[in_history].astype(np.int64))
+    offsets = months - first_month[codes]
+
+    width = int(offsets.max()) + 1
+    if max_offset is not None:
+        width = min(width, max_offset + 1)
+        keep = offsets < width
+        codes, offsets = codes[keep], offsets[keep]
+
+    # Un cliente cuenta una sola vez por desfase, aunque tenga varios pedidos en el mes.
+    pairs = pd.unique(codes.astype(np.int64) * width + offsets)
+    pair_customers, pair_offsets = pairs // width, pairs % width
+
+    customer_cohort, cohort_months = pd.factorize(first_month, sort=True)
+    n_cohorts = len(cohort_months)
+    counts = np.bincount(customer_cohort[pair_customers] * width + pair_offsets,
+                         minlength=n_cohorts * width).reshape(n_cohorts, width)
+    if history_months is None:
+        sizes = counts[:, 0]
+    else:
+        # Todos los clientes de la cohorte según la historia, más los que no figuran en ella.
+        history_sizes = history_months.value_counts()
+        sizes = np.array([int(history_sizes.get(m, 0)) for m in cohort_months], dtype=np.int64)
+        sizes += np.bincount(customer_cohort[~in_history], minlength=n_cohorts)
+
+    if last_month is None:
+        observable_until = int(months.max())
+    else:
+        observable_until = int(_months_since_epoch([last_month])[0])
+    calendar_months = cohort_months[:, None] + np.arange(width)[None, :]
+    observable = calendar_months <= observable_until
+    if first_observed_month is not None:
+        observable &= calendar_months >= int(_months_since_epoch([first_observed_month])[0])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        retention = np.round(counts / sizes[:, None] * 100, 1)
+    retention = np.where(observable, retention, np.nan)
+
+    return {
+        "cohorts": [_month_label(int(m)) for m in cohort_months],
+        "offsets": list(range(width)),
+        "sizes": sizes.tolist(),
+        "counts": counts.tolist(),
+        "retention": [[None if np.isnan(v) else float(v) for v in row] for row in retention],
+    }
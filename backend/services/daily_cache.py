@@ -0,0 +1,167 @@
+# backend/services/daily_cache.py
+"""
+Caché por día de agregados aditivos (conteos, sumas e histogramas).
+
+Un KPI aditivo sobre un rango es la suma de sus agregados diarios, así que cada
+día completo se resume una vez y se guarda ('partial': dict de números y
+Counters). Al mover el selector de fechas un día, el nuevo rango se arma con los
+días ya cacheados y solo se consulta a Firestore el día que falta:
+
+- Los días que faltan se agrupan en tramos contiguos y cada tramo se lee con una
+  sola consulta; los documentos se reparten por día (UTC, como get_date_range).
+- Los extremos que no cubren un día completo (ej: el rango por defecto termina
+  "ahora") y los días que aún no terminan se consultan siempre y nunca se guardan.
+- Un fin de rango a las 23:59:59 (rangos explícitos del dashboard) cuenta como el
+  día completo.
+
+Los días guardados vencen a los DAY_TTL_SECONDS, el mismo TTL blando de
+kpi_cache: pedidos que cambian de estado o reciben calificación después de su
+día se reflejan con la misma demora que antes.
+"""
+
+import contextvars
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from cachetools import TTLCache
+
+from backend.core.metrics import KPI_DAY_PARTIALS
+
+DAY_TTL_SECONDS = 300
+DAY_CACHE_MAX_DAYS = 1500
+# Consultas simultáneas a Firestore (tramos de días y extremos del rango).
+FETCH_MAX_WORKERS = 4
+
+Partial = Dict[str, Any]
+Interval = Tuple[datetime, datetime]
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="daily-cache")
+
+
+def _submit(fn: Callable, *args) -> Future:
+    """Envía al executor conservando el contexto de la petición (contadores de lecturas de Firestore)."""
+    return _executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def merge_partials(partials: Iterable[Partial]) -> Partial:
+    """Suma agregados: los Counters se combinan por clave y los números se suman."""
+    merged: Partial = {}
+    for partial in partials:
+        for key, value in partial.items():
+            if isinstance(value, Counter):
+                merged.setdefault(key, Counter()).update(value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def split_range(start: datetime, end: datetime, now: datetime) -> Tuple[List[date], List[Interval]]:
+    """
+    Divide [start, end] en días completos cacheables y fragmentos [desde, hasta)
+    que se consultan directamente (extremos parciales y días que no han terminado).
+    """
+    start, end = _as_utc(start), _as_utc(end)
+    stop = end + timedelta(microseconds=1)
+    if end.time().replace(microsecond=0) == time(23, 59, 59):
+        stop = _day_start(end.date() + timedelta(days=1))
+
+    days: List[date] = []
+    fragments: List[Interval] = []
+    cursor = start
+    while cursor < stop:
+        next_midnight = _day_start(cursor.date() + timedelta(days=1))
+        upper = min(next_midnight, stop)
+        if cursor == _day_start(cursor.date()) and upper == next_midnight and next_midnight <= now:
+            days.append(cursor.date())
+        elif fragments and fragments[-1][1] == cursor:
+            fragments[-1] = (fragments[-1][0], upper)
+        else:
+            fragments.append((cursor, upper))
+        cursor = upper
+    return days, fragments
+
+
+def _contiguous_runs(days: List[date]) -> List[List[date]]:
+    runs: List[List[date]] = []
+    for day in sorted(days):
+        if runs and runs[-1][-1] + timedelta(days=1) == day:
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+class DailyCache:
+    """
+    Agregados diarios de una colección.
+
+    - fetch(desde, hasta): documentos con 'date_field' en [desde, hasta).
+    - summarize(docs): agregado aditivo de esos documentos; summarize([]) es el neutro.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[datetime, datetime], List[Dict[str, Any]]],
+                 summarize: Callable[[List[Dict[str, Any]]], Partial], date_field: str = "createdAt"):
+        self.name = name
+        self._fetch = fetch
+        self._summarize = summarize
+        self._date_field = date_field
+        self._days: TTLCache = TTLCache(maxsize=DAY_CACHE_MAX_DAYS, ttl=DAY_TTL_SECONDS)
+        self._lock = threading.Lock()
+        # Serializa el llenado: dos KPIs que piden los mismos días faltantes los leen una sola vez.
+        self._fill_lock = threading.Lock()
+
+    def get(self, start: datetime, end: datetime) -> Partial:
+        """Agregado del rango [start, end] armado desde los días cacheados."""
+        days, fragments = split_range(start, end, datetime.now(timezone.utc))
+        fragment_futures = [_submit(self._load_fragment, interval) for interval in fragments]
+        KPI_DAY_PARTIALS.labels(self.name, "uncached").inc(len(fragments))
+        day_partials = self._get_days(days)
+        fragment_partials = [future.result() for future in fragment_futures]
+        return merge_partials([self._summarize([]), *day_partials, *fragment_partials])
+
+    def _cached(self, days: List[date]) -> Dict[date, Partial]:
+        with self._lock:
+            return {day: self._days[day] for day in days if day in self._days}
+
+    def _get_days(self, days: List[date]) -> List[Partial]:
+        found = self._cached(days)
+        missing: List[date] = []
+        if len(found) < len(days):
+            with self._fill_lock:
+                found = self._cached(days)
+                missing = [day for day in days if day not in found]
+                for future in [_submit(self._load_run, run) for run in _contiguous_runs(missing)]:
+                    found.update(future.result())
+        KPI_DAY_PARTIALS.labels(self.name, "hit").inc(len(days) - len(missing))
+        KPI_DAY_PARTIALS.labels(self.name, "fetched").inc(len(missing))
+        return [found[day] for day in days]
+
+    def _load_fragment(self, interval: Interval) -> Partial:
+        return self._summarize(self._fetch(*interval))
+
+    def _load_run(self, run: List[date]) -> Dict[date, Partial]:
+        """Lee un tramo de días contiguos con una consulta y guarda el agregado de cada día."""
+        by_day: Dict[date, List[Dict[str, Any]]] = {day: [] for day in run}
+        for doc in self._fetch(_day_start(run[0]), _day_start(run[-1] + timedelta(days=1))):
+            value = doc.get(self._date_field)
+            if isinstance(value, datetime) and _as_utc(value).date() in by_day:
+                by_day[_as_utc(value).date()].append(doc)
+        loaded = {day: self._summarize(docs) for day, docs in by_day.items()}
+        with self._lock:
+            self._days.update(loaded)
+        return loaded
+
+    def clear(self) -> None:
+        with self._lock:
+            self._days.clear()
@@ -1,11 +1,20 @@
 # backend/services/firestore_service.py
-import pandas as pd
+# pandas (y los servicios de cohortes/RFM, que dependen de él) se importan dentro de
+# las funciones de KPIs: los routers no pagan su carga al arrancar la API.
+from __future__ import annotations
+
+import threading
 import traceback
+from collections import Counter
+from cachetools import TTLCache
 from firebase_admin import firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any
+from backend.core import memory_firestore
+from backend.core.firestore_metrics import instrument
+from backend.services import catalog_service, daily_cache
 
 
 # ===================================================================
@@ -25,8 +34,13 @@ COMMUNE_COORDS = {
 }
 
 def get_db_client():
-    """Obtiene el cliente de Firestore de forma segura después de la inicialización."""
-    return firestore.client()
+    """
+    Obtiene el cliente de Firestore de forma segura después de la inicialización.
+    Dentro de una petición, el cliente cuenta lecturas/escrituras (ver core.firestore_metrics).
+    """
+    if memory_firestore.is_enabled():
+        return instrument(memory_firestore.get_client())
+    return instrument(firestore.client())
 
 def _get_completed_orders_in_range(start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
     """Función de ayuda para obtener todas las órdenes completadas en un rango de fechas."""
@@ -34,6 +48,98 @@ def _get_completed_orders_in_range(start_date: datetime, end_date: datetime) ->
     orders_query = db.collection('pedidos').where(filter=FieldFilter('status', '==', 'completed')).where(filter=FieldFilter('createdAt', '>=', start_date)).where(filter=FieldFilter('createdAt', '<=', end_date))
     return [doc.to_dict() for doc in orders_query.stream()]
 
+# Agregados RFM históricos por fecha de corte (rangos que terminan antes de hoy), con
+# el mismo TTL que kpi_cache. Un rango pasado no cambia salvo por cargas del ETL.
+RFM_HISTORY_TTL_SECONDS = 300
+_rfm_history_cache: TTLCache = TTLCache(maxsize=16, ttl=RFM_HISTORY_TTL_SECONDS)
+_rfm_history_lock = threading.Lock()
+
+def _get_completed_orders_until(end_date: datetime, fields: List[str]) -> pd.DataFrame:
+    """Pedidos completados de toda la historia hasta end_date, leyendo solo 'fields'."""
+    import pandas as pd
+    db = get_db_client()
+    query = db.collection('pedidos').where(filter=FieldFilter('status', '==', 'completed')).where(filter=FieldFilter('createdAt', '<=', end_date)).select(fields)
+    return pd.DataFrame([doc.to_dict() for doc in query.stream()], columns=fields)
+
+def _get_first_order_dates(end_date: datetime) -> pd.Series:
+    """
+    Fecha del primer pedido completado de cada cliente en toda su historia (hasta
+    end_date), indexada por customerId. Solo se leen los dos campos necesarios.
+    """
+    import pandas as pd
+    df = _get_completed_orders_until(end_date, ['customerId', 'createdAt']).dropna()
+    if df.empty:
+        return pd.Series(dtype='datetime64[ns, UTC]')
+    return pd.to_datetime(df['createdAt'], utc=True, errors='coerce').groupby(df['customerId']).min()
+
+def get_customer_rfm_table(active_since: datetime = None, active_until: datetime = None) -> pd.DataFrame:
+    """
+    Lee los agregados RFM precalculados por el ETL ('customer_rfm'), sin el arreglo de
+    IDs de pedidos. Con 'active_since'/'active_until' solo se leen los clientes cuyo
+    último pedido cae en ese intervalo.
+    """
+    import pandas as pd
+    from backend.services import rfm_service
+    db = get_db_client()
+    fields = ['lastOrderAt', 'orderCount', 'totalSpend', 'email']
+    query = db.collection(rfm_service.RFM_COLLECTION).select(fields)
+    if active_since is not None:
+        query = query.where(filter=FieldFilter('lastOrderAt', '>=', active_since))
+    if active_until is not None:
+        query = query.where(filter=FieldFilter('lastOrderAt', '<=', active_until))
+    rows = [{'customerId': doc.id, **doc.to_dict()} for doc in query.stream()]
+    df = pd.DataFrame(rows, columns=['customerId', *fields])
+    df['email'] = df['email'].fillna('N/A')
+    return df
+
+def _get_rfm_from_orders(end_date: datetime) -> pd.DataFrame:
+    """
+    Agregados RFM de toda la historia hasta end_date, calculados desde la misma fuente
+    que la tabla 'customer_rfm': las órdenes pagadas de 'orders', por cliente de
+    Jumpseller. El recorrido se guarda en _rfm_history_cache: los KPIs de retención y
+    segmentación y las páginas de clientes de un segmento comparten un solo recorrido.
+    """
+    import pandas as pd
+    from backend.services import rfm_service
+    key = end_date.astimezone(timezone.utc).isoformat()
+    with _rfm_history_lock:
+        cached = _rfm_history_cache.get(key)
+    if cached is not None:
+        return cached
+    db = get_db_client()
+    fields = ['customerId', 'userId', 'createdAt', 'total']
+    query = db.collection('orders').where(filter=FieldFilter('status', 'in', sorted(rfm_service.RFM_ORDER_STATUSES))).where(filter=FieldFilter('createdAt', '<=', end_date)).select(fields)
+    df = pd.DataFrame([doc.to_dict() for doc in query.stream()], columns=fields)
+    df['customerId'] = df['customerId'].fillna(df['userId'])
+    df = df.dropna(subset=['customerId', 'createdAt'])
+    rfm_df = rfm_service.rfm_from_orders(df) if not df.empty else pd.DataFrame(columns=['customerId', 'lastOrderAt', 'orderCount', 'totalSpend'])
+    with _rfm_history_lock:
+        _rfm_history_cache[key] = rfm_df
+    return rfm_df
+
+def _get_scored_rfm(start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """
+    Puntúa los clientes con órdenes pagadas en el rango. La frecuencia y el monto son
+    de toda su historia hasta end_date y la recencia se mide hasta end_date. Ambos
+    caminos leen la misma fuente (órdenes pagadas de 'orders', por cliente de Jumpseller):
+
+    - Si el rango termina hoy, la tabla 'customer_rfm' (historia hasta ahora) ya tiene
+      esos agregados. Sin clientes en la tabla no hay nada que puntuar: las órdenes
+      y la tabla las escribe la misma carga del ETL.
+    - Si termina antes, la tabla contaría órdenes posteriores al rango, así que se
+      agregan las órdenes hasta end_date (ver _get_rfm_from_orders).
+    """
+    import pandas as pd
+    from backend.services import rfm_service
+    if end_date.astimezone(timezone.utc).date() >= datetime.now(timezone.utc).date():
+        rfm_df = get_customer_rfm_table(active_since=start_date, active_until=end_date)
+    else:
+        rfm_df = _get_rfm_from_orders(end_date)
+        rfm_df = rfm_df[pd.to_datetime(rfm_df['lastOrderAt'], utc=True) >= start_date]
+    if rfm_df.empty:
+        return rfm_df
+    return rfm_service.score_rfm(rfm_df, end_date)
+
 def get_user_role(uid: str) -> str:
     """Obtiene el rol (accountType) de un usuario desde su documento en Firestore."""
     db = get_db_client()
@@ -46,6 +152,77 @@ def get_user_role(uid: str) -> str:
         print(f"Error al obtener el rol del usuario {uid}: {e}")
     return 'customer'
     
+# ===================================================================
+# ===           AGREGADOS DIARIOS DE 'PEDIDOS' (ADITIVOS)          ===
+# ===================================================================
+# Los KPIs básicos y los de operaciones son conteos, sumas e histogramas: se arman
+# sumando agregados por día que se guardan en daily_cache (ver ese módulo).
+
+def _get_pedidos_between(lower: datetime, upper: datetime) -> List[Dict[str, Any]]:
+    """Pedidos con createdAt en [lower, upper)."""
+    db = get_db_client()
+    query = db.collection('pedidos').where(filter=FieldFilter('createdAt', '>=', lower)).where(filter=FieldFilter('createdAt', '<', upper))
+    return [doc.to_dict() for doc in query.stream()]
+
+def _summarize_pedidos(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Agregado aditivo de un conjunto de pedidos. Replica los criterios de pandas que
+    usaban los KPIs: los estados/clientes nulos no se cuentan y, si el campo existe
+    en algún pedido del rango, los pedidos sin dirección o pago válidos cuentan
+    como 'Desconocida'/'Desconocido' (por eso se guarda cuántos traen el campo).
+    """
+    partial = {
+        "orders": 0, "cancelled": 0, "total_sum": 0,
+        "rating_sum": 0.0, "rating_count": 0, "completed_rating_sum": 0.0, "completed_rating_count": 0,
+        "with_payment_field": 0, "with_address_field": 0,
+        "by_status": Counter(), "by_customer": Counter(), "by_payment": Counter(),
+        "by_commune": Counter(), "completed_by_commune": Counter(), "by_hour": Counter(),
+    }
+    for doc in docs:
+        status = doc.get('status')
+        completed = status == 'completed'
+        partial["orders"] += 1
+        if status is not None:
+            partial["by_status"][status] += 1
+        if status == 'cancelled':
+            partial["cancelled"] += 1
+        total = doc.get('total')
+        if isinstance(total, (int, float)) and not isinstance(total, bool) and total == total:
+            partial["total_sum"] += total
+        if doc.get('customerId') is not None:
+            partial["by_customer"][doc['customerId']] += 1
+
+        payment = doc.get('paymentDetails')
+        partial["with_payment_field"] += 'paymentDetails' in doc
+        payment_type = payment.get('type', 'Desconocido') if isinstance(payment, dict) else 'Desconocido'
+        if payment_type is not None:
+            partial["by_payment"][payment_type] += 1
+
+        address = doc.get('serviceAddress')
+        partial["with_address_field"] += 'serviceAddress' in doc
+        commune = address.get('commune', 'Desconocida') if isinstance(address, dict) else 'Desconocida'
+        if commune is not None:
+            partial["by_commune"][commune] += 1
+            if completed:
+                partial["completed_by_commune"][commune] += 1
+
+        rating = doc.get('rating')
+        stars = rating.get('stars') if isinstance(rating, dict) else None
+        if stars is not None:
+            partial["rating_sum"] += float(stars)
+            partial["rating_count"] += 1
+            if completed:
+                partial["completed_rating_sum"] += float(stars)
+                partial["completed_rating_count"] += 1
+
+        created_at = doc.get('createdAt')
+        if isinstance(created_at, datetime):
+            hour = created_at.hour if created_at.tzinfo is None else created_at.astimezone(timezone.utc).hour
+            partial["by_hour"][hour] += 1
+    return partial
+
+_pedidos_daily = daily_cache.DailyCache("pedidos", _get_pedidos_between, _summarize_pedidos)
+
 # ===================================================================
 # ===                   FUNCIONES DE CÁLCULO DE KPIs              ===
 def get_basic_pedidos_kpis(start_date: datetime, end_date: datetime) -> Dict[str, Any]:
@@ -59,11 +236,9 @@ def get_basic_pedidos_kpis(start_date: datetime, end_date: datetime) -> Dict[str
     - Pedidos por comuna
     - Calificación promedio
     """
-    db = get_db_client()
-    pedidos_query = db.collection('pedidos').where(filter=FieldFilter('createdAt', '>=', start_date)).where(filter=FieldFilter('createdAt', '<=', end_date))
-    pedidos_docs = [doc.to_dict() for doc in pedidos_query.stream()]
+    partial = _pedidos_daily.get(start_date, end_date)
     result = {
-        "total_pedidos": len(pedidos_docs),
+        "total_pedidos": partial["orders"],
         "pedidos_por_estado": {},
         "monto_total": 0,
         "pedidos_por_cliente": {},
@@ -71,45 +246,17 @@ def get_basic_pedidos_kpis(start_date: datetime, end_date: datetime) -> Dict[str
         "pedidos_por_comuna": {},
         "calificacion_promedio": 0
     }
-    if not pedidos_docs:
+    if not partial["orders"]:
         return result
-    import pandas as pd
-    df = pd.DataFrame(pedidos_docs)
-    # Pedidos por estado
-    if 'status' in df.columns:
-        result["pedidos_por_estado"] = df['status'].value_counts().to_dict()
-    # Monto total vendido
-    if 'total' in df.columns:
-        result["monto_total"] = df['total'].sum()
-    # Pedidos por cliente
-    if 'customerId' in df.columns:
-        result["pedidos_por_cliente"] = df['customerId'].value_counts().to_dict()
-    # Métodos de pago
-    if 'paymentDetails' in df.columns:
-        def get_tipo_pago(x):
-            if isinstance(x, dict):
-                return x.get('type', 'Desconocido')
-            return 'Desconocido'
-        df['metodo_pago'] = df['paymentDetails'].apply(get_tipo_pago)
-        result["metodos_pago"] = df['metodo_pago'].value_counts().to_dict()
-    # Pedidos por comuna
-    if 'serviceAddress' in df.columns:
-        def get_comuna(sa):
-            if isinstance(sa, dict):
-                return sa.get('commune', 'Desconocida')
-            return 'Desconocida'
-        df['comuna'] = df['serviceAddress'].apply(get_comuna)
-        result["pedidos_por_comuna"] = df['comuna'].value_counts().to_dict()
-    # Calificación promedio
-    if 'rating' in df.columns:
-        def get_stars(r):
-            if isinstance(r, dict):
-                return r.get('stars')
-            return None
-        ratings = df['rating'].dropna().apply(get_stars)
-        ratings = ratings.dropna().astype(float)
-        if not ratings.empty:
-            result["calificacion_promedio"] = ratings.mean()
+    result["pedidos_por_estado"] = dict(partial["by_status"].most_common())
+    result["monto_total"] = partial["total_sum"]
+    result["pedidos_por_cliente"] = dict(partial["by_customer"].most_common())
+    if partial["with_payment_field"]:
+        result["metodos_pago"] = dict(partial["by_payment"].most_common())
+    if partial["with_address_field"]:
+        result["pedidos_por_comuna"] = dict(partial["by_commune"].most_common())
+    if partial["rating_count"]:
+        result["calificacion_promedio"] = partial["rating_sum"] / partial["rating_count"]
     return result
 # ===================================================================
 
@@ -118,6 +265,7 @@ def get_acquisition_kpis(start_date: datetime, end_date: datetime) -> Dict[str,
     Calcula KPIs de adquisición, incluyendo una serie de tiempo diaria robusta y
     datos enriquecidos por comuna para el mapa de calor.
     """
+    import pandas as pd
     db = get_db_client()
     try:
         customers_query = db.collection('customers').where(filter=FieldFilter('createdAt', '>=', start_date)).where(filter=FieldFilter('createdAt', '<=', end_date))
@@ -179,12 +327,14 @@ def get_acquisition_kpis(start_date: datetime, end_date: datetime) -> Dict[str,
     except Exception as e:
         print(f"!!! ERROR en get_acquisition_kpis: {repr(e)}")
         traceback.print_exc()
-        return {} # Devolvemos un diccionario vacío en caso de error catastrófico
+        # Se propaga: kpi_cache no guarda el error y conserva el último resultado válido.
+        raise
 
 def get_engagement_kpis(start_date: datetime, end_date: datetime) -> Dict[str, Any]:
     """
     Calcula KPIs de engagement, con un análisis de Top Categorías en lugar de Top Servicios.
     """
+    import pandas as pd
     db = get_db_client()
     completed_orders_docs = _get_completed_orders_in_range(start_date, end_date)
     
@@ -205,24 +355,25 @@ def get_engagement_kpis(start_date: datetime, end_date: datetime) -> Dict[str, A
     df_orders['payment_type'] = df_orders['paymentDetails'].apply(lambda x: x.get('type', 'Desconocido') if isinstance(x, dict) else 'Desconocido')
     payment_distribution = df_orders['payment_type'].value_counts().to_dict()
 
-    # --- NUEVA LÓGICA: Top 5 Categorías por Monto Vendido ---
+    # --- Top 5 Categorías por Monto Vendido ---
     top_categories = []
     if 'items' in df_orders.columns:
-        # 1. Obtenemos una lista de todos los serviceId únicos vendidos en el período
-        all_items = df_orders.explode('items').dropna(subset=['items'])
-        all_items['serviceId'] = all_items['items'].apply(lambda x: x.get('serviceId') if isinstance(x, dict) else None)
-        unique_service_ids = all_items['serviceId'].dropna().unique().tolist()
-        
-        if unique_service_ids:
-            # 2. Hacemos una única consulta para obtener los detalles de esos servicios
-            services_docs = {doc.id: doc.to_dict() for doc in db.collection('services').where(filter=FieldFilter('id', 'in', unique_service_ids)).stream()}
-            
-            # 3. Mapeamos cada serviceId a su nombre de categoría
-            all_items['category_info'] = all_items['serviceId'].map(lambda sid: services_docs.get(sid, {}).get('category'))
-            all_items['category_name'] = all_items['category_info'].apply(lambda c: c.get('name') if isinstance(c, dict) else 'Sin Categoría')
-            all_items['item_price'] = all_items['items'].apply(lambda i: i.get('price', 0) if isinstance(i, dict) else 0)
-            
-            # 4. Agrupamos por nombre de categoría y sumamos el total vendido
+        # 1. Un registro por ítem vendido, con su serviceId y precio
+        all_items = pd.DataFrame([item for items in df_orders['items'] if isinstance(items, list) for item in items if isinstance(item, dict)])
+        if 'serviceId' in all_items.columns:
+            all_items['serviceId'] = all_items['serviceId'].astype(str)
+            # 2. El ETL guarda 'categoryName' en cada ítem; solo los ítems antiguos sin ese
+            #    campo se resuelven con la capa de catálogo (get_all por bloques + caché)
+            embedded = all_items['categoryName'] if 'categoryName' in all_items.columns else pd.Series(None, index=all_items.index, dtype=object)
+            missing = embedded.isna()
+            if missing.any():
+                service_categories = catalog_service.get_service_categories(all_items.loc[missing, 'serviceId'].unique())
+                category_names = {sid: info['categoryName'] for sid, info in service_categories.items()}
+                embedded = embedded.where(~missing, all_items['serviceId'].map(category_names))
+            all_items['category_name'] = embedded.fillna(catalog_service.UNCATEGORIZED)
+            all_items['item_price'] = pd.to_numeric(all_items['price'], errors='coerce').fillna(0) if 'price' in all_items.columns else 0
+
+            # 3. Agrupamos por nombre de categoría y sumamos el total vendido
             category_sales = all_items.groupby('category_name')['item_price'].sum().nlargest(5)
             top_categories = [{"name": index, "sales": value} for index, value in category_sales.items()]
 
@@ -236,60 +387,29 @@ def get_engagement_kpis(start_date: datetime, end_date: datetime) -> Dict[str, A
 
 def get_operations_kpis(start_date: datetime, end_date: datetime) -> Dict[str, Any]:
     """
-    Calcula KPIs de operaciones y calidad de forma robusta.
+    Calcula KPIs de operaciones y calidad desde los agregados diarios de 'pedidos'.
+    Calificación y comunas consideran solo pedidos completados; las horas son UTC.
     """
-    db = get_db_client()
-    orders_query = db.collection('pedidos').where(filter=FieldFilter('createdAt', '>=', start_date)).where(filter=FieldFilter('createdAt', '<=', end_date))
-    all_orders = [doc.to_dict() for doc in orders_query.stream()]
-    
-    if not all_orders:
+    partial = _pedidos_daily.get(start_date, end_date)
+    if not partial["orders"]:
         return {"cancellation_rate": 0, "avg_rating": 0, "orders_by_commune": {}, "orders_by_hour": {}}
 
-    df_all_orders = pd.DataFrame(all_orders)
-
-    # --- Cálculo Robusto de Tasa de Cancelación ---
-    if 'status' in df_all_orders.columns:
-        total_orders = len(df_all_orders)
-        cancellation_rate = (df_all_orders['status'] == 'cancelled').sum() / total_orders * 100 if total_orders > 0 else 0
-    else:
-        cancellation_rate = 0
-
-    df_completed = df_all_orders[df_all_orders['status'] == 'completed'].copy() if 'status' in df_all_orders.columns else pd.DataFrame()
-    
-    # --- Cálculo Robusto de Calificación Promedio ---
-    if not df_completed.empty and 'rating' in df_completed.columns:
-        # Usamos .dropna() para ignorar órdenes sin calificación
-        ratings = df_completed['rating'].dropna().apply(lambda r: r.get('stars') if isinstance(r, dict) else None)
-        avg_rating = ratings.mean()
-    else:
-        avg_rating = 0
-
-    # --- Cálculo Robusto de Órdenes por Comuna ---
-    if not df_completed.empty and 'serviceAddress' in df_completed.columns:
-        orders_by_commune = df_completed['serviceAddress'].apply(lambda sa: sa.get('commune', 'Desconocida') if isinstance(sa, dict) else 'Desconocida').value_counts().to_dict()
-    else:
-        orders_by_commune = {}
-    
-    # --- Cálculo Robusto de Órdenes por Hora ---
-    if 'createdAt' in df_all_orders.columns:
-        # Usamos errors='coerce' para manejar fechas malformadas
-        df_all_orders['hour'] = pd.to_datetime(df_all_orders['createdAt'], errors='coerce', utc=True).dt.hour
-        # Usamos .dropna() para ignorar filas donde la fecha no se pudo convertir
-        orders_by_hour = df_all_orders.dropna(subset=['hour'])['hour'].astype(int).value_counts().sort_index().reindex(range(24), fill_value=0).tolist()
-    else:
-        orders_by_hour = [0] * 24
-    
+    cancellation_rate = partial["cancelled"] / partial["orders"] * 100
+    avg_rating = partial["completed_rating_sum"] / partial["completed_rating_count"] if partial["completed_rating_count"] else 0
+    orders_by_commune = dict(partial["completed_by_commune"].most_common()) if partial["with_address_field"] else {}
     # Nota: El cálculo de avg_cycle_time_days se omite por ahora hasta que se valide la existencia y formato de 'statusHistory'.
-    
+
     return {
         "cancellation_rate": round(cancellation_rate, 2),
-        "avg_rating": round(avg_rating, 2) if pd.notna(avg_rating) else 0,
+        "avg_rating": round(avg_rating, 2),
         "orders_by_commune": orders_by_commune,
-        "orders_by_hour": orders_by_hour
+        "orders_by_hour": [partial["by_hour"].get(hour, 0) for hour in range(24)]
     }
 
 def get_retention_kpis(start_date: datetime, end_date: datetime) -> Dict[str, Any]:
     """Calcula KPIs de retención."""
+    import pandas as pd
+    from backend.services import cohort_service, rfm_service
     try:
         # --- Obtener pedidos completados en el rango ---
         all_orders_docs = _get_completed_orders_in_range(start_date, end_date)
@@ -300,7 +420,7 @@ def get_retention_kpis(start_date: datetime, end_date: datetime) -> Dict[str, An
                 "mau": 0,
                 "repurchase_rate": 0,
                 "avg_orders_by_commune": {},
-                "retention_cohorts": pd.DataFrame(),
+                "retention_cohorts": cohort_service.empty_cohort_matrix(),
                 "rfm_segments": pd.DataFrame(),
                 "referred_pct": 0
             }
@@ -321,8 +441,10 @@ def get_retention_kpis(start_date: datetime, end_date: datetime) -> Dict[str, An
         users_query = db.collection('users').stream()
         users = {doc.id: doc.to_dict() for doc in users_query}
         retention_30d = 0
+        # Primer pedido de cada cliente en toda su historia, no solo dentro del rango.
+        first_orders = _get_first_order_dates(end_date)
         if 'customerId' in df_orders.columns and 'createdAt' in df_orders.columns:
-            user_first_order = df_orders.groupby('customerId')['createdAt'].min()
+            user_first_order = first_orders.reindex(df_orders['customerId'].dropna().unique())
             user_signup = pd.Series({uid: u.get('createdAt') for uid, u in users.items()})
             user_signup = pd.to_datetime(user_signup, utc=True, errors='coerce')
             user_first_order = pd.to_datetime(user_first_order, utc=True, errors='coerce')
@@ -345,37 +467,19 @@ def get_retention_kpis(start_date: datetime, end_date: datetime) -> Dict[str, An
             orders_group = df_orders.groupby('commune').size()
             avg_orders_by_commune = {commune: round(orders_group[commune] / commune_group[commune], 2) if commune_group[commune] > 0 else 0 for commune in commune_group.index}
 
-        # --- Cohortes de Retención (simplificado) ---
-        retention_cohorts = pd.DataFrame()
+        # --- Cohortes de Retención (matriz cohorte × meses desde el primer pedido) ---
+        # La cohorte sale del primer pedido histórico; solo la actividad del rango llena la matriz.
+        retention_cohorts = cohort_service.empty_cohort_matrix()
         if 'customerId' in df_orders.columns and 'createdAt' in df_orders.columns:
-            df_orders['order_month'] = pd.to_datetime(df_orders['createdAt'], utc=True, errors='coerce').dt.to_period('M')
-            cohort_table = df_orders.groupby(['customerId', 'order_month']).size().unstack(fill_value=0)
-            retention_cohorts = cohort_table.apply(lambda x: x.gt(0).astype(int)).groupby(level=0).cumsum().groupby(level=0).max().value_counts().sort_index().to_frame('Clientes Retenidos')
+            retention_cohorts = cohort_service.build_cohort_matrix(
+                df_orders['customerId'], df_orders['createdAt'], last_month=end_date,
+                first_orders=first_orders, first_observed_month=start_date)
 
-        # --- Segmentación RFM (simplificado) ---
+        # --- Segmentación RFM (tabla 'customer_rfm' mantenida por el ETL) ---
         rfm_segments = pd.DataFrame()
-        if 'customerId' in df_orders.columns and 'createdAt' in df_orders.columns and 'total' in df_orders.columns:
-            snapshot_date = end_date
-            rfm_df = df_orders.groupby('customerId').agg(
-                recency=('createdAt', lambda date: (snapshot_date - pd.to_datetime(date, utc=True).max()).days),
-                frequency=('customerId', 'count'),
-                monetary=('total', 'sum')
-            ).reset_index()
-            try:
-                rfm_df['R_score'] = pd.qcut(rfm_df['recency'], 4, labels=[4, 3, 2, 1], duplicates='drop')
-                rfm_df['F_score'] = pd.qcut(rfm_df['frequency'].rank(method='first'), 4, labels=[1, 2, 3, 4], duplicates='drop')
-                rfm_df['M_score'] = pd.qcut(rfm_df['monetary'].rank(method='first'), 4, labels=[1, 2, 3, 4], duplicates='drop')
-            except ValueError:
-                rfm_df['R_score'] = 1; rfm_df['F_score'] = 1; rfm_df['M_score'] = 1
-            rfm_df['RFM_score'] = rfm_df['R_score'].astype(str) + rfm_df['F_score'].astype(str) + rfm_df['M_score'].astype(str)
-            segment_map = {
-                r'[3-4][3-4][3-4]': '🏆 Campeones',
-                r'[3-4][1-2][1-4]': '💖 Leales',
-                r'[1-2][3-4][3-4]': '😮 En Riesgo',
-                r'[1-2][1-2][1-2]': '❄️ Hibernando'
-            }
-            rfm_df['Segmento'] = rfm_df['RFM_score'].replace(segment_map, regex=True)
-            rfm_segments = rfm_df.groupby('Segmento').size().reset_index(name='Clientes')
+        scored_rfm = _get_scored_rfm(start_date, end_date)
+        if not scored_rfm.empty:
+            rfm_segments = rfm_service.segment_counts(scored_rfm)
 
         # --- Programa de Referidos ---
         referred_pct = 0
@@ -398,20 +502,14 @@ def get_retention_kpis(start_date: datetime, end_date: datetime) -> Dict[str, An
         print(f"ERROR en get_retention_kpis: {e}")
         import traceback
         traceback.print_exc()
-        return {
-            "retention_30d": 0,
-            "clv": 0,
-            "mau": 0,
-            "repurchase_rate": 0,
-            "avg_orders_by_commune": {},
-            "retention_cohorts": pd.DataFrame(),
-            "rfm_segments": pd.DataFrame(),
-            "referred_pct": 0
-        }
+        # Se propaga: kpi_cache no guarda el error y conserva el último resultado válido.
+        raise
 
 
 def get_rfm_segmentation(start_date: datetime, end_date: datetime) -> Dict[str, Any]:
     """Realiza un análisis RFM para segmentar a los clientes en un período de tiempo."""
+    import pandas as pd
+    from backend.services import rfm_service
     try:
         all_orders_docs = _get_completed_orders_in_range(start_date, end_date)
         if not all_orders_docs:
@@ -420,7 +518,7 @@ def get_rfm_segmentation(start_date: datetime, end_date: datetime) -> Dict[str,
                 "region_distribution": {},
                 "cohort_distribution": {},
                 "ticket_distribution": {},
-                "rfm_segments": {},
+                "rfm_segments": pd.DataFrame(),
                 "campaign_distribution": {},
                 "referred_pct": 0,
                 "churn_distribution": {},
@@ -454,28 +552,10 @@ def get_rfm_segmentation(start_date: datetime, end_date: datetime) -> Dict[str,
             labels = ['<20K', '20K-50K', '50K-100K', '100K-500K', '>500K']
             ticket_groups = pd.cut(ticket_avg, bins=bins, labels=labels)
             ticket_dist = ticket_groups.value_counts().sort_index().to_dict()
-        # Segmentación RFM
+        # Segmentación RFM (re-puntuación de la tabla 'customer_rfm')
         snapshot_date = end_date
-        rfm_df = orders_df.groupby('customerId').agg(
-            recency=('createdAt', lambda date: (snapshot_date - pd.to_datetime(date, utc=True).max()).days),
-            frequency=('customerId', 'count'),
-            monetary=('total', 'sum')
-        ).reset_index()
-        try:
-            rfm_df['R_score'] = pd.qcut(rfm_df['recency'], 4, labels=[4, 3, 2, 1], duplicates='drop')
-            rfm_df['F_score'] = pd.qcut(rfm_df['frequency'].rank(method='first'), 4, labels=[1, 2, 3, 4], duplicates='drop')
-            rfm_df['M_score'] = pd.qcut(rfm_df['monetary'].rank(method='first'), 4, labels=[1, 2, 3, 4], duplicates='drop')
-        except ValueError:
-            rfm_df['R_score'] = 1; rfm_df['F_score'] = 1; rfm_df['M_score'] = 1
-        rfm_df['RFM_score'] = rfm_df['R_score'].astype(str) + rfm_df['F_score'].astype(str) + rfm_df['M_score'].astype(str)
-        segment_map = {
-            r'[3-4][3-4][3-4]': '🏆 Campeones',
-            r'[3-4][1-2][1-4]': '💖 Leales',
-            r'[1-2][3-4][3-4]': '😮 En Riesgo',
-            r'[1-2][1-2][1-2]': '❄️ Hibernando'
-        }
-        rfm_df['Segmento'] = rfm_df['RFM_score'].replace(segment_map, regex=True)
-        rfm_segments = rfm_df.groupby('Segmento').size().reset_index(name='Clientes')
+        rfm_df = _get_scored_rfm(start_date, end_date)
+        rfm_segments = rfm_service.segment_counts(rfm_df) if not rfm_df.empty else pd.DataFrame()
         # Efectividad de campañas
         campaign_dist = {}
         if 'acquisitionInfo' in orders_df.columns:
@@ -498,14 +578,9 @@ def get_rfm_segmentation(start_date: datetime, end_date: datetime) -> Dict[str,
             churn_labels = ['Activo (<30d)', 'En riesgo (30-90d)', 'Dormido (90-180d)', 'Hibernando (180-365d)', 'Perdido (>365d)']
             churn_groups = pd.cut(days_since_last, bins=churn_bins, labels=churn_labels)
             churn_dist = churn_groups.value_counts().sort_index().to_dict()
-        # Segmentación RFM para muestra de clientes
-        customers_docs = {doc.id: doc.to_dict() for doc in db.collection('customers').stream()}
-        rfm_df['email'] = rfm_df['customerId'].map(lambda cid: customers_docs.get(cid, {}).get('email', 'N/A'))
-        sample_customers = {
-            segment: rfm_df[rfm_df['Segmento'] == segment].head(5)[['customerId', 'email', 'recency', 'frequency', 'monetary']].to_dict('records') 
-            for segment in rfm_df['Segmento'].unique()
-        }
-        segment_distribution = rfm_df['Segmento'].value_counts().to_dict()
+        # Muestra de clientes por segmento (el email ya viene en la tabla RFM)
+        sample_customers = rfm_service.sample_by_segment(rfm_df, per_segment=5)
+        segment_distribution = rfm_df['Segmento'].value_counts().to_dict() if not rfm_df.empty else {}
         return {
             "specialties_distribution": specialties_dist,
             "region_distribution": region_dist,
@@ -522,18 +597,17 @@ def get_rfm_segmentation(start_date: datetime, end_date: datetime) -> Dict[str,
         print(f"ERROR en get_rfm_segmentation: {e}")
         import traceback
         traceback.print_exc()
-        return {
-            "specialties_distribution": {},
-            "region_distribution": {},
-            "cohort_distribution": {},
-            "ticket_distribution": {},
-            "rfm_segments": {},
-            "campaign_distribution": {},
-            "referred_pct": 0,
-            "churn_distribution": {},
-            "segment_distribution": {},
-            "sample_customers": {}
-        }
+        # Se propaga: kpi_cache no guarda el error y conserva el último resultado válido.
+        raise
+
+def get_rfm_segment_customers(start_date: datetime, end_date: datetime, segment: str,
+                              page: int = 1, page_size: int = 25) -> Dict[str, Any]:
+    """Pagina los clientes de un segmento RFM, ordenados por monto."""
+    from backend.services import rfm_service
+    scored = _get_scored_rfm(start_date, end_date)
+    if scored.empty:
+        return {"segment": segment, "page": page, "page_size": page_size, "total": 0, "customers": []}
+    return rfm_service.page_segment(scored, segment, page=page, page_size=page_size)
 
 # ===================================================================
 # ===             FUNCIONES GENÉRICAS DE CRUD (ADMIN)             ===
@@ -641,37 +715,67 @@ def get_all_documents_from_subcollection(main_collection_name: str, subcollectio
             sub_doc_data = sub_doc.to_dict(); sub_doc_data['userId'] = parent_id; all_docs.append(sub_doc_data)
     return all_docs
 
+def _get_docs_by_path(db, refs: list) -> Dict[str, Dict[str, Any]]:
+    """
+    Lee varios documentos en una sola llamada 'get_all' y los devuelve indexados
+    por su ruta. Los documentos inexistentes no se incluyen en el resultado.
+    """
+    if not refs:
+        return {}
+    return {snap.reference.path: snap.to_dict() for snap in db.get_all(refs) if snap.exists}
+
 def get_firestore_data_for_audit(order_id: str) -> dict:
+    """
+    Obtiene la orden y sus documentos relacionados (usuario, perfil y dirección).
+    Las lecturas dependientes de la orden se agrupan en un único 'get_all'.
+    """
     db = get_db_client()
     audit_data = {"order": None, "user": None, "profile": None, "address": None}
     order_doc = db.collection("orders").document(order_id).get()
     if not order_doc.exists: return {"error": f"Orden {order_id} no encontrada."}
     order_data = order_doc.to_dict(); audit_data["order"] = order_data
     user_id = order_data.get("userId")
-    if user_id:
-        user_doc = db.collection("users").document(user_id).get()
-        if user_doc.exists: audit_data["user"] = user_doc.to_dict()
-        profile_doc = db.collection("users").document(user_id).collection("customer_profiles").document(user_id).get()
-        if profile_doc.exists: audit_data["profile"] = profile_doc.to_dict()
     address_id = order_data.get("addressId")
-    if user_id and address_id:
-        address_doc = db.collection("users").document(user_id).collection("customer_profiles").document(user_id).collection("addresses").document(address_id).get()
-        if address_doc.exists: audit_data["address"] = address_doc.to_dict()
+    if not user_id:
+        return audit_data
+
+    user_ref = db.collection("users").document(user_id)
+    profile_ref = user_ref.collection("customer_profiles").document(user_id)
+    refs = {"user": user_ref, "profile": profile_ref}
+    if address_id:
+        refs["address"] = profile_ref.collection("addresses").document(address_id)
+
+    docs_by_path = _get_docs_by_path(db, list(refs.values()))
+    for key, ref in refs.items():
+        audit_data[key] = docs_by_path.get(ref.path)
     return audit_data
 
 def get_firestore_service_data_for_audit(service_id: str) -> dict:
+    """
+    Obtiene el servicio, su categoría y sus subcolecciones. El servicio y la categoría
+    salen del catálogo en memoria (o de Firestore si no está al día), en paralelo con
+    la lectura de las subcolecciones 'variants' y 'subcategories'.
+    """
     db = get_db_client()
     audit_data = {"service": None, "category": None, "variants": [], "subcategories": []}
     service_ref = db.collection("services").document(service_id)
-    service_doc = service_ref.get()
-    if not service_doc.exists: return {"error": f"Servicio {service_id} no encontrado."}
-    service_data = service_doc.to_dict(); audit_data["service"] = service_data
-    category_id = service_data.get("categoryId")
+
+    def _stream_subcollection(name: str) -> List[Dict[str, Any]]:
+        return [doc.to_dict() for doc in service_ref.collection(name).stream()]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        service_future = executor.submit(catalog_service.get_catalog_document, "services", service_id)
+        variants_future = executor.submit(_stream_subcollection, "variants")
+        subcategories_future = executor.submit(_stream_subcollection, "subcategories")
+        service_data = service_future.result()
+        if not service_data: return {"error": f"Servicio {service_id} no encontrado."}
+        audit_data["variants"] = variants_future.result()
+        audit_data["subcategories"] = subcategories_future.result()
+
+    audit_data["service"] = service_data
+    category_id = catalog_service.category_id_of(service_data)
     if category_id:
-        category_doc = db.collection("categories").document(str(category_id)).get()
-        if category_doc.exists: audit_data["category"] = category_doc.to_dict()
-    audit_data["variants"] = [doc.to_dict() for doc in service_ref.collection("variants").stream()]
-    audit_data["subcategories"] = [doc.to_dict() for doc in service_ref.collection("subcategories").stream()]
+        audit_data["category"] = catalog_service.get_catalog_document("categories", category_id)
     return audit_data
 
 
@@ -742,7 +846,12 @@ def clean_services_subcollections() -> dict:
     }
 
 def clean_collection(collection_name: str) -> dict:
-    """Elimina TODOS los documentos de una colección de nivel superior."""
+    """
+    Elimina TODOS los documentos de una colección de nivel superior y el índice de
+    huellas que el ETL guarda para ella, para que una resincronización completa
+    vuelva a escribir todos los registros.
+    """
+    from etl.modules import load
     db = get_db_client()
     coll_ref = db.collection(collection_name)
     deleted_count = 0
@@ -755,6 +864,7 @@ def clean_collection(collection_name: str) -> dict:
             for future in futures: future.result()
             deleted_count += len(docs_to_delete)
             print(f"Borrados {deleted_count} documentos de '{collection_name}'...")
+    load.clear_fingerprints(db, collection_name)
     return {"collection_cleaned": collection_name, "total_documents_deleted": deleted_count}
 
 
@@ -1,14 +1,25 @@
 import requests
 import json
+import re
+import time
 from typing import List, Dict, Any, Literal, Generator
 from backend.core.config import settings
+from backend.core.metrics import JUMPSELLER_REQUEST_DURATION, JUMPSELLER_RETRIES
 
 # --- Configuración de la API ---
 API_BASE_URL = settings.API_BASE_URL
 LOGIN = settings.JUMPSELLER_LOGIN
 AUTHTOKEN = settings.JUMPSELLER_AUTHTOKEN
+# Reintentos ante límite de tasa (429), errores 5xx o fallos de conexión.
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 
 # --- Función Genérica de Peticiones (Centralizada) ---
+def _endpoint_label(endpoint: str) -> str:
+    """Agrupa los endpoints por forma (customers/123 -> customers/{id}) para las métricas."""
+    return re.sub(r"/\d+", "/{id}", endpoint)
+
 def _make_request(
     endpoint: str,
     method: Literal["GET", "POST", "PUT", "DELETE"] = "GET",
@@ -18,21 +29,44 @@ def _make_request(
     """
     Función genérica para realizar peticiones a la API de Jumpseller
     usando Autenticación Básica. TODAS las demás funciones deben usar esta.
+    Reintenta hasta MAX_RETRIES veces ante 429/5xx o errores de conexión,
+    respetando 'Retry-After' cuando Jumpseller lo envía. Los POST solo se
+    reintentan ante 429: un 5xx no garantiza que el recurso no se haya creado.
     """
     url = f"{API_BASE_URL}/{endpoint}.json"
-    try:
-        response = requests.request(
-            method=method,
-            url=url,
-            auth=(LOGIN, AUTHTOKEN),
-            params=params,
-            json=json_data,
-        )
-        response.raise_for_status()
+    label = _endpoint_label(endpoint)
+    retry_statuses = RETRY_STATUS_CODES if method != "POST" else {429}
+    for attempt in range(MAX_RETRIES + 1):
+        started = time.perf_counter()
+        try:
+            response = requests.request(
+                method=method,
+                url=url,
+                auth=(LOGIN, AUTHTOKEN),
+                params=params,
+                json=json_data,
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            JUMPSELLER_REQUEST_DURATION.labels(method, label, "error").observe(time.perf_counter() - started)
+            if attempt == MAX_RETRIES or method == "POST":
+                print(f"Error en API Jumpseller ({method} {url}): {e}")
+                raise e
+            JUMPSELLER_RETRIES.labels(method, label, "connection").inc()
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            continue
+
+        JUMPSELLER_REQUEST_DURATION.labels(method, label, str(response.status_code)).observe(time.perf_counter() - started)
+        if response.status_code in retry_statuses and attempt < MAX_RETRIES:
+            JUMPSELLER_RETRIES.labels(method, label, str(response.status_code)).inc()
+            retry_after = response.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else RETRY_BACKOFF_SECONDS * 2 ** attempt)
+            continue
+        try:
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error en API Jumpseller ({method} {url}): {e}")
+            raise e
         return response.json() if response.content else {"status": "success", "code": response.status_code}
-    except requests.exceptions.RequestException as e:
-        print(f"Error en API Jumpseller ({method} {url}): {e}")
-        raise e
 
 # ===================================================================
 # ===               CATÁLOGO DE FUNCIONES DE SERVICIO             ===
@@ -0,0 +1,236 @@
+# backend/services/kpi_cache.py
+"""
+Caché de resultados de los KPIs y precalentamiento al arrancar la API.
+
+- Cada familia de KPIs (una por endpoint) se guarda por rango. El rango por
+  defecto ("últimos 30 días") depende de la hora actual, así que se guarda con la
+  clave DEFAULT_RANGE y no con sus fechas exactas.
+- Stale-while-revalidate: durante SOFT_TTL_SECONDS (el mismo TTL que
+  'st.cache_data' en el dashboard) el resultado se sirve como fresco. Entre el
+  TTL blando y HARD_TTL_SECONDS se sirve de inmediato marcado como 'stale' y se
+  recalcula en segundo plano; solo una entrada sin datos o con más de
+  HARD_TTL_SECONDS hace esperar el cálculo. Cada respuesta lleva
+  '_cache': {'computed_at', 'stale'}.
+- Solo se guardan cálculos exitosos: las funciones de KPIs propagan sus errores
+  en lugar de devolver un resultado vacío, así un recálculo fallido no reemplaza
+  la última versión válida y la siguiente petición vuelve a intentarlo.
+- Single-flight: las peticiones simultáneas con la misma clave comparten un único
+  cálculo en curso (ej: el equipo abre el dashboard a la vez sobre el rango por
+  defecto), así Firestore recibe un solo recorrido por clave. Las que esperan se
+  cuentan como 'coalesced' en liliapp_kpi_requests_total; las lecturas de
+  Firestore se atribuyen solo a la petición que calculó (las de un recálculo en
+  segundo plano, a ninguna).
+- warm_up() abre el canal de Firestore (gRPC e intercambio de credenciales) y
+  precalcula las familias del rango por defecto, de modo que la primera petición
+  tras un despliegue no pague el arranque en frío. 'readiness' publica el estado
+  para GET /health/ready.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cachetools import TTLCache
+
+from backend.core.metrics import KPI_COMPUTATIONS_IN_FLIGHT, KPI_COMPUTE_DURATION, KPI_REQUESTS
+from backend.services import firestore_service
+
+SOFT_TTL_SECONDS = 300
+HARD_TTL_SECONDS = 1800
+CACHE_MAX_ENTRIES = 256
+# Recálculos en segundo plano simultáneos (uno por clave como máximo).
+REFRESH_MAX_WORKERS = 2
+DEFAULT_RANGE = "default"
+# Familias que se precalculan en paralelo (cada una recorre sus colecciones).
+WARMUP_MAX_WORKERS = 3
+
+# Familia (nombre del endpoint) -> función de firestore_service que la calcula.
+KPI_FAMILIES: Dict[str, Callable[[datetime, datetime], Dict[str, Any]]] = {
+    "basic-pedidos": firestore_service.get_basic_pedidos_kpis,
+    "acquisition": firestore_service.get_acquisition_kpis,
+    "engagement": firestore_service.get_engagement_kpis,
+    "operations": firestore_service.get_operations_kpis,
+    "retention": firestore_service.get_retention_kpis,
+    "segmentation": firestore_service.get_rfm_segmentation,
+}
+
+RangeKey = Tuple[str, ...]
+
+logger = logging.getLogger(__name__)
+
+_cache: TTLCache = TTLCache(maxsize=CACHE_MAX_ENTRIES, ttl=HARD_TTL_SECONDS)
+_cache_lock = threading.Lock()
+_refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_MAX_WORKERS, thread_name_prefix="kpi-refresh")
+
+
+@dataclass(frozen=True)
+class _Entry:
+    result: Dict[str, Any]
+    computed_at: float
+
+    def is_stale(self) -> bool:
+        return time.time() - self.computed_at >= SOFT_TTL_SECONDS
+
+    def response(self, stale: bool) -> Dict[str, Any]:
+        """Copia superficial con los metadatos de frescura; el resultado cacheado no se modifica."""
+        computed_at = datetime.fromtimestamp(self.computed_at, timezone.utc).isoformat(timespec="seconds")
+        return {**self.result, "_cache": {"computed_at": computed_at, "stale": stale}}
+
+
+@dataclass
+class _Flight:
+    """Cálculo en curso de una clave; quienes llegan mientras tanto esperan su resultado."""
+    done: threading.Event = field(default_factory=threading.Event)
+    entry: Optional[_Entry] = None
+    error: Optional[BaseException] = None
+
+
+_in_flight: Dict[Tuple[str, ...], _Flight] = {}
+
+
+def range_key(start_date: Optional[str], end_date: Optional[str]) -> RangeKey:
+    """Clave del rango pedido: las fechas 'YYYY-MM-DD' o DEFAULT_RANGE si no vienen."""
+    return (start_date, end_date) if start_date and end_date else (DEFAULT_RANGE,)
+
+
+def get_kpis(family: str, key: RangeKey, range_start: datetime, range_end: datetime) -> Dict[str, Any]:
+    """
+    Resultado de la familia para el rango, con sus metadatos '_cache'. Viene de la
+    caché (fresco o vencido y en recálculo), de un cálculo idéntico en curso o se
+    calcula aquí.
+    """
+    cache_key = (family, *key)
+    with _cache_lock:
+        entry = _cache.get(cache_key)
+        if entry is not None and not entry.is_stale():
+            KPI_REQUESTS.labels(family, "hit").inc()
+            return entry.response(stale=False)
+        flight = _in_flight.get(cache_key)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[cache_key] = _Flight()
+
+    if entry is not None:
+        # Pasó el TTL blando: se responde con lo que hay y se recalcula en segundo plano (una vez por clave).
+        KPI_REQUESTS.labels(family, "stale").inc()
+        if leader:
+            _refresh_executor.submit(_refresh, family, cache_key, flight, range_start, range_end)
+        return entry.response(stale=True)
+
+    if not leader:
+        KPI_REQUESTS.labels(family, "coalesced").inc()
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.entry.response(stale=False)
+
+    KPI_REQUESTS.labels(family, "miss").inc()
+    return _compute(family, cache_key, flight, range_start, range_end).response(stale=False)
+
+
+def _compute(family: str, cache_key: Tuple[str, ...], flight: _Flight,
+             range_start: datetime, range_end: datetime) -> _Entry:
+    """Calcula la familia como líder de 'flight', guarda el resultado y libera a quienes esperan."""
+    KPI_COMPUTATIONS_IN_FLIGHT.labels(family).inc()
+    started = time.perf_counter()
+    try:
+        flight.entry = _Entry(KPI_FAMILIES[family](range_start, range_end), time.time())
+    except BaseException as e:
+        # Los errores no se guardan en la caché: la siguiente petición vuelve a intentarlo.
+        flight.error = e
+        raise
+    finally:
+        KPI_COMPUTATIONS_IN_FLIGHT.labels(family).dec()
+        KPI_COMPUTE_DURATION.labels(family).observe(time.perf_counter() - started)
+        with _cache_lock:
+            if flight.error is None:
+                _cache[cache_key] = flight.entry
+            del _in_flight[cache_key]
+        flight.done.set()
+    return flight.entry
+
+
+def _refresh(family: str, cache_key: Tuple[str, ...], flight: _Flight,
+             range_start: datetime, range_end: datetime) -> None:
+    try:
+        _compute(family, cache_key, flight, range_start, range_end)
+    except Exception:
+        # Se sigue sirviendo la versión vencida hasta HARD_TTL_SECONDS; la próxima petición reintenta.
+        logger.exception("Falló el recálculo en segundo plano de los KPIs '%s' %s", family, cache_key[1:])
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+# ===================================================================
+# ===                 PRECALENTAMIENTO Y READINESS                ===
+# ===================================================================
+
+@dataclass
+class Readiness:
+    """Estado del precalentamiento. 'ready' pasa a True cuando termina, aunque alguna familia falle."""
+    ready: bool = False
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    channel: Optional[str] = None
+    families: Dict[str, str] = field(default_factory=dict)
+
+    def mark_ready(self) -> None:
+        self.finished_at = time.time()
+        self.ready = True
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {"ready": self.ready, "warmup_seconds": elapsed, "firestore_channel": self.channel,
+                "families": dict(self.families)}
+
+
+readiness = Readiness()
+
+
+def _open_channel() -> str:
+    """Una lectura mínima obliga a abrir el canal gRPC y a obtener el token de acceso."""
+    started = time.perf_counter()
+    try:
+        list(firestore_service.get_db_client().collection("pedidos").limit(1).stream())
+        return f"ok ({time.perf_counter() - started:.2f} s)"
+    except Exception as e:
+        logger.warning("No se pudo abrir el canal de Firestore durante el precalentamiento: %s", e)
+        return f"error: {e}"
+
+
+def _warm_family(family: str, range_start: datetime, range_end: datetime) -> Tuple[str, str]:
+    started = time.perf_counter()
+    try:
+        get_kpis(family, (DEFAULT_RANGE,), range_start, range_end)
+        return family, f"ok ({time.perf_counter() - started:.2f} s)"
+    except Exception as e:
+        # Una familia que falla no bloquea el tráfico: se calculará en su primera petición.
+        logger.exception("Falló el precálculo de los KPIs '%s'", family)
+        return family, f"error: {e}"
+
+
+def warm_up(range_start: datetime, range_end: datetime) -> None:
+    """Abre el canal de Firestore y precalcula las familias del rango por defecto."""
+    readiness.started_at = time.time()
+    readiness.channel = _open_channel()
+    with ThreadPoolExecutor(max_workers=WARMUP_MAX_WORKERS, thread_name_prefix="kpi-warmup") as pool:
+        for family, status in pool.map(lambda f: _warm_family(f, range_start, range_end), KPI_FAMILIES):
+            readiness.families[family] = status
+    readiness.mark_ready()
+    logger.info("KPIs precalculados en %.1f s: %s", readiness.finished_at - readiness.started_at, readiness.families)
+
+
+def start_warm_up(range_start: datetime, range_end: datetime) -> threading.Thread:
+    """Precalienta en segundo plano: la API responde (/health/live) mientras tanto."""
+    thread = threading.Thread(target=warm_up, args=(range_start, range_end), name="kpi-warmup", daemon=True)
+    thread.start()
+    return thread
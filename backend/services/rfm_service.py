@@ -0,0 +1,133 @@
+# backend/services/rfm_service.py
+"""
+Puntuación y segmentación RFM (Recencia, Frecuencia, Monto).
+
+Los agregados por cliente (último pedido, cantidad de pedidos y gasto total) los
+mantiene el ETL en la colección 'customer_rfm'. Son de toda la historia del
+cliente: la frecuencia y el monto no se limitan al rango consultado, y la recencia
+se mide hasta el fin del rango. Aquí solo se vuelven a puntuar:
+binning por cuartiles vectorizado y una tabla de 64 entradas que traduce el
+código entero R·F·M a un segmento, en lugar de reemplazos con expresiones regulares.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Única definición de la tabla y de las órdenes que cuentan como compra; el ETL
+# (load.update_customer_rfm) la importa. Es el estado de Jumpseller tal como el ETL lo
+# guarda en 'orders'.
+RFM_COLLECTION = "customer_rfm"
+RFM_ORDER_STATUSES = frozenset({"Paid"})
+
+SEGMENT_NAMES = ['🏆 Campeones', '💖 Leales', '😮 En Riesgo', '❄️ Hibernando']
+# Reglas (R, F, M) evaluadas en orden; la primera que coincide define el segmento.
+_SEGMENT_RULES = [
+    ({3, 4}, {3, 4}, {3, 4}),
+    ({3, 4}, {1, 2}, {1, 2, 3, 4}),
+    ({1, 2}, {3, 4}, {3, 4}),
+    ({1, 2}, {1, 2}, {1, 2}),
+]
+
+
+def _build_segment_lookup() -> np.ndarray:
+    """Tabla indexada por (R-1)*16 + (F-1)*4 + (M-1); -1 = sin segmento con nombre."""
+    lookup = np.full(64, -1, dtype=np.int8)
+    for r in range(1, 5):
+        for f in range(1, 5):
+            for m in range(1, 5):
+                for code, (rs, fs, ms) in enumerate(_SEGMENT_RULES):
+                    if r in rs and f in fs and m in ms:
+                        lookup[(r - 1) * 16 + (f - 1) * 4 + (m - 1)] = code
+                        break
+    return lookup
+
+
+SEGMENT_LOOKUP = _build_segment_lookup()
+
+
+def rfm_from_orders(df_orders: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega órdenes al mismo esquema que 'customer_rfm'. Se usa para rangos que
+    terminan antes de hoy, donde la tabla contaría órdenes posteriores al rango.
+    """
+    created = pd.to_datetime(df_orders['createdAt'], utc=True, errors='coerce')
+    grouped = df_orders.assign(createdAt=created).groupby('customerId')
+    return pd.DataFrame({
+        'lastOrderAt': grouped['createdAt'].max(),
+        'orderCount': grouped.size(),
+        'totalSpend': grouped['total'].sum(),
+    }).reset_index()
+
+
+def _quartile_scores(values: pd.Series, ascending: bool) -> np.ndarray:
+    labels = [1, 2, 3, 4] if ascending else [4, 3, 2, 1]
+    return pd.qcut(values, 4, labels=labels, duplicates='drop').astype(np.int64).to_numpy()
+
+
+def score_rfm(rfm_df: pd.DataFrame, snapshot_date: datetime) -> pd.DataFrame:
+    """
+    Añade recency/frequency/monetary, las puntuaciones R/F/M (1-4), 'RFM_score' y
+    'Segmento'. Espera las columnas customerId, lastOrderAt, orderCount y totalSpend.
+    Las combinaciones sin segmento con nombre conservan su código (ej: '213').
+    """
+    snapshot = pd.Timestamp(snapshot_date)
+    snapshot = snapshot.tz_localize('UTC') if snapshot.tzinfo is None else snapshot
+    # rank(method='first') desempata por posición: se ordena por cliente para que la
+    # puntuación no dependa del orden en que llegan las filas (tabla o agregación).
+    rfm_df = rfm_df.sort_values('customerId', kind='stable')
+    last_order = pd.to_datetime(rfm_df['lastOrderAt'], utc=True, errors='coerce')
+    df = rfm_df[last_order.notna().to_numpy()].copy()
+    df['recency'] = (snapshot - last_order[last_order.notna()]).dt.days.clip(lower=0).to_numpy()
+    df['frequency'] = df['orderCount'].astype(np.int64)
+    df['monetary'] = df['totalSpend'].astype(float)
+
+    try:
+        r = _quartile_scores(df['recency'], ascending=False)
+        f = _quartile_scores(df['frequency'].rank(method='first'), ascending=True)
+        m = _quartile_scores(df['monetary'].rank(method='first'), ascending=True)
+    except ValueError:
+        r = f = m = np.ones(len(df), dtype=np.int64)
+    df['R_score'], df['F_score'], df['M_score'] = r, f, m
+
+    score = r * 100 + f * 10 + m
+    df['RFM_score'] = score.astype(str)
+    codes = SEGMENT_LOOKUP[(r - 1) * 16 + (f - 1) * 4 + (m - 1)]
+    names = np.array(SEGMENT_NAMES, dtype=object)
+    df['Segmento'] = np.where(codes >= 0, names[np.clip(codes, 0, None)], df['RFM_score'].to_numpy())
+    return df
+
+
+def segment_counts(scored: pd.DataFrame) -> pd.DataFrame:
+    return scored.groupby('Segmento').size().reset_index(name='Clientes')
+
+
+SAMPLE_COLUMNS = ['customerId', 'email', 'recency', 'frequency', 'monetary']
+
+
+def sample_by_segment(scored: pd.DataFrame, per_segment: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+    """Primeros clientes de cada segmento (ordenados por monto), sin iterar en Python por fila."""
+    if scored.empty:
+        return {}
+    if 'email' not in scored.columns:
+        scored = scored.assign(email='N/A')
+    top = scored.sort_values('monetary', ascending=False, kind='stable').groupby('Segmento', sort=False).head(per_segment)
+    return {segment: rows[SAMPLE_COLUMNS].to_dict('records') for segment, rows in top.groupby('Segmento', sort=False)}
+
+
+def page_segment(scored: pd.DataFrame, segment: str, page: int = 1, page_size: int = 25) -> Dict[str, Any]:
+    """Página de clientes de un segmento, ordenados por monto descendente."""
+    rows = scored[scored['Segmento'] == segment]
+    if 'email' not in rows.columns:
+        rows = rows.assign(email='N/A')
+    rows = rows.sort_values('monetary', ascending=False, kind='stable')
+    start = max(page - 1, 0) * page_size
+    return {
+        "segment": segment,
+        "page": page,
+        "page_size": page_size,
+        "total": int(len(rows)),
+        "customers": rows.iloc[start:start + page_size][SAMPLE_COLUMNS].to_dict('records'),
+    }
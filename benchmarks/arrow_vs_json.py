@@ -0,0 +1,120 @@
+# benchmarks/arrow_vs_json.py
+"""
+Compara JSON (orjson) contra Apache Arrow IPC para el listado de clientes
+(/crud/customers), con un listado sintético de 100.000 clientes.
+
+Mide por formato:
+  - codificación en el backend (documentos -> cuerpo de la respuesta),
+  - tamaño del cuerpo (sin comprimir y con gzip, como lo sirve GZipMiddleware),
+  - decodificación en el dashboard (cuerpo -> pd.DataFrame).
+
+Uso:
+    python -m benchmarks.arrow_vs_json [--customers 100000] [--repeat 5]
+"""
+
+import argparse
+import gzip
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pandas as pd
+import pyarrow as pa
+
+from backend.core.responses import ARROW_JSON_COLUMNS_KEY, dumps, to_arrow_ipc
+
+COMMUNES = ["Providencia", "Las Condes", "Ñuñoa", "Santiago", "Maipú", "La Florida", "Vitacura", "Viña del Mar"]
+REGIONS = ["Región Metropolitana", "Valparaíso"]
+
+
+def make_customers(n: int, seed: int = 42) -> list:
+    """Genera clientes con la misma forma que escribe load_customers_denormalized."""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    customers = []
+    for i in range(n):
+        first, last = f"Nombre{i}", f"Apellido{i % 997}"
+        customers.append({
+            "id": str(100000 + i),
+            "email": f"cliente{i}@example.com",
+            "phone": f"+569{rng.randint(10000000, 99999999)}",
+            "accountType": "customer",
+            "accountStatus": "verified",
+            "createdAt": start + timedelta(minutes=rng.randint(0, 1_000_000)),
+            "isDeleted": False,
+            "onboardingCompleted": True,
+            "firstName": first,
+            "lastName": last,
+            "displayName": f"{first} {last}",
+            "rut": f"{rng.randint(5_000_000, 25_000_000)}-{rng.randint(0, 9)}",
+            "rutVerified": False,
+            "addresses": [{
+                "id": f"addr_{i}_{j}", "alias": "Principal" if j == 0 else f"Dirección {j}",
+                "street": f"Calle {rng.randint(1, 500)}", "number": str(rng.randint(1, 9999)),
+                "commune": rng.choice(COMMUNES), "region": rng.choice(REGIONS), "isPrimary": j == 0,
+            } for j in range(rng.randint(1, 3))],
+            "totalSpending": rng.randint(15_000, 600_000),
+            "serviceHistoryCount": rng.randint(1, 12),
+        })
+    return customers
+
+
+def _timeit(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+def decode_json(body: bytes) -> pd.DataFrame:
+    return pd.DataFrame(orjson.loads(body))
+
+
+def decode_arrow(body) -> pd.DataFrame:
+    # Misma ruta que dashboard.api_client._decode_table.
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    metadata = table.schema.metadata or {}
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    for column in orjson.loads(metadata.get(ARROW_JSON_COLUMNS_KEY, b"[]")):
+        df[column] = [None if v is None else orjson.loads(v) for v in df[column]]
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    customers = make_customers(args.customers)
+    print(f"Clientes sintéticos: {len(customers):,}  (mediana de {args.repeat} repeticiones)\n")
+
+    rows = []
+    for name, encode, decode in (
+        ("JSON (orjson)", lambda: dumps(customers), decode_json),
+        ("Arrow IPC", lambda: to_arrow_ipc(customers), decode_arrow),
+    ):
+        encode_ms, body = _timeit(encode, args.repeat)
+        raw = bytes(body)
+        gzip_kb = len(gzip.compress(raw, compresslevel=6)) / 1024
+        decode_ms, df = _timeit(lambda: decode(raw), args.repeat)
+        rows.append({
+            "formato": name,
+            "codificar_ms": round(encode_ms, 1),
+            "decodificar_ms": round(decode_ms, 1),
+            "total_ms": round(encode_ms + decode_ms, 1),
+            "cuerpo_kb": round(len(raw) / 1024, 1),
+            "gzip_kb": round(gzip_kb, 1),
+            "filas": len(df),
+            "columnas": df.shape[1],
+        })
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# benchmarks/bench_transforms.py
+"""
+Benchmark de las transformaciones del ETL (etl/modules/transform.py) sobre los
+fixtures de Jumpseller incluidos en etl/data (source_orders.json y
+source_products.json). Las categorías se derivan de las de los productos.
+
+Con --scale N los fixtures se replican N veces y cada copia recibe IDs nuevos
+(órdenes, clientes, emails, productos, variantes y categorías), así el volumen
+crece sin que las transformaciones deduplicen las copias.
+
+Por transformación reporta registros/segundo (mediana de --repeat corridas) y el
+pico de memoria asignada (tracemalloc, en una corrida aparte para no distorsionar
+el tiempo). Las salidas de depuración (print) se descartan durante la medición.
+
+Los resultados se pueden guardar como línea base y comparar contra ella:
+
+    python -m benchmarks.bench_transforms --scale 10 --save-baseline
+    python -m benchmarks.bench_transforms --scale 10 --compare
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from etl.modules import transform
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "etl" / "data"
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "transforms.json"
+# Separación entre los IDs de cada copia: mayor que cualquier ID real de Jumpseller.
+ID_STRIDE = 10_000_000_000
+
+
+def _noop_logger(message: str) -> None:
+    pass
+
+
+def load_fixtures():
+    with open(DATA_DIR / "source_orders.json", encoding="utf-8") as f:
+        orders = [item["order"] for item in json.load(f) if item.get("order")]
+    with open(DATA_DIR / "source_products.json", encoding="utf-8") as f:
+        products = [item["product"] for item in json.load(f) if item.get("product")]
+    categories = {}
+    for product in products:
+        for category in product.get("categories") or []:
+            categories.setdefault(category["id"], category)
+    return orders, products, [{"category": c} for c in categories.values()]
+
+
+def _offset(value, k: int):
+    return value + k * ID_STRIDE if isinstance(value, int) else value
+
+
+def scale_orders(orders, factor: int):
+    scaled = []
+    for k in range(factor):
+        for order in orders:
+            copy_ = copy.deepcopy(order)
+            copy_["id"] = _offset(copy_.get("id"), k)
+            customer = copy_.get("customer")
+            if isinstance(customer, dict):
+                customer["id"] = _offset(customer.get("id"), k)
+                if k and customer.get("email"):
+                    customer["email"] = f"c{k}.{customer['email']}"
+            scaled.append(copy_)
+    return scaled
+
+
+def scale_products(products, factor: int):
+    scaled = []
+    for k in range(factor):
+        for product in products:
+            copy_ = copy.deepcopy(product)
+            copy_["id"] = _offset(copy_.get("id"), k)
+            for variant in copy_.get("variants") or []:
+                variant["id"] = _offset(variant.get("id"), k)
+            for category in copy_.get("categories") or []:
+                category["id"] = _offset(category.get("id"), k)
+            scaled.append(copy_)
+    return scaled
+
+
+def scale_categories(categories, factor: int):
+    return [{"category": {**item["category"], "id": _offset(item["category"]["id"], k)}}
+            for k in range(factor) for item in categories]
+
+
+def build_cases(orders, products, categories):
+    """(nombre, función sin argumentos, cantidad de registros de entrada)."""
+    return [
+        ("transform_orders", lambda: transform.transform_orders(orders, set(), _noop_logger), len(orders)),
+        ("transform_orders_for_customer_model", lambda: transform.transform_orders_for_customer_model(orders), len(orders)),
+        ("transform_products", lambda: transform.transform_products(products, _noop_logger), len(products)),
+        ("transform_products_for_service_model", lambda: transform.transform_products_for_service_model(products, _noop_logger), len(products)),
+        ("transform_categories", lambda: transform.transform_categories(categories, _noop_logger), len(categories)),
+    ]
+
+
+def measure(fn, records: int, repeat: int) -> dict:
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    seconds = statistics.median(times)
+    return {
+        "records": records,
+        "seconds": round(seconds, 4),
+        "records_per_sec": round(records / seconds, 1) if seconds > 0 else None,
+        "peak_mb": round(peak / 1024 ** 2, 2),
+    }
+
+
+def load_baseline() -> dict:
+    if not BASELINE_PATH.exists():
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(scale: int, results: dict) -> None:
+    baseline = load_baseline()
+    baseline[str(scale)] = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    os.makedirs(BASELINE_PATH.parent, exist_ok=True)
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+
+
+def report(results: dict, baseline: dict = None) -> pd.DataFrame:
+    rows = []
+    for name, result in results.items():
+        row = {"transformación": name, "registros": result["records"], "reg/s": result["records_per_sec"],
+               "pico_mb": result["peak_mb"]}
+        previous = (baseline or {}).get(name)
+        if previous:
+            row["reg/s_base"] = previous["records_per_sec"]
+            row["Δ reg/s %"] = round((result["records_per_sec"] / previous["records_per_sec"] - 1) * 100, 1)
+            row["pico_mb_base"] = previous["peak_mb"]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Factor de replicación de los fixtures (ej: 10, 100, 1000).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="Ejecuta solo estas transformaciones.")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los resultados como línea base de esta escala.")
+    parser.add_argument("--compare", action="store_true", help="Compara contra la línea base guardada para esta escala.")
+    args = parser.parse_args()
+
+    orders, products, categories = load_fixtures()
+    if args.scale > 1:
+        orders, products = scale_orders(orders, args.scale), scale_products(products, args.scale)
+        categories = scale_categories(categories, args.scale)
+    print(f"Escala ×{args.scale}: {len(orders):,} órdenes, {len(products):,} productos, {len(categories):,} categorías "
+          f"(mediana de {args.repeat} repeticiones)\n")
+
+    results = {}
+    for name, fn, records in build_cases(orders, products, categories):
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(fn, records, args.repeat)
+
+    baseline = None
+    if args.compare:
+        baseline = load_baseline().get(str(args.scale), {}).get("results")
+        if baseline is None:
+            print(f"⚠️ No hay línea base para la escala ×{args.scale} en {BASELINE_PATH}.\n")
+    print(report(results, baseline).to_string(index=False))
+
+    if args.save_baseline:
+        save_baseline(args.scale, results)
+        print(f"\nLínea base guardada en {BASELINE_PATH} (escala ×{args.scale}).")
+
+
+if __name__ == "__main__":
+    main()
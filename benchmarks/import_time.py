@@ -0,0 +1,160 @@
+# benchmarks/import_time.py
+"""
+Tiempo de importación (arranque en frío) de la API, el ETL y el dashboard.
+
+Para cada módulo de TARGETS ejecuta un intérprete nuevo con 'python -X importtime'
+y reporta el tiempo acumulado de importación (mediana de --repeat corridas) y los
+paquetes que más aportan. Con --check funciona como prueba de regresión del
+arranque y termina con código 1 si:
+
+  - un módulo supera su presupuesto de tiempo (budget_ms × --budget-factor), o
+  - importa alguno de sus módulos prohibidos (ej: pandas al arrancar la API), o
+  - una página del dashboard importa en su nivel superior una librería de
+    gráficos pesada (HEAVY_PAGE_IMPORTS): deben importarse al dibujar.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --check --budget-factor 2     # máquinas de CI más lentas
+    python -m benchmarks.import_time --only backend.main --json /tmp/import_time.json
+
+La API se importa con FIRESTORE_BACKEND=memory (salvo que ya esté definido) para
+no requerir credenciales de Firebase; la configuración (.env) sí debe existir.
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PAGES_DIR = PROJECT_ROOT / "dashboard" / "pages"
+
+# módulo -> presupuesto (ms de importación acumulada) y módulos que no debe cargar.
+TARGETS = {
+    "backend.main": {"budget_ms": 1500, "forbidden": ["pandas", "numpy", "pyarrow"]},
+    "etl.cli": {"budget_ms": 250, "forbidden": ["streamlit", "firebase_admin", "google.cloud.firestore", "bs4", "pandas"]},
+    "etl.modules.load": {"budget_ms": 150, "forbidden": ["streamlit", "firebase_admin", "google.cloud.firestore"]},
+    "etl.modules.transform": {"budget_ms": 150, "forbidden": ["streamlit", "bs4"]},
+    "dashboard.base_dashboard": {"budget_ms": 3000, "forbidden": ["plotly", "folium", "st_aggrid", "backend"]},
+}
+HEAVY_PAGE_IMPORTS = {"plotly", "folium", "streamlit_folium", "st_aggrid"}
+TOP_PACKAGES = 8
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """{módulo: microsegundos acumulados} a partir de la salida de -X importtime."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|", 2)
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    return cumulative
+
+
+def measure(module: str, repeat: int) -> dict:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(PROJECT_ROOT), os.environ.get("PYTHONPATH")]))}
+    env.setdefault("FIRESTORE_BACKEND", "memory")
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True, cwd=PROJECT_ROOT, env=env)
+        if proc.returncode != 0:
+            error = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+            return {"module": module, "error": error[-1] if error else f"código {proc.returncode}"}
+        runs.append(_parse_importtime(proc.stderr))
+
+    total_ms = statistics.median(run.get(module, 0) for run in runs) / 1000
+    last = runs[-1]
+    # Aporte de cada paquete de primer nivel (la línea del propio paquete ya es acumulada).
+    packages = {name: us / 1000 for name, us in last.items() if "." not in name and name != module.split(".")[0]}
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES]
+    return {"module": module, "import_ms": round(total_ms, 1), "modules_loaded": len(last),
+            "top_packages": {name: round(ms, 1) for name, ms in top}, "loaded": sorted(last)}
+
+
+def heavy_page_imports() -> List[str]:
+    """Imports de nivel superior de librerías pesadas en las páginas del dashboard."""
+    problems = []
+    for page in sorted(PAGES_DIR.glob("*.py")):
+        tree = ast.parse(page.read_text(encoding="utf-8"))
+        for node in tree.body:
+            names = [alias.name for alias in node.names] if isinstance(node, ast.Import) else \
+                [node.module] if isinstance(node, ast.ImportFrom) and node.module else []
+            for name in names:
+                if name.split(".")[0] in HEAVY_PAGE_IMPORTS:
+                    problems.append(f"{page.relative_to(PROJECT_ROOT)}:{node.lineno} importa '{name}' al cargar la página")
+    return problems
+
+
+def check(results: List[dict], budget_factor: float) -> List[str]:
+    problems = []
+    for result in results:
+        module, target = result["module"], TARGETS[result["module"]]
+        if "error" in result:
+            problems.append(f"{module}: no se pudo importar ({result['error']})")
+            continue
+        budget = target["budget_ms"] * budget_factor
+        if result["import_ms"] > budget:
+            problems.append(f"{module}: {result['import_ms']:.0f} ms > presupuesto de {budget:.0f} ms")
+        loaded = set(result["loaded"])
+        for forbidden in target["forbidden"]:
+            if forbidden in loaded:
+                problems.append(f"{module}: importa '{forbidden}' al arrancar")
+    return problems + heavy_page_imports()
+
+
+def report(results: List[dict], budget_factor: float) -> pd.DataFrame:
+    rows = []
+    for result in results:
+        if "error" in result:
+            rows.append({"módulo": result["module"], "import_ms": None, "presupuesto_ms": None, "módulos": None,
+                         "paquetes más costosos (ms)": f"ERROR: {result['error']}"})
+            continue
+        rows.append({
+            "módulo": result["module"], "import_ms": result["import_ms"],
+            "presupuesto_ms": TARGETS[result["module"]]["budget_ms"] * budget_factor,
+            "módulos": result["modules_loaded"],
+            "paquetes más costosos (ms)": ", ".join(f"{name} {ms:.0f}" for name, ms in result["top_packages"].items()),
+        })
+    return pd.DataFrame(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", choices=sorted(TARGETS), help="Mide solo estos módulos.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="Falla si se exceden los presupuestos o hay imports prohibidos.")
+    parser.add_argument("--budget-factor", type=float, default=1.0, help="Multiplica los presupuestos de tiempo.")
+    parser.add_argument("--json", type=Path, help="Guarda los resultados en este archivo.")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, args.repeat) for module in (args.only or TARGETS)]
+    with pd.option_context("display.max_colwidth", 120, "display.width", 200):
+        print(report(results, args.budget_factor).to_string(index=False))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([{k: v for k, v in r.items() if k != "loaded"} for r in results], f, indent=2, ensure_ascii=False)
+
+    if not args.check:
+        return 0
+    problems = check(results, args.budget_factor)
+    if problems:
+        print("\n❌ Regresiones de arranque:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\n✅ Tiempos de arranque dentro del presupuesto.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+# benchmarks/load_test.py
+"""
+Prueba de carga de la API: endpoints de /api/v1/kpis/* y /api/v1/crud/*.
+
+Cada usuario virtual es una tarea asyncio que, mientras dure la prueba, elige
+un endpoint según su peso (ENDPOINT_MIX), y para los KPIs un rango de fechas
+según DATE_RANGE_MIX (la mayoría de los usuarios mira los últimos 7 o 30 días).
+Por endpoint reporta throughput, latencia p50/p95/p99 y tasa de errores
+(respuestas >= 400, timeouts y errores de conexión). Los primeros --warmup
+segundos no se cuentan.
+
+El backend puede ser uno ya levantado (--url) o uno local con el Firestore en
+memoria sembrado con benchmarks/synthetic_data (--spawn-server):
+
+    python -m benchmarks.load_test run --spawn-server --customers 20000 --concurrency 20 --duration 60
+    python -m benchmarks.load_test run --url http://localhost:8000 --concurrency 50 --compare benchmarks/results/anterior.json
+
+Los resultados se guardan en benchmarks/results/load_<fecha>.json para
+comparar corridas entre versiones.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import pandas as pd
+
+from backend.services.rfm_service import SEGMENT_NAMES
+from benchmarks.synthetic_data import SyntheticConfig, SyntheticDataset
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_PORT = 8765
+SERVER_START_TIMEOUT = 300
+
+# (nombre del rango, peso, días hacia atrás desde la fecha de referencia; None = año en curso)
+DATE_RANGE_MIX = [("7d", 35, 7), ("30d", 35, 30), ("90d", 15, 90), ("ytd", 10, None), ("custom", 5, 0)]
+
+
+@dataclass
+class LoadContext:
+    """Datos para armar peticiones válidas contra el dataset sembrado."""
+    rng: random.Random
+    anchor: date
+    customers: int
+    products: int
+
+    def date_range(self) -> Tuple[str, Dict[str, str]]:
+        name, _, days = _weighted_choice(self.rng, DATE_RANGE_MIX, weight_index=1)
+        end = self.anchor
+        if days is None:
+            start = date(end.year, 1, 1)
+        elif days == 0:
+            # Rango arbitrario de 1 a 365 días que termina en algún punto del último año.
+            end = end - timedelta(days=self.rng.randint(0, 365))
+            start = end - timedelta(days=self.rng.randint(1, 365))
+        else:
+            start = end - timedelta(days=days)
+        return name, {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+    def customer_id(self) -> str:
+        return str(SyntheticDataset.CUSTOMER_ID_BASE + self.rng.randrange(self.customers))
+
+    def service_id(self) -> str:
+        return str(SyntheticDataset.PRODUCT_ID_BASE + self.rng.randrange(self.products))
+
+
+def _weighted_choice(rng: random.Random, options, weight_index: int):
+    total = sum(option[weight_index] for option in options)
+    point = rng.random() * total
+    for option in options:
+        point -= option[weight_index]
+        if point < 0:
+            return option
+    return options[-1]
+
+
+def _kpi(path: str, extra: Optional[Callable[[LoadContext], Dict[str, str]]] = None):
+    def build(ctx: LoadContext):
+        range_name, params = ctx.date_range()
+        if extra:
+            params.update(extra(ctx))
+        return path, params, range_name
+    return build
+
+
+def _crud(path: str, path_param: Optional[Callable[[LoadContext], str]] = None):
+    def build(ctx: LoadContext):
+        return (path.format(id=path_param(ctx)) if path_param else path), {}, None
+    return build
+
+
+# (etiqueta, peso, constructor de la petición). Pesos aproximados al uso del dashboard.
+ENDPOINT_MIX = [
+    ("kpis/basic-pedidos", 14, _kpi("/api/v1/kpis/basic-pedidos")),
+    ("kpis/acquisition", 12, _kpi("/api/v1/kpis/acquisition")),
+    ("kpis/engagement", 12, _kpi("/api/v1/kpis/engagement")),
+    ("kpis/operations", 12, _kpi("/api/v1/kpis/operations")),
+    ("kpis/retention", 8, _kpi("/api/v1/kpis/retention")),
+    ("kpis/segmentation", 6, _kpi("/api/v1/kpis/segmentation")),
+    ("kpis/segmentation/customers", 4, _kpi("/api/v1/kpis/segmentation/customers",
+                                             lambda ctx: {"segment": ctx.rng.choice(SEGMENT_NAMES)})),
+    ("crud/customers/{id}", 10, _crud("/api/v1/crud/customers/{id}", LoadContext.customer_id)),
+    ("crud/services/{id}", 8, _crud("/api/v1/crud/services/{id}", LoadContext.service_id)),
+    ("crud/services", 5, _crud("/api/v1/crud/services")),
+    ("crud/categories", 5, _crud("/api/v1/crud/categories")),
+    ("crud/customers", 2, _crud("/api/v1/crud/customers")),
+    ("crud/users", 2, _crud("/api/v1/crud/users")),
+]
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    date_range: Optional[str]
+    status: int  # 0 = error de red o timeout
+    seconds: float
+
+
+@dataclass
+class LoadResult:
+    samples: List[Sample] = field(default_factory=list)
+    duration: float = 0.0
+
+
+async def _virtual_user(client: httpx.AsyncClient, ctx: LoadContext, mix, measure_from: float, stop_at: float,
+                        think_time: float, result: LoadResult):
+    while time.perf_counter() < stop_at:
+        label, _, build = _weighted_choice(ctx.rng, mix, weight_index=1)
+        path, params, range_name = build(ctx)
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        finished = time.perf_counter()
+        if started >= measure_from:
+            result.samples.append(Sample(label, range_name, status, finished - started))
+        if think_time:
+            await asyncio.sleep(ctx.rng.expovariate(1 / think_time))
+
+
+async def run_load(base_url: str, concurrency: int, duration: float, warmup: float, think_time: float,
+                   timeout: float, seed: int, anchor: date, customers: int, products: int,
+                   only: Optional[List[str]] = None) -> LoadResult:
+    mix = [entry for entry in ENDPOINT_MIX if not only or entry[0] in only]
+    if not mix:
+        raise ValueError(f"Ningún endpoint coincide con {only}")
+    result = LoadResult()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        measure_from = time.perf_counter() + warmup
+        stop_at = measure_from + duration
+        users = [
+            _virtual_user(client, LoadContext(random.Random(f"{seed}:{i}"), anchor, customers, products),
+                          mix, measure_from, stop_at, think_time, result)
+            for i in range(concurrency)
+        ]
+        await asyncio.gather(*users)
+        result.duration = time.perf_counter() - measure_from
+    return result
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil por rango más cercano."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: List[Sample], duration: float) -> Dict[str, Dict[str, float]]:
+    groups: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        groups.setdefault(sample.endpoint, []).append(sample)
+    groups["TOTAL"] = samples
+
+    summary = {}
+    for endpoint, group in groups.items():
+        latencies = sorted(s.seconds * 1000 for s in group)
+        errors = sum(1 for s in group if s.status == 0 or s.status >= 400)
+        summary[endpoint] = {
+            "requests": len(group),
+            "throughput_rps": round(len(group) / duration, 2) if duration else 0.0,
+            "p50_ms": round(_percentile(latencies, 50), 1),
+            "p95_ms": round(_percentile(latencies, 95), 1),
+            "p99_ms": round(_percentile(latencies, 99), 1),
+            "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+            "errors": errors,
+            "error_rate_pct": round(errors / len(group) * 100, 2) if group else 0.0,
+            "status_codes": {str(code): sum(1 for s in group if s.status == code) for code in sorted({s.status for s in group})},
+        }
+    return summary
+
+
+def report(summary: Dict[str, Dict[str, float]], previous: Optional[Dict[str, Dict[str, float]]] = None) -> pd.DataFrame:
+    rows = []
+    for endpoint, stats in summary.items():
+        row = {"endpoint": endpoint, "peticiones": stats["requests"], "req/s": stats["throughput_rps"],
+               "p50_ms": stats["p50_ms"], "p95_ms": stats["p95_ms"], "p99_ms": stats["p99_ms"],
+               "errores_%": stats["error_rate_pct"]}
+        before = (previous or {}).get(endpoint)
+        if before:
+            row["p95_ms_base"] = before["p95_ms"]
+            row["Δ p95 %"] = round((stats["p95_ms"] / before["p95_ms"] - 1) * 100, 1) if before["p95_ms"] else None
+            row["req/s_base"] = before["throughput_rps"]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parents[1]).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(summary: dict, config: dict, path: Optional[Path] = None) -> Path:
+    path = path or RESULTS_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    os.makedirs(path.parent, exist_ok=True)
+    payload = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": config,
+        "endpoints": summary,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    return path
+
+
+# ===================================================================
+# ===                   SERVIDOR LOCAL SEMBRADO                   ===
+# ===================================================================
+
+def serve(port: int, seed: int, customers: int, products: int, end: date) -> None:
+    """Levanta la API con el Firestore en memoria sembrado con datos sintéticos."""
+    os.environ["FIRESTORE_BACKEND"] = "memory"
+    from backend.core import memory_firestore
+    from benchmarks.synthetic_data import seed_memory_firestore
+
+    dataset = SyntheticDataset(SyntheticConfig(seed=seed, customers=customers, products=products, end=end))
+    counts = seed_memory_firestore(memory_firestore.get_client(), dataset)
+    print(f"Firestore en memoria sembrado: {counts}", flush=True)
+
+    import uvicorn
+    from backend.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _spawn_server(args) -> subprocess.Popen:
+    command = [sys.executable, "-m", "benchmarks.load_test", "serve", "--port", str(args.port),
+               "--seed", str(args.seed), "--customers", str(args.customers), "--products", str(args.products),
+               "--end", args.end.isoformat()]
+    process = subprocess.Popen(command, cwd=Path(__file__).resolve().parents[1])
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El servidor terminó al arrancar (código {process.returncode}).")
+        try:
+            # Como un balanceador: se espera a que la API termine de precalentar los KPIs.
+            if httpx.get(f"http://127.0.0.1:{args.port}/health/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"El servidor no respondió en {SERVER_START_TIMEOUT} s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_dataset_args(sub):
+        sub.add_argument("--seed", type=int, default=42)
+        sub.add_argument("--customers", type=int, default=10_000)
+        sub.add_argument("--products", type=int, default=200)
+        sub.add_argument("--end", type=date.fromisoformat, default=SyntheticConfig.end,
+                         help="Último día del dataset; los rangos de fechas se toman hacia atrás desde aquí.")
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    serve_parser = subparsers.add_parser("serve", help="Levanta la API local con datos sintéticos en memoria.")
+    add_dataset_args(serve_parser)
+
+    run_parser = subparsers.add_parser("run", help="Ejecuta la prueba de carga.")
+    add_dataset_args(run_parser)
+    target = run_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="URL base de un backend ya levantado.")
+    target.add_argument("--spawn-server", action="store_true", help="Levanta un backend local sembrado (ver 'serve').")
+    run_parser.add_argument("--concurrency", type=int, default=10, help="Usuarios virtuales simultáneos.")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="Segundos medidos.")
+    run_parser.add_argument("--warmup", type=float, default=5.0, help="Segundos iniciales que no se cuentan.")
+    run_parser.add_argument("--think-time", type=float, default=0.0, help="Pausa media (s) entre peticiones de un usuario.")
+    run_parser.add_argument("--timeout", type=float, default=30.0)
+    run_parser.add_argument("--only", nargs="*", help="Etiquetas de ENDPOINT_MIX a incluir (ej: kpis/acquisition).")
+    run_parser.add_argument("--output", type=Path, help="Archivo JSON de resultados (por defecto benchmarks/results/).")
+    run_parser.add_argument("--compare", type=Path, help="Resultados JSON de una corrida anterior.")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.port, args.seed, args.customers, args.products, args.end)
+        return
+
+    server = _spawn_server(args) if args.spawn_server else None
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        print(f"Carga contra {base_url}: {args.concurrency} usuarios, {args.duration:.0f} s (+{args.warmup:.0f} s de calentamiento)\n")
+        result = asyncio.run(run_load(base_url, args.concurrency, args.duration, args.warmup, args.think_time,
+                                      args.timeout, args.seed, args.end, args.customers, args.products, args.only))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    summary = summarize(result.samples, result.duration)
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)["endpoints"]
+    print(report(summary, previous).to_string(index=False))
+
+    config = {key: (value.isoformat() if isinstance(value, date) else str(value) if isinstance(value, Path) else value)
+              for key, value in vars(args).items() if key not in ("command", "output", "compare")}
+    path = save_results(summary, config, args.output)
+    print(f"\nResultados guardados en {path}")
+
+
+if __name__ == "__main__":
+    main()
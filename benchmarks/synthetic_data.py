@@ -0,0 +1,506 @@
+# benchmarks/synthetic_data.py
+"""
+Generador de datos sintéticos de LiliApp para pruebas de escala.
+
+Produce, con la forma real de cada fuente:
+  - Jumpseller: categorías, productos (con descripciones HTML y variantes),
+    clientes y órdenes, como los snapshots que procesa el ETL
+    ({"order": {...}}, {"product": {...}}, {"category": {...}}, {"customer": {...}}).
+  - Firestore (modelo que leen los KPIs): pedidos, customers, users, carts,
+    services y categories.
+
+Distribuciones: registros con tendencia de crecimiento, compras repetidas
+geométricas (la mayoría compra una vez y una cola compra muchas veces), mezcla
+de comunas, medios de pago y estados, popularidad de servicios tipo Zipf,
+horario con peaks de mañana y tarde, y ratings sesgados a 5 estrellas.
+
+Todo es determinista para una semilla dada. Cada cliente usa su propio
+generador derivado de la semilla, así la salida es un stream que no retiene
+los datos en memoria y escala a millones de registros.
+
+Uso:
+    python -m benchmarks.synthetic_data --customers 100000 --out benchmarks/data/synthetic
+    python -m benchmarks.synthetic_data --customers 20000 --target memory   # siembra el Firestore en memoria
+
+Desde código:
+    dataset = SyntheticDataset(SyntheticConfig(customers=50_000, seed=7))
+    seed_memory_firestore(memory_firestore.get_client(), dataset)
+"""
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+
+DEFAULT_OUT_DIR = Path(__file__).resolve().parent / "data" / "synthetic"
+
+# Comunas con su región y peso relativo (aprox. a la mezcla real de pedidos).
+COMMUNES = [
+    ("Las Condes", "Región Metropolitana", 14), ("Providencia", "Región Metropolitana", 10),
+    ("Ñuñoa", "Región Metropolitana", 10), ("Vitacura", "Región Metropolitana", 7),
+    ("La Florida", "Región Metropolitana", 7), ("Santiago Centro", "Región Metropolitana", 7),
+    ("Lo Barnechea", "Región Metropolitana", 5), ("Maipú", "Región Metropolitana", 5),
+    ("Puente Alto", "Región Metropolitana", 5), ("La Reina", "Región Metropolitana", 4),
+    ("Huechuraba", "Región Metropolitana", 3), ("Peñalolén", "Región Metropolitana", 3),
+    ("San Miguel", "Región Metropolitana", 3), ("La Cisterna", "Región Metropolitana", 2),
+    ("Macul", "Región Metropolitana", 2), ("Viña del Mar", "Valparaíso", 3),
+    ("Valparaíso", "Valparaíso", 2), ("Concepción", "Biobío", 2),
+]
+PAYMENT_METHODS = [
+    ("mercado_pago", "Mercado Pago  (Débito o Crédito s/interés) 💳", 62),
+    ("webpay", "Webpay Plus  (Débito) 💳", 28),
+    ("transfer", "Pago con Transferencia 🏦", 7),
+    (None, None, 3),
+]
+# (estado Jumpseller, status_enum, estado del pedido en LiliApp, peso)
+ORDER_STATUSES = [
+    ("Paid", "paid", "completed", 88),
+    ("Pending Payment", "pending_payment", "pending", 6),
+    ("Canceled", "canceled", "cancelled", 6),
+]
+RATING_STARS = [(5, 58), (4, 27), (3, 9), (2, 4), (1, 2)]
+RATING_COMMENTS = ["Excelente servicio", "Muy puntual", "Todo bien", "Llegó tarde", "Buen trabajo, recomendado", ""]
+# Peso de cada hora del día (peaks de 10-13 h y 17-20 h).
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 1, 2, 4, 7, 10, 13, 13, 12, 9, 9, 10, 11, 12, 12, 10, 8, 6, 4, 2]
+CAMPAIGNS = [("Sin Campaña", 60), ("google_ads", 18), ("instagram", 12), ("referidos", 6), ("newsletter", 4)]
+
+CATEGORY_NAMES = [
+    "Gasfitería", "Electricidad", "Cerrajería", "Pintura", "Carpintería", "Climatización", "Limpieza",
+    "Jardinería", "Electrodomésticos", "Calefont", "Inodoros", "Lavaplatos", "Techumbre", "Fumigación",
+    "Mudanzas", "Armado de muebles", "Vidriería", "Cortinas", "Cerámica", "Impermeabilización",
+]
+SERVICE_VERBS = ["Reparación", "Instalación", "Mantención", "Revisión", "Cambio", "Limpieza"]
+SERVICE_OBJECTS = [
+    "de Estanque WC", "de Calefont", "de Enchufes", "de Lámparas", "de Chapa", "de Grifería", "de Ducha",
+    "de Aire Acondicionado", "de Lavadora", "de Cortinas", "de Muebles", "de Canaletas", "de Termo",
+    "de Tablero Eléctrico", "de Cerámica", "de Puertas", "de Ventanas", "de Lavaplatos",
+]
+FIRST_NAMES = ["Camila", "Valentina", "Javiera", "Catalina", "Francisca", "Antonia", "Sofía", "Isidora",
+               "Matías", "Benjamín", "Vicente", "Martín", "Sebastián", "Tomás", "Diego", "Joaquín",
+               "Constanza", "Fernanda", "Daniela", "Felipe", "Cristóbal", "Ignacio", "Carolina", "Rodrigo"]
+LAST_NAMES = ["González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez",
+              "Sepúlveda", "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya",
+              "Flores", "Espinoza", "Valenzuela", "Castillo", "Tapia", "Reyes", "Gutiérrez", "Meza"]
+EMAIL_DOMAINS = [("gmail.com", 70), ("hotmail.com", 12), ("outlook.com", 6), ("yahoo.com", 4), ("empresa.cl", 8)]
+HTML_BENEFITS = ["Profesional certificado (LiLi Pro)", "Garantía de 90 días", "Materiales de primera calidad",
+                 "Agenda el día y la hora", "Pago seguro en línea", "Atención en menos de 48 horas"]
+
+
+@dataclass
+class SyntheticConfig:
+    seed: int = 42
+    customers: int = 10_000
+    products: int = 200
+    categories: int = 21
+    start: date = date(2023, 1, 1)
+    end: date = date(2025, 9, 30)
+    # Probabilidad de volver a comprar después de cada pedido (cola geométrica).
+    repeat_probability: float = 0.45
+    # Clientes registrados que nunca compran.
+    no_purchase_share: float = 0.2
+    # Días medios entre compras repetidas.
+    mean_repeat_gap_days: float = 60.0
+    # Carros abandonados por cliente (media).
+    abandoned_carts_per_customer: float = 1.5
+    # Exponente de la popularidad Zipf de los servicios.
+    zipf_exponent: float = 1.1
+
+
+def _weighted(options):
+    """(valores, pesos acumulados) para elegir con bisect en O(log n)."""
+    values = [option[:-1] if len(option) > 2 else option[0] for option in options]
+    cumulative = list(itertools.accumulate(option[-1] for option in options))
+    return values, cumulative
+
+
+def _pick(rng: random.Random, table):
+    values, cumulative = table
+    return values[bisect.bisect_right(cumulative, rng.random() * cumulative[-1])]
+
+
+_COMMUNES = _weighted(COMMUNES)
+_PAYMENTS = _weighted(PAYMENT_METHODS)
+_STATUSES = _weighted(ORDER_STATUSES)
+_STARS = _weighted(RATING_STARS)
+_HOURS = _weighted(list(enumerate(HOUR_WEIGHTS)))
+_CAMPAIGNS = _weighted(CAMPAIGNS)
+_DOMAINS = _weighted(EMAIL_DOMAINS)
+
+
+def _jumpseller_ts(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+@dataclass
+class _Customer:
+    index: int
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    rut: str
+    commune: str
+    region: str
+    street: str
+    signed_up_at: datetime
+    onboarding_completed: bool
+    campaign: str
+    referred_by: Optional[int]
+
+
+@dataclass
+class _Order:
+    id: int
+    customer: _Customer
+    created_at: datetime
+    items: List[Tuple[Dict[str, Any], int, float]]  # (producto, cantidad, precio)
+    discount: float
+    status: Tuple[str, str, str]
+    payment: Tuple[Optional[str], Optional[str]]
+    rating: Optional[Dict[str, Any]]
+
+    @property
+    def total(self) -> float:
+        return round(sum(qty * price for _, qty, price in self.items) - self.discount, 0)
+
+
+class SyntheticDataset:
+    """Dataset sintético determinista. Cada método devuelve un stream nuevo."""
+
+    CUSTOMER_ID_BASE = 20_000_000
+    ORDER_ID_BASE = 5_000_000
+    PRODUCT_ID_BASE = 30_000_000
+    CATEGORY_ID_BASE = 2_000_000
+    VARIANT_ID_BASE = 100_000_000
+
+    def __init__(self, config: SyntheticConfig = None):
+        self.config = config or SyntheticConfig()
+        self._start = datetime.combine(self.config.start, datetime.min.time(), tzinfo=timezone.utc)
+        self._end = datetime.combine(self.config.end, datetime.max.time(), tzinfo=timezone.utc)
+        self._categories = self._build_categories()
+        self._products = self._build_products()
+        weights = [1 / (rank + 1) ** self.config.zipf_exponent for rank in range(len(self._products))]
+        self._product_popularity = (self._products, list(itertools.accumulate(weights)))
+
+    def _rng(self, stream: str, index: int = 0) -> random.Random:
+        return random.Random(f"{self.config.seed}:{stream}:{index}")
+
+    # --- Catálogo ---
+    def _build_categories(self) -> List[Dict[str, Any]]:
+        rng = self._rng("categories")
+        root = {"id": self.CATEGORY_ID_BASE, "name": "Servicios a domicilio", "parent_id": None,
+                "description": "Solicita un servicio a la comodidad de tu hogar en pocos minutos.",
+                "permalink": "servicios-a-domicilio"}
+        categories = [root]
+        for i in range(1, self.config.categories):
+            base = CATEGORY_NAMES[(i - 1) % len(CATEGORY_NAMES)]
+            name = base if i <= len(CATEGORY_NAMES) else f"{base} {i // len(CATEGORY_NAMES) + 1}"
+            categories.append({
+                "id": self.CATEGORY_ID_BASE + i, "name": name, "parent_id": root["id"],
+                "description": None if rng.random() < 0.6 else f"Servicios de {name.lower()} con profesionales certificados.",
+                "permalink": name.lower().replace(" ", "-"),
+            })
+        return categories
+
+    def _html_description(self, rng: random.Random, name: str) -> str:
+        benefits = "".join(f"<li>{b}</li>" for b in rng.sample(HTML_BENEFITS, rng.randint(2, 4)))
+        return (f"<h3>{name}</h3>\n\n<p><strong>Descripción:</strong><br>Nuestro servicio de {name.lower()} "
+                f"soluciona el problema con mano de obra especializada.</p>\n<ul>{benefits}</ul>\n"
+                f"<p><em>Precio referencial, sujeto a evaluación en terreno.</em></p>")
+
+    def _build_products(self) -> List[Dict[str, Any]]:
+        rng = self._rng("products")
+        root, leaves = self._categories[0], self._categories[1:] or self._categories
+        products = []
+        variant_ids = itertools.count(self.VARIANT_ID_BASE)
+        for i in range(self.config.products):
+            name = f"{rng.choice(SERVICE_VERBS)} {SERVICE_OBJECTS[i % len(SERVICE_OBJECTS)]}"
+            if i >= len(SERVICE_OBJECTS):
+                name = f"{name} {'Premium' if rng.random() < 0.5 else 'Express'} {i // len(SERVICE_OBJECTS)}"
+            # Precios log-normales terminados en 990 (mediana ~ $45.000).
+            price = max(round(rng.lognormvariate(10.7, 0.6), -3) - 10, 9_990)
+            created = self._start - timedelta(days=rng.randint(30, 400))
+            variants = []
+            for position in range(rng.choice([0, 0, 1, 2, 3, 4])):
+                variants.append({
+                    "id": next(variant_ids), "position": position, "price": price + position * 10_000,
+                    "sku": None, "stock": 0, "stock_unlimited": True,
+                    "options": [{"product_option_id": 1_500_000 + i, "product_option_value_id": 5_000_000 + i * 10 + position,
+                                 "option_type": "option", "name": "¿Qué necesitas?", "value": f"Opción {position + 1}",
+                                 "custom": None, "product_option_position": 1, "product_value_position": position + 1}],
+                })
+            product_categories = [root] + rng.sample(leaves, min(len(leaves), rng.choice([1, 1, 2])))
+            products.append({
+                "id": self.PRODUCT_ID_BASE + i, "name": name, "page_title": name,
+                "description": self._html_description(rng, name),
+                "meta_description": f"Servicio de {name.lower()} a domicilio.",
+                "price": float(price), "cost_per_item": None, "compare_at_price": None, "weight": 1.0,
+                "stock": 0, "stock_unlimited": True, "sku": None, "brand": None, "barcode": None,
+                "featured": rng.random() < 0.1, "reviews_enabled": True,
+                "status": "available" if rng.random() < 0.92 else "not-available",
+                "shipping_required": True, "type": "physical",
+                "created_at": _jumpseller_ts(created), "updated_at": _jumpseller_ts(created + timedelta(days=rng.randint(0, 300))),
+                "categories": [{"id": c["id"], "name": c["name"], "description": c["description"]} for c in product_categories],
+                "images": [{"id": 60_000_000 + i, "url": f"https://images.example.com/products/{self.PRODUCT_ID_BASE + i}.png", "position": 1}],
+                "variants": variants, "fields": [], "permalink": name.lower().replace(" ", "-"),
+                "discount": "0.0", "currency": "CLP",
+            })
+        return products
+
+    # --- Clientes y órdenes (stream por cliente) ---
+    def _customer(self, index: int, rng: random.Random) -> _Customer:
+        span = (self._end - self._start).total_seconds()
+        # sqrt(u) concentra los registros hacia el final del período: crecimiento.
+        signed_up = self._start + timedelta(seconds=int(span * rng.random() ** 0.5))
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        commune, region = _pick(rng, _COMMUNES)
+        customer_id = self.CUSTOMER_ID_BASE + index
+        return _Customer(
+            index=index, id=customer_id, first_name=first, last_name=last,
+            email=f"{first.lower()}.{last.lower()}{index}@{_pick(rng, _DOMAINS)}".replace("ñ", "n").replace("í", "i").replace("é", "e").replace("á", "a").replace("ó", "o").replace("ú", "u"),
+            phone=f"9{rng.randint(10_000_000, 99_999_999)}", rut=f"{rng.randint(5_000_000, 26_000_000)}-{rng.choice('0123456789K')}",
+            commune=commune, region=region, street=f"{rng.choice(LAST_NAMES)} {rng.randint(10, 9999)}",
+            signed_up_at=signed_up, onboarding_completed=rng.random() < 0.85, campaign=_pick(rng, _CAMPAIGNS),
+            referred_by=self.CUSTOMER_ID_BASE + rng.randrange(index) if index and rng.random() < 0.08 else None,
+        )
+
+    def _orders_for(self, customer: _Customer, rng: random.Random) -> List[_Order]:
+        config = self.config
+        if rng.random() < config.no_purchase_share:
+            return []
+        orders = []
+        moment = customer.signed_up_at + timedelta(days=rng.expovariate(1 / 3))
+        while moment <= self._end:
+            hour = _pick(rng, _HOURS)
+            created = moment.replace(hour=hour, minute=rng.randint(0, 59), second=rng.randint(0, 59), microsecond=0)
+            n_items = 1 if rng.random() < 0.9 else (2 if rng.random() < 0.9 else 3)
+            items = []
+            for _ in range(n_items):
+                product = _pick(rng, self._product_popularity)
+                variant = rng.choice(product["variants"]) if product["variants"] else None
+                items.append((product, 1 if rng.random() < 0.93 else 2, variant["price"] if variant else product["price"]))
+            status = _pick(rng, _STATUSES)
+            rating = None
+            if status[2] == "completed" and rng.random() < 0.65:
+                rating = {"stars": _pick(rng, _STARS), "comment": rng.choice(RATING_COMMENTS),
+                          "createdAt": created + timedelta(days=rng.randint(1, 10))}
+            subtotal = sum(qty * price for _, qty, price in items)
+            discount = round(subtotal * 0.1, 0) if rng.random() < 0.12 else 0.0
+            order_id = self.ORDER_ID_BASE + customer.index * 64 + len(orders)
+            orders.append(_Order(order_id, customer, created, items, discount, status, _pick(rng, _PAYMENTS), rating))
+            if rng.random() > config.repeat_probability or len(orders) >= 64:
+                break
+            moment = created + timedelta(days=rng.expovariate(1 / config.mean_repeat_gap_days))
+        return orders
+
+    def _customers_with_orders(self) -> Iterator[Tuple[_Customer, List[_Order], random.Random]]:
+        for index in range(self.config.customers):
+            rng = self._rng("customer", index)
+            customer = self._customer(index, rng)
+            yield customer, self._orders_for(customer, rng), rng
+
+    # --- Salidas con la forma de Jumpseller ---
+    def jumpseller_categories(self) -> Iterator[Dict[str, Any]]:
+        for category in self._categories:
+            yield {"category": dict(category)}
+
+    def jumpseller_products(self) -> Iterator[Dict[str, Any]]:
+        for product in self._products:
+            yield {"product": product}
+
+    def jumpseller_customers(self) -> Iterator[Dict[str, Any]]:
+        for customer, orders, _ in self._customers_with_orders():
+            if orders:
+                yield {"customer": {
+                    "id": customer.id, "email": customer.email, "phone": customer.phone, "phone_prefix": "+56",
+                    "fullname": f"{customer.first_name} {customer.last_name}", "status": "approved",
+                    "created_at": _jumpseller_ts(customer.signed_up_at),
+                }}
+
+    def _address(self, customer: _Customer, with_taxid: bool = False) -> Dict[str, Any]:
+        address = {
+            "name": customer.first_name, "surname": customer.last_name, "address": customer.street,
+            "city": "Santiago" if customer.region == "Región Metropolitana" else customer.commune,
+            "postal": None, "region": customer.region, "country": "Chile", "country_code": "CL",
+            "street_number": None, "complement": None, "municipality": customer.commune,
+        }
+        if with_taxid:
+            address["taxid"] = customer.rut
+        return address
+
+    def jumpseller_orders(self) -> Iterator[Dict[str, Any]]:
+        for customer, orders, _ in self._customers_with_orders():
+            for order in orders:
+                jumpseller_status, status_enum, _ = order.status
+                payment_type, payment_name = order.payment
+                completed = order.created_at + timedelta(minutes=7) if status_enum == "paid" else None
+                yield {"order": {
+                    "id": order.id, "created_at": _jumpseller_ts(order.created_at),
+                    "completed_at": _jumpseller_ts(completed) if completed else None,
+                    "currency": "CLP", "subtotal": order.total + order.discount, "tax": 0.0, "shipping": 0.0,
+                    "total": order.total, "discount": order.discount,
+                    "payment_method_name": payment_name, "payment_method_type": payment_type,
+                    "payment_notification_id": str(order.id * 7919) if payment_type else None,
+                    "status": jumpseller_status, "status_enum": status_enum,
+                    "customer": {"id": customer.id, "email": customer.email, "phone": customer.phone,
+                                 "phone_prefix": "+56", "fullname": f"{customer.first_name} {customer.last_name}"},
+                    "shipping_address": self._address(customer), "billing_address": self._address(customer, with_taxid=True),
+                    "products": [{"id": product["id"], "variant_id": None, "sku": "", "name": product["name"], "qty": qty,
+                                  "price": price, "tax": 0.0, "discount": 0.0, "type": "physical"}
+                                 for product, qty, price in order.items],
+                    "additional_fields": [
+                        {"value": f"{customer.first_name} {customer.last_name}", "label": "Nombre de quien recibirá al profesional", "id": 54513, "area": "contact"},
+                        {"value": "Si", "label": "¿Cuenta con estacionamiento disponible?", "id": 54512, "area": "contact"},
+                    ],
+                    "source": {"referral_source": customer.campaign, "created_from": "checkout"},
+                }}
+
+    # --- Salidas con el modelo de Firestore que leen los KPIs ---
+    def firestore_categories(self) -> Iterator[Dict[str, Any]]:
+        for category in self._categories:
+            yield {"id": str(category["id"]), "name": category["name"], "description": category["description"] or ""}
+
+    def firestore_services(self) -> Iterator[Dict[str, Any]]:
+        for product in self._products:
+            main_category = product["categories"][-1]
+            yield {"id": str(product["id"]), "name": product["name"], "price": product["price"],
+                   "category": {"id": str(main_category["id"])}, "isActive": product["status"] == "available"}
+
+    def _category_name(self, product: Dict[str, Any]) -> Tuple[str, str]:
+        category = product["categories"][-1]
+        return str(category["id"]), category["name"]
+
+    def firestore_pedidos(self) -> Iterator[Dict[str, Any]]:
+        for customer, orders, _ in self._customers_with_orders():
+            for order in orders:
+                payment_type, _ = order.payment
+                pedido = {
+                    "id": str(order.id), "customerId": str(customer.id), "status": order.status[2],
+                    "createdAt": order.created_at, "total": order.total,
+                    "items": [{"serviceId": str(product["id"]), "serviceName": product["name"], "quantity": qty, "price": price,
+                               "categoryId": self._category_name(product)[0], "categoryName": self._category_name(product)[1]}
+                              for product, qty, price in order.items],
+                    "paymentDetails": {"type": payment_type or "Desconocido"},
+                    "serviceAddress": {"commune": customer.commune, "region": customer.region},
+                    "acquisitionInfo": {"campaign": customer.campaign},
+                }
+                if order.rating:
+                    pedido["rating"] = order.rating
+                yield pedido
+
+    def firestore_customers(self) -> Iterator[Dict[str, Any]]:
+        for customer, orders, _ in self._customers_with_orders():
+            completed = [o for o in orders if o.status[2] == "completed"]
+            yield {
+                "id": str(customer.id), "email": customer.email, "phone": f"+56{customer.phone}",
+                "accountType": "customer", "accountStatus": "verified", "createdAt": customer.signed_up_at,
+                "isDeleted": False, "onboardingCompleted": customer.onboarding_completed,
+                "firstName": customer.first_name, "lastName": customer.last_name,
+                "displayName": f"{customer.first_name} {customer.last_name}", "rut": customer.rut, "rutVerified": False,
+                "addresses": [{"id": f"addr_{customer.id}", "alias": "Principal", "street": customer.street,
+                               "commune": customer.commune, "region": customer.region, "isPrimary": True}],
+                "totalSpending": sum(o.total for o in completed), "serviceHistoryCount": len(completed),
+            }
+
+    def firestore_users(self) -> Iterator[Dict[str, Any]]:
+        for customer, _, _ in self._customers_with_orders():
+            acquisition = {"campaign": customer.campaign}
+            if customer.referred_by:
+                acquisition["referredBy"] = str(customer.referred_by)
+            yield {"id": str(customer.id), "email": customer.email, "role": "customer",
+                   "createdAt": customer.signed_up_at, "acquisitionInfo": acquisition}
+
+    def firestore_carts(self) -> Iterator[Dict[str, Any]]:
+        for customer, orders, rng in self._customers_with_orders():
+            for order in orders:
+                yield {"id": f"cart_{order.id}", "customerId": str(customer.id), "status": "converted",
+                       "createdAt": order.created_at - timedelta(minutes=rng.randint(2, 90)),
+                       "items": [{"serviceId": str(product["id"]), "quantity": qty} for product, qty, _ in order.items]}
+            # Número de carros abandonados ~ geométrico con la media configurada.
+            mean = self.config.abandoned_carts_per_customer
+            n_abandoned = 0
+            while rng.random() < mean / (1 + mean):
+                n_abandoned += 1
+            span = max((self._end - customer.signed_up_at).total_seconds(), 1)
+            for k in range(n_abandoned):
+                product = _pick(rng, self._product_popularity)
+                yield {"id": f"cart_{customer.id}_a{k}", "customerId": str(customer.id), "status": "abandoned",
+                       "createdAt": customer.signed_up_at + timedelta(seconds=span * rng.random()),
+                       "items": [{"serviceId": str(product["id"]), "quantity": 1}]}
+
+    def streams(self) -> Dict[str, Iterator[Dict[str, Any]]]:
+        """Todas las salidas, por nombre de archivo / colección."""
+        return {
+            "jumpseller_categories": self.jumpseller_categories(),
+            "jumpseller_products": self.jumpseller_products(),
+            "jumpseller_customers": self.jumpseller_customers(),
+            "jumpseller_orders": self.jumpseller_orders(),
+            "categories": self.firestore_categories(),
+            "services": self.firestore_services(),
+            "customers": self.firestore_customers(),
+            "users": self.firestore_users(),
+            "pedidos": self.firestore_pedidos(),
+            "carts": self.firestore_carts(),
+        }
+
+
+FIRESTORE_COLLECTIONS = ("categories", "services", "customers", "users", "pedidos", "carts")
+
+
+def write_ndjson(dataset: SyntheticDataset, out_dir: Path) -> Dict[str, int]:
+    """Escribe cada salida como '<nombre>.ndjson'. Las fechas de Firestore van en ISO 8601 (UTC)."""
+    os.makedirs(out_dir, exist_ok=True)
+    counts = {}
+    for name, stream in dataset.streams().items():
+        with open(Path(out_dir) / f"{name}.ndjson", "wb") as f:
+            count = 0
+            for record in stream:
+                f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NAIVE_UTC))
+                count += 1
+        counts[name] = count
+    return counts
+
+
+def seed_memory_firestore(client, dataset: SyntheticDataset, collections=FIRESTORE_COLLECTIONS) -> Dict[str, int]:
+    """Carga las colecciones de Firestore del dataset en un cliente de backend.core.memory_firestore."""
+    streams = dataset.streams()
+    return {name: client.load_documents(name, streams[name]) for name in collections}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=21)
+    parser.add_argument("--start", type=date.fromisoformat, default=SyntheticConfig.start)
+    parser.add_argument("--end", type=date.fromisoformat, default=SyntheticConfig.end)
+    parser.add_argument("--target", choices=["ndjson", "memory"], default="ndjson")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT_DIR)
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(SyntheticConfig(seed=args.seed, customers=args.customers, products=args.products,
+                                               categories=args.categories, start=args.start, end=args.end))
+    started = time.perf_counter()
+    if args.target == "memory":
+        from backend.core import memory_firestore
+        counts = seed_memory_firestore(memory_firestore.get_client(), dataset)
+    else:
+        counts = write_ndjson(dataset, args.out)
+        print(f"Archivos NDJSON en {args.out}")
+    for name, count in counts.items():
+        print(f"  {name:<24} {count:>12,}")
+    print(f"Generado en {time.perf_counter() - started:.1f} s (semilla {args.seed}).")
+
+
+if __name__ == "__main__":
+    main()
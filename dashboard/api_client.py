@@ -1,32 +1,194 @@
 # dashboard/api_client.py
+import gzip
+import time
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 import json
+from etl.modules import landing_zone
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson es opcional; se usa la librería estándar como respaldo
+    _json_loads = json.loads
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
 
 API_BASE_URL = "http://127.0.0.1:8000/api/v1"
+# Formato tabular binario que los listados CRUD y las tablas de KPIs sirven bajo negociación de contenido.
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Los cuerpos JSON de petición a partir de este tamaño se envían comprimidos con gzip.
+GZIP_MIN_BYTES = 1024
+# Cantidad de llamadas recientes que se conservan para el panel de depuración.
+MAX_TIMINGS = 200
+
+# ===================================================================
+# ===             TRANSPORTE HTTP (SESIÓN COMPARTIDA)             ===
+# ===================================================================
+
+@st.cache_resource
+def _get_session() -> requests.Session:
+    """
+    Sesión HTTP compartida entre reruns y páginas: reutiliza conexiones
+    (keep-alive) en lugar de abrir una nueva por cada llamada.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip", "Accept": "application/json"})
+    return session
+
+def _record_timing(method: str, endpoint: str, status, started: float, size: int) -> None:
+    """Registra la duración de una llamada en la sesión de Streamlit para el panel de depuración."""
+    try:
+        timings = st.session_state.setdefault("api_timings", deque(maxlen=MAX_TIMINGS))
+    except Exception:  # Fuera de un contexto de ejecución de Streamlit
+        return
+    timings.append({
+        "hora": time.strftime("%H:%M:%S"),
+        "método": method,
+        "endpoint": endpoint,
+        "estado": status,
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+        "kb": round(size / 1024, 1),
+    })
+
+def get_api_timings() -> list:
+    """Devuelve las llamadas recientes a la API (la más reciente primero)."""
+    return list(reversed(st.session_state.get("api_timings", [])))
+
+def render_api_timings_panel() -> None:
+    """Panel de depuración con la duración de las llamadas a la API de esta sesión."""
+    timings = get_api_timings()
+    with st.expander(f"⏱️ Depuración: llamadas a la API ({len(timings)})", expanded=False):
+        if timings:
+            st.dataframe(timings, use_container_width=True, hide_index=True)
+        else:
+            st.caption("Aún no se han registrado llamadas en esta sesión.")
 
-def _handle_request(method: str, endpoint: str, **kwargs):
+def _encode_json_body(kwargs: dict) -> dict:
+    """Serializa el payload 'json' con orjson y lo comprime con gzip si es grande."""
+    payload = kwargs.pop("json", None)
+    if payload is None:
+        return kwargs
+    try:
+        body = _json_dumps(payload)
+    except TypeError:
+        # orjson rechaza valores que json.dumps acepta (ej: claves int, enteros de más de
+        # 64 bits): se serializan como lo hacía requests con 'json='.
+        body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    kwargs["data"] = body
+    kwargs["headers"] = {**headers, **kwargs.get("headers", {})}
+    return kwargs
+
+def _decode_json(response: requests.Response):
+    return _json_loads(response.content) if response.content else {"status": "success"}
+
+def _handle_request(method: str, endpoint: str, decode=_decode_json, **kwargs):
     """
     Función de ayuda interna para manejar todas las llamadas a la API,
     con manejo de errores mejorado para depuración.
     """
     url = f"{API_BASE_URL}{endpoint}"
+    kwargs = _encode_json_body(kwargs)
+    started = time.perf_counter()
     try:
-        response = requests.request(method, url, timeout=10, **kwargs)
+        response = _get_session().request(method, url, timeout=10, **kwargs)
+        _record_timing(method, endpoint, response.status_code, started, len(response.content))
         response.raise_for_status()
-        return response.json() if response.content else {"status": "success"}
+        return decode(response)
     except requests.exceptions.HTTPError as e:
         st.error(f"Error de API: {e.response.status_code} - {e.response.text}")
     except requests.exceptions.ConnectionError as e:
+        _record_timing(method, endpoint, "sin conexión", started, 0)
         st.error(f"🔌 Error de Conexión: No se pudo conectar a {url}.")
         st.error(f"   Detalle técnico: {repr(e)}")
         st.warning("   ACCIÓN: Verifica que el servidor backend (FastAPI) esté corriendo y que tu Firewall/Antivirus no esté bloqueando la conexión al puerto 8000.")
     except requests.exceptions.Timeout:
+        _record_timing(method, endpoint, "timeout", started, 0)
         st.error(f"🔌 Error de Timeout: El servidor en {url} tardó demasiado en responder.")
     except requests.exceptions.RequestException as e:
         st.error(f"Ocurrió un error de red inesperado: {e}")
     return None
 
+def _get_ndjson(endpoint: str, params: dict = None, timeout: int = 300) -> list:
+    """
+    Descarga una respuesta JSON-Lines completa y decodifica cada línea con orjson.
+    Lanza la excepción de requests si la llamada falla.
+    """
+    url = f"{API_BASE_URL}{endpoint}"
+    started = time.perf_counter()
+    response = _get_session().get(url, params=params, timeout=timeout)
+    _record_timing("GET", endpoint, response.status_code, started, len(response.content))
+    response.raise_for_status()
+    return [_json_loads(line) for line in response.content.splitlines() if line.strip()]
+
+def to_dataframe(payload):
+    """
+    Reconstruye un DataFrame a partir del formato columnar {"columns": [...], "data": [...]}
+    con el que el backend serializa las tablas. Acepta también una lista de registros.
+    """
+    import pandas as pd
+    if isinstance(payload, dict) and "columns" in payload and "data" in payload:
+        return pd.DataFrame(payload["data"], columns=payload["columns"])
+    if isinstance(payload, list):
+        return pd.DataFrame(payload)
+    return pd.DataFrame()
+
+def _to_python(value):
+    """Convierte recursivamente los arrays de numpy (listas anidadas en Arrow) a listas."""
+    if hasattr(value, "tolist") and not isinstance(value, (str, bytes)):
+        value = value.tolist()
+    if isinstance(value, list):
+        return [_to_python(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _to_python(v) for k, v in value.items()}
+    return value
+
+def find_record(df, record_id, id_column: str = "id"):
+    """
+    Busca una fila de un DataFrame tabular y la devuelve con la forma de un documento JSON:
+    sin los campos nulos y con las listas anidadas como listas. None si no existe.
+    """
+    import pandas as pd
+    if df is None or df.empty or id_column not in df:
+        return None
+    rows = df[df[id_column].astype(str) == str(record_id)]
+    if rows.empty:
+        return None
+    return {k: _to_python(v) for k, v in rows.iloc[0].items() if not (pd.api.types.is_scalar(v) and pd.isna(v))}
+
+def _decode_table(response: requests.Response):
+    """
+    Convierte una respuesta tabular en DataFrame. Si el backend respondió en Arrow, las
+    columnas se leen directamente desde el buffer (sin parsear JSON ni pivotar filas a
+    columnas); si respondió JSON, se reconstruye con to_dataframe.
+    """
+    if not response.headers.get("Content-Type", "").startswith(ARROW_STREAM_MEDIA_TYPE):
+        return to_dataframe(_json_loads(response.content) if response.content else [])
+
+    import pyarrow as pa
+    table = pa.ipc.open_stream(pa.py_buffer(response.content)).read_all()
+    metadata = table.schema.metadata or {}
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    # Columnas que el backend no pudo tipar en Arrow y envió como texto JSON.
+    for column in _json_loads(metadata.get(b"liliapp.json_columns", b"[]")):
+        df[column] = [None if v is None else _json_loads(v) for v in df[column]]
+    return df
+
+def get_table(endpoint: str, params: dict = None):
+    """Descarga una tabla como DataFrame, pidiendo el formato Arrow IPC al backend (JSON como respaldo)."""
+    headers = {"Accept": f"{ARROW_STREAM_MEDIA_TYPE}, application/json;q=0.9"}
+    return _handle_request("GET", endpoint, decode=_decode_table, params=params, headers=headers)
+
 # --- Funciones de KPIs ---
 def get_basic_pedidos_kpis(start_date: str, end_date: str):
     """Obtiene los KPIs básicos de la colección 'pedidos'."""
@@ -36,44 +198,43 @@ def get_kpis(endpoint: str, start_date: str, end_date: str):
     """Función genérica para obtener todos los KPIs."""
     params = {"start_date": start_date, "end_date": end_date}
     return _handle_request("GET", f"/kpis/{endpoint}", params=params)
+def get_kpi_table(endpoint: str, table: str, start_date: str, end_date: str):
+    """Una sola tabla de una familia de KPIs (ej: 'segmentation', 'rfm_segments'), como DataFrame."""
+    params = {"start_date": start_date, "end_date": end_date}
+    return get_table(f"/kpis/{endpoint}/tables/{table}", params=params)
+def get_segment_customers(segment: str, start_date: str, end_date: str, page: int = 1, page_size: int = 25):
+    """Página de clientes de un segmento RFM."""
+    params = {"segment": segment, "start_date": start_date, "end_date": end_date, "page": page, "page_size": page_size}
+    return _handle_request("GET", "/kpis/segmentation/customers", params=params)
 
 # --- Jumpseller API ---
 def get_all_jumpseller_orders(status: str = "paid"):
-    endpoint = "/jumpseller/stream-orders"
-    url, params = f"{API_BASE_URL}{endpoint}", {"status": status}
-    all_orders = []
     try:
-        with requests.get(url, params=params, stream=True, timeout=300) as r:
-            r.raise_for_status()
-            for line in r.iter_lines():
-                if line: all_orders.append(json.loads(line))
-        return all_orders
+        return _get_ndjson("/jumpseller/stream-orders", params={"status": status}, timeout=300)
     except Exception as e: st.error(f"Error de API al cargar órdenes: {e}"); return None
 
 def get_all_jumpseller_products(status: str = "available"):
-    endpoint = "/jumpseller/products"
-    url, params = f"{API_BASE_URL}{endpoint}", {"status": status}
-    all_products = []
     try:
-        with requests.get(url, params=params, stream=True, timeout=300) as r:
-            r.raise_for_status()
-            for line in r.iter_lines():
-                if line: all_products.append(json.loads(line))
-        return all_products
+        return _get_ndjson("/jumpseller/products", params={"status": status}, timeout=300)
     except Exception as e: st.error(f"Error de API al cargar productos: {e}"); return None
         
 def get_all_jumpseller_categories():
-    endpoint = "/jumpseller/stream-categories"
-    url = f"{API_BASE_URL}{endpoint}"
-    all_categories = []
     try:
-        with requests.get(url, stream=True, timeout=120) as response:
-            response.raise_for_status()
-            for line in response.iter_lines():
-                if line: all_categories.append(json.loads(line))
-        return all_categories
+        return _get_ndjson("/jumpseller/stream-categories", timeout=120)
     except Exception as e: st.error(f"Error de API al cargar categorías: {e}"); return None
 
+# --- Landing Zone: instantáneas locales de Jumpseller ---
+# Las páginas y el ETL leen la última instantánea en disco y solo vuelven a
+# descargar el listado completo cuando está obsoleta o se fuerza el refresco.
+def get_jumpseller_orders_snapshot(status: str = "paid", force_refresh: bool = False, logger=lambda msg: None):
+    return landing_zone.get_or_refresh(f"orders_{status}", lambda: get_all_jumpseller_orders(status), force_refresh=force_refresh, logger=logger)
+
+def get_jumpseller_products_snapshot(status: str = "available", force_refresh: bool = False, logger=lambda msg: None):
+    return landing_zone.get_or_refresh(f"products_{status}", lambda: get_all_jumpseller_products(status), force_refresh=force_refresh, logger=logger)
+
+def get_jumpseller_categories_snapshot(force_refresh: bool = False, logger=lambda msg: None):
+    return landing_zone.get_or_refresh("categories", get_all_jumpseller_categories, force_refresh=force_refresh, logger=logger)
+
 def get_jumpseller_order_details(order_id: int):
     return _handle_request("GET", f"/jumpseller/orders/{order_id}")
 
@@ -89,6 +250,16 @@ def get_services():
 
 def get_categories():
     return _handle_request("GET", "/crud/categories")
+
+# Variantes tabulares de los listados (Arrow IPC -> DataFrame), para las páginas que trabajan con tablas.
+def get_customers_df():
+    return get_table("/crud/customers")
+
+def get_services_df():
+    return get_table("/crud/services")
+
+def get_categories_df():
+    return get_table("/crud/categories")
     
 def create_document(endpoint: str, payload: dict):
     # Asumimos que el endpoint ya incluye el prefijo /crud
@@ -6,7 +6,7 @@ from typing import Dict, Any, Optional
 
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_kpis
+from dashboard.api_client import get_kpis, render_api_timings_panel
 from dashboard.styles import load_custom_css
 
 class BaseDashboard:
@@ -61,10 +61,22 @@ class BaseDashboard:
         start_display = self.start_date.strftime('%d/%m/%Y')
         end_display = self.end_date.strftime('%d/%m/%Y')
         st.subheader(f"📊 Resumen del Período: {start_display} al {end_display}")
-        
+        self.render_freshness(start_str, end_str)
+
         # Llama a los métodos de renderizado que serán definidos por las clases hijas
         self.render_kpi_cards()
         self.render_visualizations()
+        render_api_timings_panel()
+
+    def render_freshness(self, start_str: str, end_str: str) -> None:
+        """Aviso discreto cuando la API respondió con KPIs vencidos mientras los recalcula."""
+        freshness = self.data.get("_cache") or {}
+        if not freshness.get("stale"):
+            return
+        # No se conserva la versión vencida: la próxima interacción trae la recalculada.
+        self.load_data.clear(start_str, end_str)
+        computed_at = datetime.fromisoformat(freshness["computed_at"]).astimezone()
+        st.caption(f"🔄 Actualizando… mostrando datos calculados a las {computed_at.strftime('%H:%M')}.")
 
     # --- Métodos abstractos que las clases hijas DEBEN implementar ---
     def render_kpi_cards(self) -> None:
@@ -11,7 +11,6 @@ if str(project_root) not in sys.path:
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
 import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
 import os
 
@@ -3,7 +3,7 @@ import streamlit as st
 # --- Importaciones ---
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_all_jumpseller_orders, get_jumpseller_order_details
+from dashboard.api_client import get_jumpseller_orders_snapshot, get_jumpseller_order_details
 # Importamos la nueva función de transformación
 from etl.modules.transform import transform_order_to_customer_model
 
@@ -17,7 +17,7 @@ render_menu()
 def load_jumpseller_order_list():
     """Carga una lista ligera de órdenes desde Jumpseller para el selector."""
     with st.spinner("Cargando lista de órdenes desde Jumpseller..."):
-        orders_raw = get_all_jumpseller_orders(status="paid")
+        orders_raw = get_jumpseller_orders_snapshot(status="paid")
     if not orders_raw: return {}
     return {str(item['order']['id']): item['order'] for item in orders_raw if 'order' in item}
 
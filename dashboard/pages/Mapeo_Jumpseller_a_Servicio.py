@@ -3,7 +3,7 @@ import streamlit as st
 # --- Importaciones de Módulos del Proyecto ---
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_all_jumpseller_products, get_jumpseller_product_details
+from dashboard.api_client import get_jumpseller_products_snapshot, get_jumpseller_product_details
 from etl.modules.transform import transform_product_to_service_model
 
 # --- Configuración de Página ---
@@ -16,7 +16,7 @@ render_menu()
 def load_jumpseller_product_list():
     """Carga una lista ligera de productos desde Jumpseller para el selector."""
     with st.spinner("Cargando lista de servicios desde Jumpseller..."):
-        products_raw = get_all_jumpseller_products(status="available")
+        products_raw = get_jumpseller_products_snapshot(status="available")
     if not products_raw: return {}
     return {str(item['product']['id']): item['product'] for item in products_raw if 'product' in item}
 
@@ -3,7 +3,7 @@ import streamlit as st
 from etl.modules.transform import transform_single_order
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_all_jumpseller_orders, get_jumpseller_order_details
+from dashboard.api_client import get_jumpseller_orders_snapshot, get_jumpseller_order_details
 
 # --- Configuración de Página y Autenticación ---
 st.set_page_config(page_title="Mapeo de Órdenes (ETL) - LiliApp", layout="wide")
@@ -17,7 +17,7 @@ def load_order_list_for_selector():
     Carga una lista de órdenes con datos mínimos para poblar el selector.
     """
     with st.spinner("Cargando lista de órdenes..."):
-        orders_raw = get_all_jumpseller_orders(status="paid")
+        orders_raw = get_jumpseller_orders_snapshot(status="paid")
     
     if not orders_raw:
         st.error("No se pudieron cargar órdenes. Verifica la conexión del backend.")
@@ -2,7 +2,7 @@ import streamlit as st
 from etl.modules.transform import transform_single_product
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_all_jumpseller_products
+from dashboard.api_client import get_jumpseller_products_snapshot
 
 # --- Configuración de Página y Autenticación ---
 st.set_page_config(page_title="Mapeo de Servicios (ETL) - LiliApp", layout="wide")
@@ -16,7 +16,7 @@ def load_live_products_from_api():
     Carga todos los productos 'disponibles' desde la API de Jumpseller.
     """
     with st.spinner("Conectando con Jumpseller y cargando catálogo de productos... Esto puede tardar un momento."):
-        live_products_raw = get_all_jumpseller_products(status="available")
+        live_products_raw = get_jumpseller_products_snapshot(status="available")
     
     if not live_products_raw:
         st.error("No se pudieron cargar productos desde Jumpseller. Verifica la conexión del backend.")
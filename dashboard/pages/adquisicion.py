@@ -1,10 +1,6 @@
 # dashboard/pages/adquisicion.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import folium
-from folium.plugins import HeatMap
-from streamlit_folium import st_folium
 from typing import Dict, List
 
 # --- Importaciones de Módulos del Proyecto ---
@@ -68,6 +64,7 @@ class AcquisitionDashboard(BaseDashboard):
                 # No necesitamos set_index para Plotly Express, lo cual es más simple
                 
                 # --- CREACIÓN DEL GRÁFICO CON PLOTLY EXPRESS ---
+                import plotly.express as px
                 fig = px.area(
                     df_daily,
                     x='dates',
@@ -124,6 +121,10 @@ class AcquisitionDashboard(BaseDashboard):
             return
         
         try:
+            # folium solo se carga si hay datos de comunas que mostrar.
+            import folium
+            from folium.plugins import HeatMap
+            from streamlit_folium import st_folium
             m = folium.Map(location=[-33.45, -70.6667], zoom_start=11, tiles="CartoDB positron")
             
             heat_data = [[item['lat'], item['lon'], item['count']] for item in acquisition_by_commune if all(k in item for k in ['lat', 'lon', 'count'])]
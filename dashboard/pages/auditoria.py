@@ -5,8 +5,8 @@ import streamlit as st
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
 from dashboard.api_client import (
-    get_all_jumpseller_orders, get_audit_data_for_order,
-    get_all_jumpseller_products, get_audit_data_for_service # <-- Nuevas importaciones
+    get_jumpseller_orders_snapshot, get_audit_data_for_order,
+    get_jumpseller_products_snapshot, get_audit_data_for_service
 )
 
 # --- Configuración de Página ---
@@ -20,11 +20,11 @@ def load_list_for_selector(entity_type: str):
     """Carga una lista ligera de órdenes o productos para los selectores."""
     with st.spinner(f"Cargando lista de {entity_type} desde Jumpseller..."):
         if entity_type == "órdenes":
-            raw_data = get_all_jumpseller_orders(status="paid")
+            raw_data = get_jumpseller_orders_snapshot(status="paid")
             if not raw_data: return {}
             return {str(item['order']['id']): item['order'].get('customer', {}) for item in raw_data if 'order' in item}
         elif entity_type == "servicios":
-            raw_data = get_all_jumpseller_products(status="available")
+            raw_data = get_jumpseller_products_snapshot(status="available")
             if not raw_data: return {}
             return {str(item['product']['id']): item['product'].get('name', 'Sin Nombre') for item in raw_data if 'product' in item}
     return {}
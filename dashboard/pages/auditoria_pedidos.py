@@ -1,11 +1,23 @@
 
 import streamlit as st
-from etl.modules.auditoria_pedidos import get_pedidos_firestore, get_jumpseller_order, comparar_pedidos
+from etl.modules.auditoria_pedidos import get_pedidos_firestore, get_jumpseller_order, comparar_pedidos, reconciliar_pedidos
 
 st.set_page_config(page_title="Auditoría de Pedidos - Mapeo Inverso", layout="wide", initial_sidebar_state="expanded")
 st.title("🧾 Auditoría Visual de Pedidos: Firestore → Jumpseller")
 st.markdown("Esta herramienta te permite comparar visualmente cada pedido en Firestore con su versión original en Jumpseller, para decidir cuál estructura es más completa y confiable.")
 
+# --- Reconciliación masiva ---
+with st.expander("📦 Reconciliación masiva (todos los pedidos)", expanded=False):
+    st.caption("Cruza todos los pedidos de Firestore con Jumpseller comparando huellas canónicas. El detalle se guarda en un archivo NDJSON.")
+    if st.button("Ejecutar reconciliación", key="run_bulk_reconciliation"):
+        with st.spinner("Reconciliando pedidos..."):
+            resumen = reconciliar_pedidos()
+        cols = st.columns(4)
+        cols[0].metric("Faltantes en Firestore", resumen["faltantes_en_firestore"])
+        cols[1].metric("Extras en Firestore", resumen["extras_en_firestore"])
+        cols[2].metric("Con diferencias", resumen["con_diferencias"])
+        cols[3].metric("Idénticos", resumen["identicos"])
+        st.caption(f"Duración: {resumen['duracion_segundos']} s · Detalle: `{resumen['detalle_path']}`")
 
 pedidos = get_pedidos_firestore()
 if not pedidos:
@@ -12,12 +12,12 @@ from dashboard.api_client import (
     clean_collection_api
 )
 from dashboard.api_client import (
-    get_all_jumpseller_orders, 
-    get_all_jumpseller_products, 
-    get_all_jumpseller_categories
+    get_jumpseller_orders_snapshot,
+    get_jumpseller_products_snapshot,
+    get_jumpseller_categories_snapshot
 )
 from etl.modules import transform, load
-from backend.services import firestore_service
+from etl.modules.metrics import StageTimer
 
 # --- Configuración y Autenticación ---
 st.set_page_config(page_title="Panel ETL - LiliApp", layout="wide", initial_sidebar_state="expanded")
@@ -33,13 +33,14 @@ def log_message(container, message):
 # ===         ORQUESTADORES DE PROCESOS ETL              ===
 # ==========================================================
 
-def run_categories_etl(is_test_run, logger_container):
+def run_categories_etl(is_test_run, logger_container, skip_unchanged=True, prune=False, force_refresh=False):
     """Orquesta el proceso ETL completo para Categorías."""
     with st.status("Ejecutando ETL de Categorías...", expanded=True) as status:
+        timer = StageTimer("categories")
         try:
             log_message(logger_container, "🚀 Proceso iniciado para Categorías.")
             log_message(logger_container, "Fase 1: EXTRACCIÓN...")
-            raw_data = get_all_jumpseller_categories()
+            raw_data = get_jumpseller_categories_snapshot(force_refresh=force_refresh, logger=lambda msg: log_message(logger_container, msg))
             if not raw_data: 
                 log_message(logger_container, "⚠️ No se encontraron categorías.")
                 status.update(label="Extracción fallida.", state="warning"); return
@@ -47,51 +48,66 @@ def run_categories_etl(is_test_run, logger_container):
             data_to_process = raw_data[:10] if is_test_run else raw_data
             if is_test_run: log_message(logger_container, f"🧪 MODO PRUEBA: Procesando {len(data_to_process)} registros.")
 
+            timer.lap("extract")
             log_message(logger_container, "Fase 2: TRANSFORMACIÓN...")
             categories = transform.transform_categories(data_to_process, logger=lambda msg: log_message(logger_container, msg))
             
+            timer.lap("transform")
             log_message(logger_container, "Fase 3: CARGA (Idempotente)...")
-            if categories: load.load_data_to_firestore("categories", categories, "id", logger=lambda msg: log_message(logger_container, msg), merge=True)
+            if categories: load.load_data_to_firestore("categories", categories, "id", logger=lambda msg: log_message(logger_container, msg), merge=True, skip_unchanged=skip_unchanged, prune=prune and not is_test_run)
             
+            timer.lap("load"); timer.finish()
             status.update(label="¡ETL de Categorías completado!", state="complete")
             log_message(logger_container, "🎉 Proceso finalizado.")
         except Exception as e:
+            timer.finish(success=False)
             status.update(label="Ocurrió un error en el ETL", state="error"); st.exception(e)
 
-def run_orders_etl_normalized(is_test_run, logger_container):
+def run_orders_etl_normalized(is_test_run, logger_container, skip_unchanged=True, prune=False, force_refresh=False):
     """Orquesta el proceso ETL original para Órdenes, creando usuarios y perfiles normalizados."""
     with st.status("Ejecutando ETL de Órdenes (Modelo Normalizado)...", expanded=True) as status:
+        timer = StageTimer("orders_normalized")
         try:
             log_message(logger_container, "🚀 Proceso iniciado para Órdenes (Modelo Normalizado).")
             log_message(logger_container, "Fase 1: EXTRACCIÓN...")
-            raw_data_nested = get_all_jumpseller_orders(status="paid")
+            raw_data_nested = get_jumpseller_orders_snapshot(status="paid", force_refresh=force_refresh, logger=lambda msg: log_message(logger_container, msg))
             if not raw_data_nested:
                 log_message(logger_container, "⚠️ No se encontraron órdenes."); status.update(label="Extracción fallida.", state="warning"); return
             raw_data = [item['order'] for item in raw_data_nested if 'order' in item and item.get('order') is not None]
             log_message(logger_container, f"✅ Se extrajeron {len(raw_data)} órdenes.")
             data_to_process = raw_data[:10] if is_test_run else raw_data
             if is_test_run: log_message(logger_container, f"🧪 MODO PRUEBA: Procesando {len(data_to_process)} registros.")
+            timer.lap("extract")
             log_message(logger_container, "Fase 2: TRANSFORMACIÓN...")
+            # La capa de servicios del backend solo se carga en este pipeline (usuarios existentes).
+            from backend.services import firestore_service
             existing_users = firestore_service.get_all_documents("users")
             existing_user_emails = {user.get('email') for user in existing_users if user.get('email')}
-            users, profiles, addresses, orders = transform.transform_orders(data_to_process, existing_user_emails, logger=lambda msg: log_message(logger_container, msg))
+            category_lookup = load.build_category_lookup(logger=lambda msg: log_message(logger_container, msg))
+            users, profiles, addresses, orders = transform.transform_orders(data_to_process, existing_user_emails, logger=lambda msg: log_message(logger_container, msg), category_lookup=category_lookup)
+            timer.lap("transform")
             log_message(logger_container, "Fase 3: CARGA...")
-            if users: load.load_data_to_firestore("users", users, "id", logger=lambda msg: log_message(logger_container, msg))
+            if users: load.load_data_to_firestore("users", users, "id", logger=lambda msg: log_message(logger_container, msg), skip_unchanged=skip_unchanged)
             if profiles: load.load_customer_profiles(profiles, logger=lambda msg: log_message(logger_container, msg))
             if addresses: load.load_addresses(addresses, logger=lambda msg: log_message(logger_container, msg))
-            if orders: load.load_data_to_firestore("orders", orders, "id", logger=lambda msg: log_message(logger_container, msg))
+            if orders:
+                load.load_data_to_firestore("orders", orders, "id", logger=lambda msg: log_message(logger_container, msg), skip_unchanged=skip_unchanged)
+                load.update_customer_rfm(orders, users, logger=lambda msg: log_message(logger_container, msg))
+            timer.lap("load"); timer.finish()
             status.update(label="¡ETL (Modelo Normalizado) completado!", state="complete")
             log_message(logger_container, "🎉 Proceso finalizado.")
         except Exception as e:
+            timer.finish(success=False)
             status.update(label="Ocurrió un error en el ETL", state="error"); st.exception(e)
 
-def run_orders_etl_customer_centric(is_test_run, logger_container):
+def run_orders_etl_customer_centric(is_test_run, logger_container, skip_unchanged=True, prune=False, force_refresh=False):
     """Orquesta el proceso ETL para Órdenes, creando documentos 'customer' denormalizados."""
     with st.status("Ejecutando ETL de Órdenes (Modelo Customer-Centric)...", expanded=True) as status:
+        timer = StageTimer("orders_customer_centric")
         try:
             log_message(logger_container, "🚀 Proceso iniciado para Órdenes (Modelo Customer-Centric).")
             log_message(logger_container, "Fase 1: EXTRACCIÓN...")
-            raw_data_nested = get_all_jumpseller_orders(status="paid")
+            raw_data_nested = get_jumpseller_orders_snapshot(status="paid", force_refresh=force_refresh, logger=lambda msg: log_message(logger_container, msg))
             if not raw_data_nested:
                 log_message(logger_container, "⚠️ No se encontraron órdenes."); status.update(label="Extracción fallida.", state="warning"); return
             raw_data = [item['order'] for item in raw_data_nested if 'order' in item and item.get('order') is not None]
@@ -104,60 +120,77 @@ def run_orders_etl_customer_centric(is_test_run, logger_container):
                 log_message(logger_container, f"✅ Se encontraron {len(data_to_process)} órdenes válidas para procesar.")
                 if not data_to_process:
                     log_message(logger_container, "🚫 No se encontraron órdenes válidas en el lote inicial."); status.update(label="Modo prueba fallido.", state="error"); return
+            timer.lap("extract")
             log_message(logger_container, "Fase 2: TRANSFORMACIÓN...")
-            customers, orders = transform.transform_orders_for_customer_model(data_to_process)
+            category_lookup = load.build_category_lookup(logger=lambda msg: log_message(logger_container, msg))
+            customers, orders = transform.transform_orders_for_customer_model(data_to_process, category_lookup)
             log_message(logger_container, f"✅ Transformación completada: {len(customers)} clientes únicos y {len(orders)} órdenes generadas.")
+            timer.lap("transform")
             log_message(logger_container, "Fase 3: CARGA...")
             if customers: load.load_customers_denormalized(customers, logger=lambda msg: log_message(logger_container, msg))
-            if orders: load.load_data_to_firestore("orders", orders, "id", logger=lambda msg: log_message(logger_container, msg))
+            if orders:
+                load.load_data_to_firestore("orders", orders, "id", logger=lambda msg: log_message(logger_container, msg), skip_unchanged=skip_unchanged)
+                load.update_customer_rfm(orders, customers, logger=lambda msg: log_message(logger_container, msg))
+            timer.lap("load"); timer.finish()
             status.update(label="¡ETL (Modelo Customer-Centric) completado!", state="complete")
             log_message(logger_container, "🎉 Proceso finalizado.")
         except Exception as e:
+            timer.finish(success=False)
             status.update(label="Ocurrió un error en el ETL", state="error"); st.exception(e)
 
-def run_products_etl_normalized(is_test_run, logger_container):
+def run_products_etl_normalized(is_test_run, logger_container, skip_unchanged=True, prune=False, force_refresh=False):
     """Orquesta el proceso ETL original para Productos, con subcolecciones."""
     with st.status("Ejecutando ETL de Servicios (Modelo Normalizado)...", expanded=True) as status:
+        timer = StageTimer("products_normalized")
         try:
             log_message(logger_container, "🚀 Proceso iniciado...")
             log_message(logger_container, "Fase 1: EXTRACCIÓN...")
-            raw_data_nested = get_all_jumpseller_products(status="available")
+            raw_data_nested = get_jumpseller_products_snapshot(status="available", force_refresh=force_refresh, logger=lambda msg: log_message(logger_container, msg))
             if not raw_data_nested: status.update(label="Extracción fallida.", state="warning"); return
             raw_data = [item['product'] for item in raw_data_nested if item.get('product')]
             log_message(logger_container, f"✅ Se extrajeron {len(raw_data)} productos.")
             data_to_process = raw_data[:10] if is_test_run else raw_data
             if is_test_run: log_message(logger_container, f"🧪 MODO PRUEBA: Procesando {len(data_to_process)} registros.")
+            timer.lap("extract")
             log_message(logger_container, "Fase 2: TRANSFORMACIÓN...")
             services, categories, variants, subcategories = transform.transform_products(data_to_process, logger=lambda msg: log_message(logger_container, msg))
+            timer.lap("transform")
             log_message(logger_container, "Fase 3: CARGA...")
-            if categories: load.load_data_to_firestore("categories", categories, "id", logger=lambda msg: log_message(logger_container, msg))
-            if services: load.load_data_to_firestore("services", services, "id", logger=lambda msg: log_message(logger_container, msg))
+            if categories: load.load_data_to_firestore("categories", categories, "id", logger=lambda msg: log_message(logger_container, msg), skip_unchanged=skip_unchanged)
+            if services: load.load_data_to_firestore("services", services, "id", logger=lambda msg: log_message(logger_container, msg), skip_unchanged=skip_unchanged)
             if variants: load.load_variants_to_firestore(variants, logger=lambda msg: log_message(logger_container, msg))
             if subcategories: load.load_subcategories_to_firestore(subcategories, logger=lambda msg: log_message(logger_container, msg))
+            timer.lap("load"); timer.finish()
             status.update(label="¡ETL (Modelo Normalizado) completado!", state="complete")
             log_message(logger_container, "🎉 Proceso finalizado.")
         except Exception as e:
+            timer.finish(success=False)
             status.update(label="Ocurrió un error en el ETL", state="error"); st.exception(e)
 
-def run_products_etl_hybrid(is_test_run, logger_container):
+def run_products_etl_hybrid(is_test_run, logger_container, skip_unchanged=True, prune=False, force_refresh=False):
     """Orquesta el nuevo proceso ETL para Servicios, con arreglos de referencias."""
     with st.status("Ejecutando ETL de Servicios (Modelo Híbrido)...", expanded=True) as status:
+        timer = StageTimer("products_hybrid")
         try:
             log_message(logger_container, "🚀 Proceso iniciado...")
             log_message(logger_container, "Fase 1: EXTRACCIÓN...")
-            raw_data_nested = get_all_jumpseller_products(status="available")
+            raw_data_nested = get_jumpseller_products_snapshot(status="available", force_refresh=force_refresh, logger=lambda msg: log_message(logger_container, msg))
             if not raw_data_nested: status.update(label="Extracción fallida.", state="warning"); return
             raw_data = [item['product'] for item in raw_data_nested if item.get('product')]
             log_message(logger_container, f"✅ Se extrajeron {len(raw_data)} productos.")
             data_to_process = raw_data[:10] if is_test_run else raw_data
             if is_test_run: log_message(logger_container, f"🧪 MODO PRUEBA: Procesando {len(data_to_process)} registros.")
+            timer.lap("extract")
             log_message(logger_container, "Fase 2: TRANSFORMACIÓN...")
             services, categories = transform.transform_products_for_service_model(data_to_process, logger=lambda msg: log_message(logger_container, msg))
+            timer.lap("transform")
             log_message(logger_container, "Fase 3: CARGA...")
-            load.load_services_hybrid(services, categories, logger=lambda msg: log_message(logger_container, msg))
+            load.load_services_hybrid(services, categories, logger=lambda msg: log_message(logger_container, msg), skip_unchanged=skip_unchanged, prune=prune and not is_test_run)
+            timer.lap("load"); timer.finish()
             status.update(label="¡ETL (Modelo Híbrido) completado!", state="complete")
             log_message(logger_container, "🎉 Proceso finalizado.")
         except Exception as e:
+            timer.finish(success=False)
             status.update(label="Ocurrió un error en el ETL", state="error"); st.exception(e)
 
 # --- Cuerpo del Dashboard ---
@@ -187,20 +220,26 @@ with st.form("etl_runner_form"):
 
     is_test_run = st.checkbox("Carga de prueba (primeros 10 registros)", value=True)
     if not is_test_run: st.warning("⚠️ **MODO REAL ACTIVADO:** Se cargarán TODOS los registros.", icon="🔥")
+    skip_unchanged = st.checkbox("Omitir registros sin cambios (huella de contenido)", value=True,
+                                 help="Solo se escriben los documentos nuevos o cuyo contenido cambió desde la última carga.")
+    force_refresh = st.checkbox("Forzar descarga desde Jumpseller", value=False,
+                                help="Por defecto se reutiliza la última instantánea local si no está obsoleta (ver etl/data/landing).")
+    prune = st.checkbox("Eliminar documentos que ya no existen en el origen", value=False,
+                        help="Solo aplica a categorías y servicios en cargas completas (no en modo prueba).")
 
     if st.form_submit_button("🚀 Iniciar Proceso de Carga", use_container_width=True, type="primary"):
         log_container.empty()
         
         if etl_process == "Sincronizar Categorías":
-            run_categories_etl(is_test_run, log_container)
+            run_categories_etl(is_test_run, log_container, skip_unchanged, prune, force_refresh)
         elif etl_process == "Órdenes (Modelo Normalizado: users/profiles)":
-            run_orders_etl_normalized(is_test_run, log_container)
+            run_orders_etl_normalized(is_test_run, log_container, skip_unchanged, prune, force_refresh)
         elif etl_process == "Órdenes (Modelo Desnormalizado: customers)":
-            run_orders_etl_customer_centric(is_test_run, log_container)
+            run_orders_etl_customer_centric(is_test_run, log_container, skip_unchanged, prune, force_refresh)
         elif etl_process == "Servicios (Modelo Normalizado: subcolecciones)":
-            run_products_etl_normalized(is_test_run, log_container)
+            run_products_etl_normalized(is_test_run, log_container, skip_unchanged, prune, force_refresh)
         elif etl_process == "Servicios (Modelo Híbrido: arreglos de refs)":
-            run_products_etl_hybrid(is_test_run, log_container)
+            run_products_etl_hybrid(is_test_run, log_container, skip_unchanged, prune, force_refresh)
 
 
 # ==========================================================
@@ -215,7 +254,7 @@ col1, col2 = st.columns(2)
 with col1:
     if st.button("🔄 Actualizar solo variantes y preguntas (prueba 10 servicios)", type="primary", use_container_width=True, key="update_variants_questions_test"):
         st.info("Actualizando solo los campos 'variants' y 'questions' en los primeros 10 servicios...")
-        raw_data_nested = get_all_jumpseller_products(status="available")
+        raw_data_nested = get_jumpseller_products_snapshot(status="available")
         raw_data = [item['product'] for item in raw_data_nested if item.get('product')]
         from etl.modules.transform import transform_product_to_service_model
         from backend.services.firestore_service import update_document
@@ -230,7 +269,7 @@ with col1:
 
     if st.button("🔄 Actualizar variantes y preguntas en TODOS los servicios", type="primary", use_container_width=True, key="update_variants_questions_all"):
         st.info("Actualizando solo los campos 'variants' y 'questions' en TODOS los servicios...")
-        raw_data_nested = get_all_jumpseller_products(status="available")
+        raw_data_nested = get_jumpseller_products_snapshot(status="available")
         raw_data = [item['product'] for item in raw_data_nested if item.get('product')]
         from etl.modules.transform import transform_product_to_service_model
         from backend.services.firestore_service import update_document, get_document
@@ -262,6 +301,15 @@ with col1:
         else:
             st.error("Ocurrió un error al iniciar el proceso.")
 
+    if st.button("🏷️ Completar categorías en ítems de órdenes",
+                 help="Escribe 'categoryId' y 'categoryName' en los ítems de las órdenes ya cargadas ('orders' y 'pedidos'), usando el catálogo actual.",
+                 type="secondary", use_container_width=True, key="backfill_item_categories"):
+        with st.status("Completando categorías en ítems de órdenes...", expanded=True) as backfill_status:
+            category_lookup = load.build_category_lookup(logger=st.write)
+            for collection_name in ("orders", "pedidos"):
+                load.backfill_order_item_categories(collection_name, category_lookup=category_lookup, logger=st.write)
+            backfill_status.update(label="Backfill de categorías completado.", state="complete")
+
 with col2:
     if st.button("🗑️ Limpiar Colección de Categorías", 
                  help="Elimina TODOS los documentos de la colección 'categories'. Útil antes de una resincronización completa.",
@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 from pathlib import Path
 import sys
-from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
 
 # --- Patrón de Importación y Autenticación ---
 project_root = Path(__file__).resolve().parents[2]
@@ -52,6 +51,8 @@ with tab_orders:
                 st.session_state.orders_df = pd.DataFrame()
 
     if 'orders_df' in st.session_state and not st.session_state.orders_df.empty:
+        # st_aggrid solo se carga cuando hay órdenes que mostrar en la grilla.
+        from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
         gb = GridOptionsBuilder.from_dataframe(st.session_state.orders_df)
         cell_button_renderer = JsCode("""
             class BtnCellRenderer {
@@ -1,7 +1,6 @@
 # dashboard/pages/conversion.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from dashboard.base_dashboard import BaseDashboard
 from dashboard.styles import metric_card, COLOR_PRIMARY, COLOR_SUCCESS, COLOR_WARNING, COLOR_INFO
 
@@ -54,6 +53,8 @@ class ConversionDashboard(BaseDashboard):
         st.markdown("<br>", unsafe_allow_html=True)
 
     def render_visualizations(self) -> None:
+        # plotly se carga al dibujar los gráficos, después de que las tarjetas ya se muestran.
+        import plotly.express as px
         st.subheader("Tendencia de Conversión por Servicio")
         trend_data = self.data.get('conversion_trend', {})
         if trend_data:
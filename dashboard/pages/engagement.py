@@ -1,7 +1,6 @@
 # dashboard/pages/engagement.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from typing import Dict, List
 
 # --- Importaciones de Módulos del Proyecto ---
@@ -43,6 +42,7 @@ class EngagementDashboard(BaseDashboard):
         if not payment_dist:
             st.info("ℹ️ No hay datos de métodos de pago en este período."); return
         df_payment = pd.DataFrame(list(payment_dist.items()), columns=['Método', 'Cantidad'])
+        import plotly.express as px
         fig = px.pie(df_payment, names='Método', values='Cantidad', hole=.4, color_discrete_sequence=px.colors.sequential.Teal)
         fig.update_layout(margin=dict(l=0, r=0, t=40, b=0), legend_title_text='Métodos de Pago')
         fig.update_traces(textposition='inside', textinfo='percent+label')
@@ -61,6 +61,7 @@ class EngagementDashboard(BaseDashboard):
         # --- CAMBIO: Las columnas ahora son 'name' y 'sales' ---
         df_top = pd.DataFrame(top_categories).sort_values('sales', ascending=True)
         
+        import plotly.express as px
         fig = px.bar(
             df_top,
             x='sales',
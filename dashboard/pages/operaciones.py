@@ -1,7 +1,6 @@
 # dashboard/pages/operaciones.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 
 # --- Importaciones de Módulos del Proyecto ---
 from dashboard.auth import check_login
@@ -110,6 +109,7 @@ with col2:
     if isinstance(orders_by_hour, list) and orders_by_hour and all(isinstance(x, (int, float)) for x in orders_by_hour):
         if sum(orders_by_hour) > 0:
             df_hour = pd.DataFrame({'Hora': range(len(orders_by_hour)), 'Nº de Órdenes': orders_by_hour})
+            import plotly.express as px
             fig = px.line(df_hour, x='Hora', y='Nº de Órdenes', title="Demanda Horaria", markers=True)
             fig.update_layout(xaxis_title="Hora del día (0-23)", yaxis_title="Cantidad de Órdenes")
             st.plotly_chart(fig, use_container_width=True)
@@ -122,6 +122,7 @@ with col2:
     exec_states = data.get('orders_by_exec_state', {})
     if isinstance(exec_states, dict) and exec_states:
         df_state = pd.DataFrame(list(exec_states.items()), columns=['Estado', 'Órdenes'])
+        import plotly.express as px
         fig2 = px.pie(df_state, names='Estado', values='Órdenes', color_discrete_sequence=px.colors.sequential.RdBu)
         st.plotly_chart(fig2, use_container_width=True)
     else:
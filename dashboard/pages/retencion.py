@@ -4,8 +4,7 @@ import pandas as pd
 # --- Importaciones de Módulos del Proyecto ---
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_kpis, get_basic_pedidos_kpis
-from dashboard.api_client import get_kpis
+from dashboard.api_client import get_kpis, get_basic_pedidos_kpis, to_dataframe
 from dashboard.styles import load_custom_css, metric_card, COLOR_PRIMARY, COLOR_SUCCESS
 # --- Configuración de Página ---
 st.set_page_config(page_title="Retención - LiliApp BI", layout="wide", initial_sidebar_state="expanded")
@@ -76,17 +75,11 @@ with col1:
     else:
         st.info("No hay datos de pedidos por comuna.")
 
-    st.subheader("🔥 Cohortes de Retención")
-    cohort_data = data.get('retention_cohorts', None)
-    if isinstance(cohort_data, pd.DataFrame) and not cohort_data.empty:
-        st.dataframe(cohort_data, use_container_width=True)
-    else:
-        st.info("No hay datos de cohortes disponibles.")
 
 with col2:
     st.subheader("🎯 Segmentación RFM")
-    rfm_data = data.get('rfm_segments', None)
-    if isinstance(rfm_data, pd.DataFrame) and not rfm_data.empty:
+    rfm_data = to_dataframe(data.get('rfm_segments'))
+    if not rfm_data.empty:
         import plotly.express as px
         fig_rfm = px.bar(rfm_data, x='Segmento', y='Clientes', color='Segmento', title="Distribución de Segmentos RFM")
         st.plotly_chart(fig_rfm, use_container_width=True)
@@ -100,7 +93,23 @@ with col2:
     else:
         st.info("No hay datos de referidos.")
 
-# --- Futuras Mejoras ---
+# --- Cohortes de Retención ---
 st.markdown("---")
-st.subheader("Próximamente: Análisis de Cohortes")
-st.info("Aquí se podría visualizar un mapa de calor mostrando el porcentaje de clientes de un mes de registro que vuelven a comprar en los meses siguientes.")
\ No newline at end of file
+st.subheader("🔥 Cohortes de Retención")
+st.caption("Porcentaje de clientes de cada cohorte (mes de su primer pedido) que vuelve a comprar N meses después.")
+cohorts = data.get('retention_cohorts') or {}
+if cohorts.get('cohorts'):
+    import plotly.express as px
+    df_retention = pd.DataFrame(cohorts['retention'], index=cohorts['cohorts'], columns=cohorts['offsets'], dtype=float)
+    y_labels = [f"{c} ({n})" for c, n in zip(cohorts['cohorts'], cohorts['sizes'])]
+    fig_cohorts = px.imshow(
+        df_retention.to_numpy(), x=[f"Mes {o}" for o in cohorts['offsets']], y=y_labels,
+        color_continuous_scale="Blues", zmin=0, zmax=100, text_auto=".0f", aspect="auto",
+        labels=dict(x="Meses desde el primer pedido", y="Cohorte (clientes)", color="% Retenido"),
+    )
+    fig_cohorts.update_layout(height=max(300, 28 * len(y_labels)))
+    st.plotly_chart(fig_cohorts, use_container_width=True)
+    with st.expander("Ver clientes activos por cohorte"):
+        st.dataframe(pd.DataFrame(cohorts['counts'], index=y_labels, columns=cohorts['offsets']), use_container_width=True)
+else:
+    st.info("No hay datos de cohortes disponibles.")
\ No newline at end of file
@@ -1,12 +1,11 @@
 # dashboard/pages/segmentacion.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 
 # --- Importaciones de Módulos del Proyecto ---
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_kpis
+from dashboard.api_client import get_kpis, get_segment_customers, to_dataframe
 from dashboard.styles import load_custom_css # Solo necesitamos el CSS aquí
 
 # --- Configuración de Página ---
@@ -74,10 +73,23 @@ else:
 
 # --- Segmentación RFM ---
 st.subheader("🎯 Segmentación RFM")
-rfm_segments = data.get('rfm_segments', pd.DataFrame())
-if isinstance(rfm_segments, pd.DataFrame) and not rfm_segments.empty:
+rfm_segments = to_dataframe(data.get('rfm_segments'))
+if not rfm_segments.empty:
+    import plotly.express as px
     fig_rfm = px.bar(rfm_segments, x='Segmento', y='Clientes', color='Segmento', title="Distribución de Segmentos RFM")
     st.plotly_chart(fig_rfm, use_container_width=True)
+    with st.expander("👀 Ver clientes por segmento"):
+        segment_options = rfm_segments.sort_values('Clientes', ascending=False)['Segmento'].tolist()
+        col_seg, col_page = st.columns([3, 1])
+        selected_segment = col_seg.selectbox("Segmento", options=segment_options, key="rfm_segment")
+        page = col_page.number_input("Página", min_value=1, value=1, step=1, key="rfm_page")
+        segment_page = get_segment_customers(selected_segment, start_date_str, end_date_str, page=int(page))
+        if segment_page and segment_page.get('customers'):
+            total_pages = -(-segment_page['total'] // segment_page['page_size'])
+            st.caption(f"{segment_page['total']:,} clientes · página {segment_page['page']} de {total_pages}")
+            st.dataframe(pd.DataFrame(segment_page['customers']), use_container_width=True, hide_index=True)
+        else:
+            st.info("No hay clientes en esta página.")
 else:
     st.info("No hay datos de RFM disponibles.")
 
@@ -113,7 +125,7 @@ if not any([
     region_dist,
     cohort_dist,
     ticket_dist,
-    isinstance(rfm_segments, pd.DataFrame) and not rfm_segments.empty,
+    not rfm_segments.empty,
     campaign_dist,
     referred_pct,
     churn_dist
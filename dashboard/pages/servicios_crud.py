@@ -7,7 +7,7 @@ import uuid
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
 from dashboard.api_client import (
-    get_services, get_categories, create_document,
+    get_services_df, get_categories_df, find_record, create_document,
     add_subcategory_to_service, add_variant_to_service
 )
 
@@ -19,10 +19,11 @@ render_menu()
 # --- Funciones de Utilidad ---
 @st.cache_data(ttl=60)
 def load_catalog_data():
-    """Carga servicios y categorías usando el api_client."""
-    services = get_services()
-    categories = get_categories()
-    return services or [], categories or []
+    """Carga servicios y categorías como DataFrames (Arrow IPC) usando el api_client."""
+    services = get_services_df()
+    categories = get_categories_df()
+    return (services if services is not None else pd.DataFrame(),
+            categories if categories is not None else pd.DataFrame())
 
 def refresh_data(toast_message=""):
     """Limpia el caché, muestra un mensaje y recarga la página."""
@@ -36,12 +37,19 @@ st.markdown("Administra servicios, categorías y sus componentes anidados.")
 
 services_data, categories_data = load_catalog_data()
 
-if not categories_data and not services_data:
+if categories_data.empty and services_data.empty:
     st.warning("No se pudieron cargar los datos del catálogo. Revisa la conexión con el backend."); st.stop()
 
 # --- Diccionarios de Mapeo ---
-category_map = {str(cat['id']): cat.get('name') for cat in categories_data}
-service_map = {str(srv['id']): srv.get('name') for srv in services_data}
+def _name_map(df: pd.DataFrame) -> dict:
+    """{id: nombre} de un listado del catálogo."""
+    if df.empty:
+        return {}
+    names = df['name'] if 'name' in df else pd.Series(None, index=df.index, dtype=object)
+    return dict(zip(df['id'].astype(str), names.where(names.notna(), None)))
+
+category_map = _name_map(categories_data)
+service_map = _name_map(services_data)
 
 # --- Definición de Pestañas (Tabs) ---
 tab_services, tab_categories, tab_components = st.tabs(["📝 Servicios", "🗂️ Categorías", "🧬 Componentes"])
@@ -72,8 +80,8 @@ with tab_services:
 
     st.markdown("---")
     st.header("Lista de Servicios Existentes")
-    if services_data:
-        df_services = pd.DataFrame(services_data)
+    if not services_data.empty:
+        df_services = services_data.copy()
         df_services['categoryName'] = df_services['category'].apply(lambda cat: category_map.get(str(cat.get('id'))) if isinstance(cat, dict) and cat.get('id') else "Sin Categoría")
         display_columns = ["id", "name", "categoryName", "price", "status"]
         st.dataframe(df_services[display_columns], use_container_width=True, hide_index=True)
@@ -98,9 +106,8 @@ with tab_categories:
     
     st.markdown("---")
     st.header("Lista de Categorías Existentes")
-    if categories_data:
-        df_categories = pd.DataFrame(categories_data)
-        st.dataframe(df_categories[['id', 'name']], column_config={"id": "ID", "name": "Nombre"}, use_container_width=True, hide_index=True)
+    if not categories_data.empty:
+        st.dataframe(categories_data[['id', 'name']], column_config={"id": "ID", "name": "Nombre"}, use_container_width=True, hide_index=True)
     else:
         st.info("No hay categorías creadas.")
     # --- FIN DEL CÓDIGO RESTAURADO ---
@@ -118,7 +125,7 @@ with tab_components:
         )
     
         if selected_service_id:
-            selected_service = next((s for s in services_data if str(s['id']) == selected_service_id), None)
+            selected_service = find_record(services_data, selected_service_id)
             
             if selected_service:
                 st.markdown(f"### Gestionando: **{selected_service.get('name', '')}**")
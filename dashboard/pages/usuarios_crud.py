@@ -6,7 +6,7 @@ import uuid
 # --- Importaciones ---
 from dashboard.auth import check_login
 from dashboard.menu import render_menu
-from dashboard.api_client import get_customers, update_customer_fields, add_address, update_address
+from dashboard.api_client import get_customers_df, find_record, update_customer_fields, add_address, update_address
 
 # --- Configuración de Página ---
 st.set_page_config(page_title="Gestión de Clientes - LiliApp", layout="wide", initial_sidebar_state="expanded")
@@ -16,8 +16,9 @@ render_menu()
 # --- Funciones de Utilidad ---
 @st.cache_data(ttl=60)
 def load_customers_data():
-    """Carga todos los clientes usando el api_client."""
-    return get_customers() or []
+    """Carga todos los clientes como DataFrame (Arrow IPC) usando el api_client."""
+    customers = get_customers_df()
+    return customers if customers is not None else pd.DataFrame()
 
 def refresh_data(toast_message=""):
     if toast_message: st.toast(toast_message, icon="✅")
@@ -30,7 +31,7 @@ st.markdown("Administra la información de los clientes y sus direcciones anidad
 
 customers_data = load_customers_data()
 
-if not customers_data:
+if customers_data.empty:
     st.info("No hay clientes en la base de datos.")
     st.stop()
 
@@ -39,7 +40,9 @@ col1, col2 = st.columns([1, 2])
 
 with col1:
     st.subheader("Lista de Clientes")
-    customer_map = {c['id']: c.get('displayName', c.get('email', 'N/A')) for c in customers_data}
+    missing = pd.Series(None, index=customers_data.index, dtype=object)
+    labels = customers_data.get('displayName', missing).fillna(customers_data.get('email', missing)).fillna('N/A')
+    customer_map = dict(zip(customers_data['id'], labels))
     selected_customer_id = st.selectbox(
         "Selecciona un cliente:",
         options=[""] + list(customer_map.keys()),
@@ -48,7 +51,7 @@ with col1:
 
 with col2:
     if selected_customer_id:
-        selected_customer = next((c for c in customers_data if c['id'] == selected_customer_id), None)
+        selected_customer = find_record(customers_data, selected_customer_id)
         
         if selected_customer:
             st.subheader(f"Detalles de: {selected_customer.get('displayName', 'Cliente sin nombre')}")
@@ -0,0 +1,8 @@
+# etl/__main__.py
+"""Punto de entrada: python -m etl <pipeline> [opciones] (ver etl/cli.py)."""
+
+import sys
+
+from etl.cli import main
+
+sys.exit(main())
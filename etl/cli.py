@@ -0,0 +1,293 @@
+# etl/cli.py
+"""
+CLI del ETL sin Streamlit, para ejecutar las cargas desde cron o la terminal.
+
+    python -m etl categories
+    python -m etl orders-normalized --source jumpseller --force-refresh
+    python -m etl orders-customer --source file --input etl/data/source_orders.json --dry-run
+    python -m etl products-hybrid --concurrency 4 --batch-size 250 --prune
+
+Orígenes (--source):
+  - landing (por defecto): la última instantánea de etl/data/landing, sin red.
+  - jumpseller: la instantánea si está al día; si no, descarga desde Jumpseller
+    y guarda una nueva (--force-refresh fuerza la descarga).
+  - file: un archivo JSON (lista) o NDJSON (opcionalmente .gz), como los
+    fixtures de etl/data o los de benchmarks/synthetic_data.
+
+Los mensajes de progreso (y las trazas de las transformaciones) van a stderr y al terminar se imprime en
+stdout un resumen JSON de la ejecución. Con --dry-run se extrae y transforma
+sin leer ni escribir Firestore. Las dependencias pesadas (firebase_admin, bs4,
+el cliente de Jumpseller) se importan solo cuando la ejecución las necesita.
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from etl.modules import landing_zone
+from etl.modules.load import FIRESTORE_BATCH_LIMIT
+
+log = logging.getLogger("etl")
+
+# pipeline -> (recurso de la landing zone, clave que envuelve cada registro)
+PIPELINES = {
+    "categories": ("categories", "category"),
+    "orders-normalized": ("orders_paid", "order"),
+    "orders-customer": ("orders_paid", "order"),
+    "products-normalized": ("products_available", "product"),
+    "products-hybrid": ("products_available", "product"),
+}
+# Nombre del pipeline en las métricas del ETL (etl/modules/metrics.py), igual que en el panel de cargas.
+TIMER_NAMES = {
+    "categories": "categories",
+    "orders-normalized": "orders_normalized",
+    "orders-customer": "orders_customer_centric",
+    "products-normalized": "products_normalized",
+    "products-hybrid": "products_hybrid",
+}
+
+
+# ===================================================================
+# ===                          EXTRACCIÓN                         ===
+# ===================================================================
+
+def _read_file(path: str) -> List[Dict[str, Any]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            return json.load(f)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _fetch_from_jumpseller(resource: str) -> List[Dict[str, Any]]:
+    from backend.services import jumpseller_service
+    streams = {
+        "categories": jumpseller_service.stream_all_jumpseller_categories,
+        "orders_paid": lambda: jumpseller_service.stream_all_jumpseller_orders(status="paid"),
+        "products_available": lambda: jumpseller_service.stream_all_jumpseller_products(status="available"),
+    }
+    return [json.loads(line) for line in streams[resource]()]
+
+
+def extract(pipeline: str, args) -> List[Dict[str, Any]]:
+    resource, data_key = PIPELINES[pipeline]
+    if args.source == "file":
+        log.info(f"📄 Leyendo {args.input}...")
+        raw = _read_file(args.input)
+    elif args.source == "jumpseller":
+        raw = landing_zone.get_or_refresh(resource, lambda: _fetch_from_jumpseller(resource),
+                                          force_refresh=args.force_refresh, logger=log.info)
+    else:
+        raw = landing_zone.read_latest_snapshot(resource)
+        if raw is None:
+            raise RuntimeError(f"No hay instantánea local de '{resource}'. Usa --source jumpseller para descargarla.")
+        log.info(f"💾 Usando instantánea local de '{resource}' ({len(raw)} registros).")
+
+    records = [item[data_key] for item in raw or [] if isinstance(item, dict) and item.get(data_key)]
+    if pipeline == "orders-customer":
+        # El modelo de clientes necesita el ID del cliente en cada orden.
+        records = [order for order in records if isinstance(order.get("customer"), dict) and order["customer"].get("id")]
+    return records[:args.limit] if args.limit else records
+
+
+# ===================================================================
+# ===                   TRANSFORMACIÓN Y CARGA                    ===
+# ===================================================================
+
+def _init_firebase() -> None:
+    from backend.core import memory_firestore
+    if memory_firestore.is_enabled():
+        return
+    import firebase_admin
+    if not firebase_admin._apps:
+        # Credenciales por defecto de la aplicación (GOOGLE_APPLICATION_CREDENTIALS), como el panel de cargas.
+        firebase_admin.initialize_app()
+
+
+def _existing_user_emails(load) -> set:
+    db = load.get_db_client()
+    return {(doc.to_dict() or {}).get("email") for doc in db.collection("users").select(["email"]).stream()} - {None}
+
+
+def run_pipeline(pipeline: str, records: List[Dict[str, Any]], args, timer) -> Dict[str, Any]:
+    """Transforma y (salvo --dry-run) carga; devuelve los conteos transformados y los resúmenes de carga."""
+    from etl.modules import load, transform
+
+    write = not args.dry_run
+    skip_unchanged = not args.no_skip_unchanged
+    prune = args.prune and not args.limit
+    transformed, loaded = {}, {}
+
+    if pipeline == "categories":
+        categories = transform.transform_categories([{"category": c} for c in records], logger=log.info)
+        transformed = {"categories": len(categories)}
+        timer.lap("transform")
+        if write and categories:
+            loaded["categories"] = load.load_data_to_firestore("categories", categories, "id", logger=log.info, merge=True,
+                                                               skip_unchanged=skip_unchanged, prune=prune)
+
+    elif pipeline == "orders-normalized":
+        existing_emails = _existing_user_emails(load) if write else set()
+        category_lookup = load.build_category_lookup(logger=log.info) if write else None
+        users, profiles, addresses, orders = transform.transform_orders(records, existing_emails, logger=log.info,
+                                                                        category_lookup=category_lookup)
+        transformed = {"users": len(users), "customer_profiles": len(profiles), "addresses": len(addresses), "orders": len(orders)}
+        timer.lap("transform")
+        if write:
+            if users: loaded["users"] = load.load_data_to_firestore("users", users, "id", logger=log.info, skip_unchanged=skip_unchanged)
+            if profiles: load.load_customer_profiles(profiles, logger=log.info)
+            if addresses: load.load_addresses(addresses, logger=log.info)
+            if orders:
+                loaded["orders"] = load.load_data_to_firestore("orders", orders, "id", logger=log.info, skip_unchanged=skip_unchanged)
+                loaded["customer_rfm"] = load.update_customer_rfm(orders, users, logger=log.info)
+
+    elif pipeline == "orders-customer":
+        category_lookup = load.build_category_lookup(logger=log.info) if write else None
+        customers, orders = transform.transform_orders_for_customer_model(records, category_lookup)
+        transformed = {"customers": len(customers), "orders": len(orders)}
+        timer.lap("transform")
+        if write:
+            if customers: load.load_customers_denormalized(customers, logger=log.info)
+            if orders:
+                loaded["orders"] = load.load_data_to_firestore("orders", orders, "id", logger=log.info, skip_unchanged=skip_unchanged)
+                loaded["customer_rfm"] = load.update_customer_rfm(orders, customers, logger=log.info)
+
+    elif pipeline == "products-normalized":
+        services, categories, variants, subcategories = transform.transform_products(records, logger=log.info)
+        transformed = {"services": len(services), "categories": len(categories), "variants": len(variants),
+                       "subcategories": len(subcategories)}
+        timer.lap("transform")
+        if write:
+            if categories: loaded["categories"] = load.load_data_to_firestore("categories", categories, "id", logger=log.info, skip_unchanged=skip_unchanged)
+            if services: loaded["services"] = load.load_data_to_firestore("services", services, "id", logger=log.info, skip_unchanged=skip_unchanged)
+            if variants: load.load_variants_to_firestore(variants, logger=log.info)
+            if subcategories: load.load_subcategories_to_firestore(subcategories, logger=log.info)
+
+    elif pipeline == "products-hybrid":
+        services, categories = transform.transform_products_for_service_model(records, logger=log.info)
+        transformed = {"services": len(services), "categories": len(categories)}
+        timer.lap("transform")
+        if write:
+            loaded = load.load_services_hybrid(services, categories, logger=log.info, skip_unchanged=skip_unchanged, prune=prune)
+
+    return {"transformed": transformed, "loaded": loaded}
+
+
+class _NullTimer:
+    """StageTimer que no escribe métricas (simulaciones)."""
+
+    def __init__(self):
+        self._lap_started = time.perf_counter()
+
+    def lap(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed, self._lap_started = now - self._lap_started, now
+        return elapsed
+
+    def finish(self, success: bool = True) -> None:
+        pass
+
+
+class _RecordingTimer:
+    """Envuelve un timer y guarda la duración de cada etapa para el resumen."""
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.stages: Dict[str, float] = {}
+
+    def lap(self, stage: str) -> float:
+        elapsed = self.timer.lap(stage)
+        self.stages[stage] = round(elapsed, 3)
+        return elapsed
+
+    def finish(self, success: bool = True) -> None:
+        self.timer.finish(success)
+
+
+def run(args) -> Dict[str, Any]:
+    started = time.perf_counter()
+    summary: Dict[str, Any] = {
+        "pipeline": args.pipeline, "source": args.source, "dry_run": args.dry_run,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "batch_size": args.batch_size, "concurrency": args.concurrency,
+    }
+    if args.dry_run:
+        timer = _RecordingTimer(_NullTimer())
+    else:
+        from etl.modules.metrics import StageTimer
+        timer = _RecordingTimer(StageTimer(TIMER_NAMES[args.pipeline]))
+
+    try:
+        if not args.dry_run:
+            from etl.modules import load
+            load.configure_writes(batch_size=args.batch_size, concurrency=args.concurrency)
+            _init_firebase()
+        records = extract(args.pipeline, args)
+        summary["extracted"] = len(records)
+        timer.lap("extract")
+        if records:
+            summary.update(run_pipeline(args.pipeline, records, args, timer))
+            if not args.dry_run:
+                timer.lap("load")
+        else:
+            log.warning("⚠️ No hay registros para procesar.")
+        timer.finish()
+        summary["success"] = True
+    except Exception as e:
+        log.exception("❌ Error en el ETL")
+        timer.finish(success=False)
+        summary.update(success=False, error=f"{type(e).__name__}: {e}")
+
+    summary["stages"] = timer.stages
+    summary["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m etl", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pipeline", choices=sorted(PIPELINES))
+    parser.add_argument("--source", choices=["landing", "jumpseller", "file"], default="landing")
+    parser.add_argument("--input", help="Archivo JSON/NDJSON de origen (con --source file).")
+    parser.add_argument("--force-refresh", action="store_true", help="Con --source jumpseller, descarga aunque la instantánea esté al día.")
+    parser.add_argument("--limit", type=int, help="Procesa solo los primeros N registros (como el modo prueba del panel).")
+    parser.add_argument("--dry-run", action="store_true", help="Extrae y transforma sin tocar Firestore.")
+    parser.add_argument("--batch-size", type=int, default=FIRESTORE_BATCH_LIMIT, help=f"Operaciones por WriteBatch (1-{FIRESTORE_BATCH_LIMIT}).")
+    parser.add_argument("--concurrency", type=int, default=1, help="Lotes (o transacciones de clientes) en paralelo.")
+    parser.add_argument("--no-skip-unchanged", action="store_true", help="Escribe todos los registros aunque su huella no haya cambiado.")
+    parser.add_argument("--prune", action="store_true",
+                        help="Elimina categorías/servicios que ya no están en el origen (se ignora con --limit).")
+    parser.add_argument("--summary-file", help="Guarda también el resumen JSON en este archivo.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Solo advertencias y errores en stderr.")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.source == "file" and not args.input:
+        parser.error("--source file requiere --input")
+    if not 1 <= args.batch_size <= FIRESTORE_BATCH_LIMIT or args.concurrency < 1:
+        parser.error(f"--batch-size debe estar entre 1 y {FIRESTORE_BATCH_LIMIT} y --concurrency ser al menos 1")
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    # Las transformaciones imprimen trazas de depuración con print(): se desvían a
+    # stderr (o se descartan con --quiet) para que stdout quede solo con el resumen JSON.
+    with contextlib.redirect_stdout(io.StringIO() if args.quiet else sys.stderr):
+        summary = run(args)
+    output = json.dumps(summary, ensure_ascii=False, indent=2, default=str)
+    print(output)
+    if args.summary_file:
+        with open(args.summary_file, "w", encoding="utf-8") as f:
+            f.write(output)
+    return 0 if summary["success"] else 1
@@ -1,19 +1,42 @@
 """
 Script de auditoría para comparar la colección 'pedidos' de Firestore con los pedidos originales de Jumpseller.
+
+Incluye dos modos:
+- Auditoría pedido a pedido (`auditoria_pedidos`), pensada para revisar casos puntuales.
+- Reconciliación masiva (`reconciliar_pedidos`), que pagina Jumpseller en paralelo, cruza
+  ambos orígenes en memoria por ID y compara huellas (hashes) canónicas por registro.
+
+Las llamadas a Jumpseller pasan por `jumpseller_service` (credenciales de `settings`,
+reintentos y métricas) y la descarga masiva se guarda en la landing zone.
 """
 
+import hashlib
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
 import firebase_admin
 from firebase_admin import credentials, firestore
 import requests
 
+from backend.services import jumpseller_service
+from etl.modules import landing_zone
+from etl.modules.transform import transform_single_order
+
 # Inicializar Firebase
 cred = credentials.Certificate('serviceAccountKey.json')
 firebase_admin.initialize_app(cred)
 db = firestore.client()
 
-# Configuración Jumpseller
-JUMPSELLER_API_URL = 'https://api.jumpseller.com/v1/orders/'
-JUMPSELLER_API_KEY = 'TU_API_KEY_AQUI'  # Reemplaza por tu API Key
+# Configuración de la reconciliación masiva
+PAGE_SIZE = 100
+MAX_WORKERS = 4
+# Instantánea con las órdenes de todos los estados (el ETL solo guarda 'orders_paid').
+LANDING_RESOURCE = "orders_all"
+REPORTS_DIR = Path(__file__).resolve().parent.parent / "data" / "reconciliacion"
 
 
 def get_pedidos_firestore():
@@ -26,11 +49,10 @@ def get_pedidos_firestore():
 
 def get_jumpseller_order(order_id):
     """Obtiene el pedido original de Jumpseller usando el ID."""
-    url = f"{JUMPSELLER_API_URL}{order_id}.json?api_key={JUMPSELLER_API_KEY}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    return None
+    try:
+        return jumpseller_service.get_orders(order_id=order_id)
+    except requests.exceptions.RequestException:
+        return None
 
 
 def comparar_pedidos(pedido_firestore, pedido_jumpseller):
@@ -75,5 +97,206 @@ def auditoria_pedidos():
             print("  Sin diferencias relevantes.")
         print()
 
+
+# ===================================================================
+# ===               RECONCILIACIÓN MASIVA (BULK)                  ===
+# ===================================================================
+
+def _fetch_orders_page(page: int) -> List[Dict[str, Any]]:
+    """Una página de órdenes de todos los estados, tal como la entrega Jumpseller ({'order': {...}})."""
+    return [item for item in jumpseller_service.get_orders(limit=PAGE_SIZE, page=page, status=None) or []
+            if item.get("order")]
+
+
+def _download_all_orders() -> List[Dict[str, Any]]:
+    """
+    Descarga todas las órdenes paginando en paralelo. Si el conteo no está disponible,
+    avanza por tandas de páginas hasta encontrar una página incompleta.
+    """
+    total_pages = -(-jumpseller_service.get_resource_count("orders") // PAGE_SIZE)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        if total_pages:
+            return [item for page_items in executor.map(_fetch_orders_page, range(1, total_pages + 1))
+                    for item in page_items]
+
+        items, next_page = [], 1
+        while True:
+            results = list(executor.map(_fetch_orders_page, range(next_page, next_page + MAX_WORKERS)))
+            items.extend(item for page_items in results for item in page_items)
+            if any(len(page_items) < PAGE_SIZE for page_items in results):
+                return items
+            next_page += MAX_WORKERS
+
+
+def get_all_jumpseller_orders_bulk(force_refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Todas las órdenes de Jumpseller indexadas por ID (string). Se leen de la landing
+    zone y solo se descargan si la instantánea no existe, está obsoleta o se fuerza.
+    """
+    items = landing_zone.get_or_refresh(LANDING_RESOURCE, _download_all_orders, force_refresh=force_refresh) or []
+    return {str(item["order"]["id"]): item["order"] for item in items}
+
+
+def get_pedidos_firestore_por_id() -> Dict[str, Dict[str, Any]]:
+    """Lee la colección 'pedidos' una sola vez y la indexa por el ID de la orden de Jumpseller."""
+    pedidos = {}
+    for doc in db.collection('pedidos').stream():
+        pedido = doc.to_dict()
+        order_id = pedido.get('orderId') or pedido.get('id') or doc.id
+        pedidos[str(order_id)] = {**pedido, '__doc_id__': doc.id}
+    return pedidos
+
+
+def _normalizar_fecha(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        for fmt in ("%Y-%m-%d %H:%M:%S %Z", "%Y-%m-%d %H:%M:%S"):
+            try:
+                value = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            return value
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _normalizar_monto(value: Any) -> Optional[float]:
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        return None
+
+
+# Estados de orden de Jumpseller -> vocabulario de 'pedidos'. Solo se usa para comparar:
+# la colección 'orders' del ETL guarda el estado de Jumpseller tal cual.
+ORDER_STATUS_MAP = {
+    "paid": "completed",
+    "pending payment": "pending",
+    "canceled": "cancelled",
+    "cancelled": "cancelled",
+    "abandoned": "abandoned",
+    "refunded": "refunded",
+}
+
+
+def map_order_status(status: str) -> Optional[str]:
+    """Traduce el estado de Jumpseller ('Paid', 'Pending Payment', ...) al de 'pedidos'."""
+    if not status:
+        return None
+    key = str(status).strip().lower()
+    return ORDER_STATUS_MAP.get(key, key.replace(" ", "_"))
+
+
+def canonical_desde_firestore(pedido: Dict[str, Any]) -> Dict[str, Any]:
+    """Proyecta un pedido de Firestore a la forma canónica usada para comparar."""
+    payment = pedido.get('paymentDetails') or {}
+    address = pedido.get('serviceAddress') or {}
+    items = sorted(
+        (str(i.get('serviceId')), i.get('quantity'), _normalizar_monto(i.get('price')))
+        for i in pedido.get('items') or [] if isinstance(i, dict)
+    )
+    return {
+        'id': str(pedido.get('orderId') or pedido.get('id')),
+        'customerId': str(pedido.get('customerId') or pedido.get('userId')),
+        'total': _normalizar_monto(pedido.get('total')),
+        'status': str(pedido.get('status') or '').lower(),
+        'createdAt': _normalizar_fecha(pedido.get('createdAt')),
+        # Sin medio de pago, los pedidos guardan None o 'Desconocido' según su origen.
+        'paymentType': None if payment.get('type') in (None, '', 'Desconocido') else payment.get('type'),
+        'commune': address.get('commune'),
+        'items': [list(item) for item in items],
+    }
+
+
+def canonical_desde_jumpseller(order: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Proyecta una orden de Jumpseller a la misma forma canónica que `canonical_desde_firestore`.
+    La orden pasa primero por la misma transformación del ETL (medio de pago, ítems,
+    fechas) y su estado se traduce al vocabulario de 'pedidos', así solo difieren los
+    datos, no el mapeo.
+    """
+    _, _, _, pedido = transform_single_order(order)
+    if pedido is None:
+        # Sin cliente la transformación descarta la orden: se compara solo lo que trae.
+        pedido = {'id': order.get('id'), 'total': order.get('total'), 'createdAt': order.get('created_at')}
+    return canonical_desde_firestore({**pedido, 'status': map_order_status(order.get('status'))})
+
+
+def huella_canonica(registro: Dict[str, Any]) -> str:
+    """Hash estable (independiente del orden de las claves) de un registro canónico."""
+    payload = json.dumps(registro, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _diff_canonico(canon_fs: Dict[str, Any], canon_js: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {
+        campo: {'firestore': canon_fs.get(campo), 'jumpseller': canon_js.get(campo)}
+        for campo in sorted(set(canon_fs) | set(canon_js))
+        if canon_fs.get(campo) != canon_js.get(campo)
+    }
+
+
+def reconciliar_pedidos(output_path: str = None, force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    Reconciliación masiva entre 'pedidos' (Firestore) y las órdenes de Jumpseller.
+
+    1. Descarga ambos orígenes completos (Jumpseller paginado en paralelo, o su
+       instantánea de la landing zone si está al día; 'force_refresh' la descarga).
+    2. Cruza por ID en memoria.
+    3. Compara primero la huella canónica y solo calcula el diff campo a campo
+       cuando las huellas difieren.
+
+    Escribe el detalle (un registro JSON por línea) en `output_path` y devuelve el resumen.
+    """
+    started_at = datetime.now(timezone.utc)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        jumpseller_future = executor.submit(get_all_jumpseller_orders_bulk, force_refresh)
+        firestore_future = executor.submit(get_pedidos_firestore_por_id)
+        ordenes_js = jumpseller_future.result()
+        pedidos_fs = firestore_future.result()
+
+    if output_path is None:
+        REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+        output_path = REPORTS_DIR / f"reconciliacion_{started_at.strftime('%Y%m%dT%H%M%SZ')}.ndjson"
+
+    faltantes = extras = con_diferencias = identicos = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for order_id in sorted(set(ordenes_js) | set(pedidos_fs)):
+            pedido, orden = pedidos_fs.get(order_id), ordenes_js.get(order_id)
+            if pedido is None:
+                faltantes += 1
+                detalle = {'id': order_id, 'resultado': 'faltante_en_firestore'}
+            elif orden is None:
+                extras += 1
+                detalle = {'id': order_id, 'resultado': 'extra_en_firestore', 'doc_id': pedido['__doc_id__']}
+            else:
+                canon_fs, canon_js = canonical_desde_firestore(pedido), canonical_desde_jumpseller(orden)
+                if huella_canonica(canon_fs) == huella_canonica(canon_js):
+                    identicos += 1
+                    continue
+                con_diferencias += 1
+                detalle = {'id': order_id, 'resultado': 'con_diferencias', 'doc_id': pedido['__doc_id__'],
+                           'diferencias': _diff_canonico(canon_fs, canon_js)}
+            f.write(json.dumps(detalle, ensure_ascii=False, default=str) + "\n")
+
+    return {
+        'total_jumpseller': len(ordenes_js),
+        'total_firestore': len(pedidos_fs),
+        'faltantes_en_firestore': faltantes,
+        'extras_en_firestore': extras,
+        'con_diferencias': con_diferencias,
+        'identicos': identicos,
+        'duracion_segundos': round((datetime.now(timezone.utc) - started_at).total_seconds(), 2),
+        'detalle_path': str(output_path),
+    }
+
+
 if __name__ == "__main__":
-    auditoria_pedidos()
+    if "--masiva" in sys.argv:
+        print(json.dumps(reconciliar_pedidos(force_refresh="--refrescar" in sys.argv), indent=2, ensure_ascii=False))
+    else:
+        auditoria_pedidos()
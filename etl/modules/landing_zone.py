@@ -0,0 +1,203 @@
+# etl/modules/landing_zone.py
+"""
+Zona de aterrizaje (landing zone) para los extractos crudos de Jumpseller.
+
+Cada ejecución de extracción guarda una instantánea NDJSON comprimida con gzip,
+particionada por recurso y por ID de ejecución, junto a un manifiesto:
+
+    etl/data/landing/<recurso>/run_id=<run_id>/part-00000.ndjson.gz
+    etl/data/landing/<recurso>/run_id=<run_id>/_manifest.json
+    etl/data/landing/<recurso>/_latest.json      (puntero a la última ejecución)
+
+Las transformaciones, auditorías y páginas de mapeo leen la última instantánea
+desde disco y solo vuelven a la API cuando la instantánea está obsoleta.
+
+Retención: tras cada escritura exitosa se conservan las KEEP_RUNS ejecuciones
+más recientes del recurso y se borran las que superan MAX_RUN_AGE_SECONDS. La
+ejecución apuntada por '_latest.json' nunca se borra.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+LANDING_ROOT = Path(os.environ.get("LILIAPP_LANDING_DIR", Path(__file__).resolve().parent.parent / "data" / "landing"))
+# Antigüedad máxima (en segundos) antes de considerar obsoleta una instantánea.
+DEFAULT_MAX_AGE_SECONDS = 6 * 3600
+# Registros por archivo NDJSON dentro de una ejecución.
+RECORDS_PER_PART = 50_000
+# Retención de instantáneas por recurso (ver prune_snapshots).
+KEEP_RUNS = int(os.environ.get("LILIAPP_LANDING_KEEP_RUNS", 5))
+MAX_RUN_AGE_SECONDS = 30 * 24 * 3600
+
+
+def _resource_dir(resource: str) -> Path:
+    return LANDING_ROOT / resource
+
+
+def new_run_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def write_snapshot(resource: str, records: Iterable[Dict[str, Any]], run_id: str = None,
+                   source: str = "jumpseller") -> Dict[str, Any]:
+    """
+    Escribe una instantánea completa de un recurso y la marca como la más reciente.
+    El puntero '_latest.json' se actualiza al final, por lo que un lector nunca
+    ve una ejecución a medio escribir. Devuelve el manifiesto generado.
+    """
+    run_id = run_id or new_run_id()
+    run_dir = _resource_dir(resource) / f"run_id={run_id}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    parts, record_count, part_index = [], 0, 0
+    part_handle, part_hasher, part_records = None, None, 0
+
+    def _close_part():
+        if part_handle is not None:
+            part_handle.close()
+            parts[-1].update({"records": part_records, "sha256": part_hasher.hexdigest()})
+
+    for record in records:
+        if part_handle is None or part_records >= RECORDS_PER_PART:
+            _close_part()
+            part_name = f"part-{part_index:05d}.ndjson.gz"
+            parts.append({"file": part_name})
+            part_handle = gzip.open(run_dir / part_name, "wt", encoding="utf-8")
+            part_hasher, part_records = hashlib.sha256(), 0
+            part_index += 1
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        part_handle.write(line)
+        part_hasher.update(line.encode("utf-8"))
+        part_records += 1
+        record_count += 1
+    _close_part()
+
+    manifest = {
+        "resource": resource,
+        "run_id": run_id,
+        "source": source,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "record_count": record_count,
+        "parts": parts,
+    }
+    (run_dir / "_manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    latest_tmp = _resource_dir(resource) / "_latest.json.tmp"
+    latest_tmp.write_text(json.dumps({"run_id": run_id, "created_at": manifest["created_at"]}), encoding="utf-8")
+    os.replace(latest_tmp, _resource_dir(resource) / "_latest.json")
+    manifest["pruned_runs"] = prune_snapshots(resource)
+    return manifest
+
+
+def prune_snapshots(resource: str, keep_runs: int = None, max_age_seconds: float = None) -> List[str]:
+    """
+    Borra las ejecuciones antiguas del recurso: las que quedan fuera de las 'keep_runs'
+    más recientes y las de más de 'max_age_seconds'. Las ejecuciones sin manifiesto
+    (a medio escribir o interrumpidas) solo se borran por antigüedad, para no pisar
+    una escritura en curso. Devuelve los run_id eliminados.
+    """
+    keep_runs = KEEP_RUNS if keep_runs is None else keep_runs
+    max_age_seconds = MAX_RUN_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+    latest = get_latest_manifest(resource)
+    latest_run_id = latest["run_id"] if latest else None
+
+    # Fecha de una ejecución: la de su manifiesto (se escribe al terminar) o la del directorio.
+    written_at = {}
+    for run_dir in _resource_dir(resource).glob("run_id=*"):
+        if run_dir.is_dir():
+            manifest_path = run_dir / "_manifest.json"
+            written_at[run_dir] = (manifest_path if manifest_path.exists() else run_dir).stat().st_mtime
+    complete = sorted((run_dir for run_dir in written_at if (run_dir / "_manifest.json").exists()),
+                      key=written_at.get, reverse=True)
+
+    oldest_allowed = time.time() - max_age_seconds
+    expired = set(complete[keep_runs:]) | {run_dir for run_dir, mtime in written_at.items() if mtime < oldest_allowed}
+    removed = []
+    for run_dir in sorted(expired):
+        run_id = run_dir.name[len("run_id="):]
+        if run_id == latest_run_id:
+            continue
+        shutil.rmtree(run_dir, ignore_errors=True)
+        removed.append(run_id)
+    return removed
+
+
+def get_latest_manifest(resource: str) -> Optional[Dict[str, Any]]:
+    """Devuelve el manifiesto de la última instantánea del recurso, o None si no existe."""
+    latest_path = _resource_dir(resource) / "_latest.json"
+    if not latest_path.exists():
+        return None
+    run_id = json.loads(latest_path.read_text(encoding="utf-8"))["run_id"]
+    manifest_path = _resource_dir(resource) / f"run_id={run_id}" / "_manifest.json"
+    if not manifest_path.exists():
+        return None
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def iter_snapshot(resource: str, run_id: str = None) -> Iterable[Dict[str, Any]]:
+    """Itera los registros de una instantánea (por defecto, la última) sin cargarla entera en memoria."""
+    manifest = get_latest_manifest(resource) if run_id is None else json.loads(
+        (_resource_dir(resource) / f"run_id={run_id}" / "_manifest.json").read_text(encoding="utf-8"))
+    if manifest is None:
+        return
+    run_dir = _resource_dir(resource) / f"run_id={manifest['run_id']}"
+    for part in manifest["parts"]:
+        with gzip.open(run_dir / part["file"], "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def read_latest_snapshot(resource: str) -> Optional[List[Dict[str, Any]]]:
+    """Lee la última instantánea completa del recurso. Devuelve None si no hay ninguna."""
+    if get_latest_manifest(resource) is None:
+        return None
+    return list(iter_snapshot(resource))
+
+
+def snapshot_age_seconds(resource: str) -> Optional[float]:
+    manifest = get_latest_manifest(resource)
+    if manifest is None:
+        return None
+    created_at = datetime.fromisoformat(manifest["created_at"])
+    return (datetime.now(timezone.utc) - created_at).total_seconds()
+
+
+def is_stale(resource: str, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> bool:
+    age = snapshot_age_seconds(resource)
+    return age is None or age > max_age_seconds
+
+
+def get_or_refresh(resource: str, fetch: Callable[[], Optional[List[Dict[str, Any]]]],
+                   max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS, force_refresh: bool = False,
+                   logger: Callable[[str], None] = print) -> Optional[List[Dict[str, Any]]]:
+    """
+    Devuelve la última instantánea del recurso. Solo llama a 'fetch' (la API) cuando
+    no existe instantánea, cuando está obsoleta o cuando se fuerza la descarga.
+    Si la descarga falla se reutiliza la instantánea anterior, aunque esté obsoleta.
+    """
+    if not force_refresh and not is_stale(resource, max_age_seconds):
+        records = read_latest_snapshot(resource)
+        logger(f"💾 Usando instantánea local de '{resource}' ({len(records)} registros).")
+        return records
+
+    logger(f"🌐 Descargando '{resource}' desde el origen...")
+    records = fetch()
+    if records:
+        manifest = write_snapshot(resource, records)
+        logger(f"💾 Instantánea '{resource}' guardada (run_id={manifest['run_id']}, {manifest['record_count']} registros).")
+        if manifest["pruned_runs"]:
+            logger(f"🧹 {len(manifest['pruned_runs'])} instantáneas antiguas de '{resource}' eliminadas.")
+        return records
+
+    fallback = read_latest_snapshot(resource)
+    if fallback is not None:
+        logger(f"⚠️ La descarga de '{resource}' falló. Se usa la última instantánea disponible.")
+    return fallback
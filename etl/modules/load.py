@@ -1,50 +1,197 @@
-import streamlit as st
-from firebase_admin import firestore
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
+# firebase_admin y el Firestore en memoria se importan al usarse: el CLI del ETL
+# (python -m etl) no paga su importación en --help ni en las simulaciones.
+log = logging.getLogger(__name__)
 
 # --- HELPER FUNCTIONS ---
 def get_db_client():
+    from backend.core import memory_firestore
+    if memory_firestore.is_enabled():
+        return memory_firestore.get_client()
+    from firebase_admin import firestore
     return firestore.client()
 
+# ==========================================================
+# ===     HUELLAS DE CONTENIDO (DETECCIÓN DE CAMBIOS)    ===
+# ==========================================================
+# Cada colección cargada por el ETL mantiene un índice lateral en
+# '_etl_fingerprints' con el hash del último payload escrito por documento.
+# El índice se reparte en varios documentos (shards) para no acercarse al
+# límite de 1 MB por documento de Firestore.
+FINGERPRINT_COLLECTION = "_etl_fingerprints"
+FINGERPRINT_SHARDS = 16
+# Campos que cambian en cada ejecución (ej: datetime.now()) y no representan un cambio real.
+VOLATILE_FIELDS = {"updatedAt", "lastLoginAt"}
+# Máximo de operaciones que admite un WriteBatch de Firestore.
+FIRESTORE_BATCH_LIMIT = 500
+# Operaciones por lote y lotes confirmados en paralelo por _commit_writes (ver configure_writes).
+WRITE_BATCH_SIZE = FIRESTORE_BATCH_LIMIT
+WRITE_CONCURRENCY = 1
+
+def configure_writes(batch_size: int = None, concurrency: int = None):
+    """Ajusta el tamaño de lote (1-500) y la cantidad de lotes que se confirman en paralelo."""
+    global WRITE_BATCH_SIZE, WRITE_CONCURRENCY
+    if batch_size is not None:
+        if not 1 <= batch_size <= FIRESTORE_BATCH_LIMIT:
+            raise ValueError(f"El tamaño de lote debe estar entre 1 y {FIRESTORE_BATCH_LIMIT}.")
+        WRITE_BATCH_SIZE = batch_size
+    if concurrency is not None:
+        if concurrency < 1:
+            raise ValueError("La concurrencia debe ser al menos 1.")
+        WRITE_CONCURRENCY = concurrency
+
+def _strip_volatile(value):
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, (list, tuple)):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+def compute_fingerprint(item: dict) -> str:
+    """Hash estable del payload transformado, ignorando los campos volátiles."""
+    canonical = json.dumps(_strip_volatile(item), sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+def _fingerprint_shard(doc_id: str) -> int:
+    return int(hashlib.md5(doc_id.encode("utf-8")).hexdigest()[:4], 16) % FINGERPRINT_SHARDS
+
+def _fingerprint_shard_ref(db, collection_name: str, shard: int):
+    return db.collection(FINGERPRINT_COLLECTION).document(f"{collection_name}__{shard:02d}")
+
+def load_fingerprints(db, collection_name: str) -> dict:
+    """Lee el índice de huellas de una colección ({doc_id: hash}) en una sola llamada."""
+    refs = [_fingerprint_shard_ref(db, collection_name, shard) for shard in range(FINGERPRINT_SHARDS)]
+    fingerprints = {}
+    for snapshot in db.get_all(refs):
+        if snapshot.exists:
+            fingerprints.update(snapshot.to_dict().get("hashes", {}))
+    return fingerprints
+
+def clear_fingerprints(db, collection_name: str):
+    """
+    Borra el índice de huellas de una colección. Debe llamarse al vaciar la colección
+    fuera del ETL: si no, la siguiente carga omitiría los registros como "sin cambios".
+    """
+    batch = db.batch()
+    for shard in range(FINGERPRINT_SHARDS):
+        batch.delete(_fingerprint_shard_ref(db, collection_name, shard))
+    batch.commit()
+
+def save_fingerprints(db, collection_name: str, fingerprints: dict, dirty_ids: set):
+    """Reescribe solo los shards del índice que contienen documentos modificados."""
+    dirty_shards = {_fingerprint_shard(doc_id) for doc_id in dirty_ids}
+    if not dirty_shards:
+        return
+    shards = {shard: {} for shard in dirty_shards}
+    for doc_id, fingerprint in fingerprints.items():
+        shard = _fingerprint_shard(doc_id)
+        if shard in shards:
+            shards[shard][doc_id] = fingerprint
+    batch = db.batch()
+    for shard, hashes in shards.items():
+        batch.set(_fingerprint_shard_ref(db, collection_name, shard), {"collection": collection_name, "hashes": hashes})
+    batch.commit()
+
+def _commit_writes(db, writes: list):
+    """
+    Ejecuta las escrituras en lotes de hasta WRITE_BATCH_SIZE operaciones, con hasta
+    WRITE_CONCURRENCY lotes en vuelo. Cada escritura es una tupla (doc_ref, payload, merge);
+    payload=None significa borrar. Cada documento aparece una sola vez, así que el
+    orden entre lotes no importa.
+    """
+    def commit(chunk):
+        batch = db.batch()
+        for doc_ref, payload, merge in chunk:
+            if payload is None:
+                batch.delete(doc_ref)
+            else:
+                batch.set(doc_ref, payload, merge=merge)
+        batch.commit()
+
+    chunks = [writes[start:start + WRITE_BATCH_SIZE] for start in range(0, len(writes), WRITE_BATCH_SIZE)]
+    if WRITE_CONCURRENCY > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=WRITE_CONCURRENCY) as pool:
+            list(pool.map(commit, chunks))
+    else:
+        for chunk in chunks:
+            commit(chunk)
+
 # ==========================================================
 # ===         FUNCIONES DE CARGA GENÉRICAS               ===
 # ==========================================================
 
-def load_data_to_firestore(collection_name: str, data: list, id_field: str, logger=st.info, merge: bool = False):
+def load_data_to_firestore(collection_name: str, data: list, id_field: str, logger=log.info, merge: bool = False,
+                           skip_unchanged: bool = True, prune: bool = False) -> dict:
     """
     Carga una lista de diccionarios a una colección de nivel superior en Firestore.
     Usa el valor de 'id_field' como el ID del documento.
     Si merge=True, crea o actualiza el documento si ya existe (idempotente).
+    Si skip_unchanged=True, compara la huella de cada registro con la última cargada
+    y solo escribe los registros nuevos o modificados.
+    Si prune=True, elimina los documentos cargados previamente por el ETL que ya no
+    vienen en 'data' (usar solo con cargas completas, nunca en modo prueba). Con 'data'
+    vacío no se elimina nada, para no vaciar la colección ante una extracción fallida.
+
+    Devuelve un resumen con los conteos de documentos escritos, omitidos y eliminados.
     """
+    summary = {"written": 0, "skipped": 0, "deleted": 0}
     if not data:
         logger(f"🧘 No hay nuevos datos para cargar en '{collection_name}'.")
-        return
+        return summary
 
     db = get_db_client()
-    batch = db.batch()
-    
     logger(f"🚀 Procesando '{collection_name}'... {len(data)} registros.")
-    
-    # Esta función ya no necesita contar, la dejamos más simple
-    # para set (crear/sobrescribir) o set con merge (crear/actualizar)
+
+    # El índice se lee siempre: save_fingerprints reescribe shards completos y, sin él,
+    # borraría las huellas de los demás documentos de esos shards.
+    fingerprints = load_fingerprints(db, collection_name)
+    writes, dirty_ids, seen_ids = [], set(), set()
+
     for item in data:
-        doc_id = str(item.get(id_field))
-        if not doc_id:
+        raw_id = item.get(id_field)
+        if raw_id is None or raw_id == "":
             logger(f"⚠️ Saltando registro en '{collection_name}' por falta de ID.")
             continue
-        
-        doc_ref = db.collection(collection_name).document(doc_id)
-        batch.set(doc_ref, item, merge=merge)
+        doc_id = str(raw_id)
+        seen_ids.add(doc_id)
+
+        fingerprint = compute_fingerprint(item)
+        if skip_unchanged and fingerprints.get(doc_id) == fingerprint:
+            summary["skipped"] += 1
+            continue
+
+        writes.append((db.collection(collection_name).document(doc_id), item, merge))
+        fingerprints[doc_id] = fingerprint
+        dirty_ids.add(doc_id)
+        summary["written"] += 1
+
+    if prune:
+        for doc_id in set(fingerprints) - seen_ids:
+            writes.append((db.collection(collection_name).document(doc_id), None, False))
+            del fingerprints[doc_id]
+            dirty_ids.add(doc_id)
+            summary["deleted"] += 1
+
+    _commit_writes(db, writes)
+    save_fingerprints(db, collection_name, fingerprints, dirty_ids)
 
-    batch.commit()
-    
     action = "creados/actualizados" if merge else "creados/sobrescritos"
-    logger(f"✅ Carga de {len(data)} registros para '{collection_name}' completada ({action}).")
+    logger(
+        f"✅ Carga de '{collection_name}' completada ({action}). "
+        f"✍️ Escritos: {summary['written']} | ⏭️ Sin cambios: {summary['skipped']} | 🗑️ Eliminados: {summary['deleted']}"
+    )
+    return summary
 
 # ==========================================================
 # ===         FUNCIONES DE CARGA ESPECÍFICAS             ===
 # ==========================================================
 
-def load_customer_profiles(profiles_data: list, logger=st.info):
+def load_customer_profiles(profiles_data: list, logger=log.info):
     """
     Carga datos de perfiles de cliente en la subcolección 
     users/{userId}/customer_profiles.
@@ -54,7 +201,7 @@ def load_customer_profiles(profiles_data: list, logger=st.info):
         return
 
     db = get_db_client()
-    batch = db.batch()
+    writes = []
     
     logger(f"🚀 Procesando 'customer_profiles'... {len(profiles_data)} registros.")
     
@@ -68,12 +215,12 @@ def load_customer_profiles(profiles_data: list, logger=st.info):
             continue
             
         doc_ref = db.collection('users').document(user_id).collection('customer_profiles').document(profile_id)
-        batch.set(doc_ref, profile_data)
+        writes.append((doc_ref, profile_data, False))
 
-    batch.commit()
+    _commit_writes(db, writes)
     logger(f"✅ Carga de {len(profiles_data)} perfiles completada.")
 
-def load_addresses(addresses_data: list, logger=st.info):
+def load_addresses(addresses_data: list, logger=log.info):
     """
     Carga direcciones en la subcolección anidada
     users/{userId}/customer_profiles/main/addresses.
@@ -83,7 +230,7 @@ def load_addresses(addresses_data: list, logger=st.info):
         return
 
     db = get_db_client()
-    batch = db.batch()
+    writes = []
     
     logger(f"🚀 Procesando 'addresses'... {len(addresses_data)} registros.")
 
@@ -99,19 +246,19 @@ def load_addresses(addresses_data: list, logger=st.info):
         # Asumimos que el profileId es el mismo que el userId
         profile_id = user_id
         doc_ref = db.collection('users').document(user_id).collection('customer_profiles').document(profile_id).collection('addresses').document(address_id)
-        batch.set(doc_ref, address_data)
+        writes.append((doc_ref, address_data, False))
         
-    batch.commit()
+    _commit_writes(db, writes)
     logger(f"✅ Carga de {len(addresses_data)} direcciones completada.")
 
-def load_variants_to_firestore(variants_data: list, logger=st.info):
+def load_variants_to_firestore(variants_data: list, logger=log.info):
     """Carga variantes en la subcolección services/{serviceId}/variants."""
     if not variants_data:
         logger("🧘 No hay nuevas variantes para cargar.")
         return
 
     db = get_db_client()
-    batch = db.batch()
+    writes = []
     
     logger(f"🚀 Procesando 'variants'... {len(variants_data)} registros.")
 
@@ -124,19 +271,19 @@ def load_variants_to_firestore(variants_data: list, logger=st.info):
             continue
 
         doc_ref = db.collection('services').document(service_id).collection('variants').document(variant_id)
-        batch.set(doc_ref, variant_data)
+        writes.append((doc_ref, variant_data, False))
         
-    batch.commit()
+    _commit_writes(db, writes)
     logger(f"✅ Carga de {len(variants_data)} variantes completada.")
 
-def load_subcategories_to_firestore(subcategories_data: list, logger=st.info):
+def load_subcategories_to_firestore(subcategories_data: list, logger=log.info):
     """Carga subcategorías en la subcolección services/{serviceId}/subcategories."""
     if not subcategories_data:
         logger("🧘 No hay nuevas subcategorías para cargar.")
         return
 
     db = get_db_client()
-    batch = db.batch()
+    writes = []
 
     logger(f"🚀 Procesando 'subcategories'... {len(subcategories_data)} registros.")
 
@@ -149,15 +296,18 @@ def load_subcategories_to_firestore(subcategories_data: list, logger=st.info):
             continue
 
         doc_ref = db.collection('services').document(service_id).collection('subcategories').document(subcat_id)
-        batch.set(doc_ref, subcat_data)
+        writes.append((doc_ref, subcat_data, False))
         
-    batch.commit()
+    _commit_writes(db, writes)
     logger(f"✅ Carga de {len(subcategories_data)} subcategorías completada.")
 
 
-@firestore.transactional
 def _update_customer_in_transaction(transaction, doc_ref, new_data):
-    """Función transaccional para actualizar o crear un documento de cliente."""
+    """
+    Actualiza o crea un documento de cliente dentro de 'transaction'.
+    Se envuelve con firestore.transactional al usarse (ver load_customers_denormalized).
+    """
+    from firebase_admin import firestore
     snapshot = doc_ref.get(transaction=transaction)
     
     if snapshot.exists:
@@ -190,7 +340,7 @@ def _update_customer_in_transaction(transaction, doc_ref, new_data):
         transaction.set(doc_ref, new_data)
         return "created"
 
-def load_customers_denormalized(customers_data: list, logger=st.info):
+def load_customers_denormalized(customers_data: list, logger=log.info):
     """
     Carga o actualiza documentos en la colección 'customers' de forma segura,
     fusionando el arreglo de direcciones.
@@ -199,25 +349,27 @@ def load_customers_denormalized(customers_data: list, logger=st.info):
         logger("🧘 No hay nuevos datos de clientes para cargar.")
         return
 
+    from firebase_admin import firestore
+    upsert_customer = firestore.transactional(_update_customer_in_transaction)
+
     db = get_db_client()
     logger(f"🚀 Procesando 'customers'... {len(customers_data)} registros únicos.")
     
-    created_count, updated_count = 0, 0
-    
-    for customer in customers_data:
+    def upsert(customer):
         customer_id = str(customer.get("id"))
         if not customer_id:
             logger("⚠️ Saltando registro de cliente por falta de ID.")
-            continue
-        
+            return None
         doc_ref = db.collection('customers').document(customer_id)
-        transaction = db.transaction()
-        result = _update_customer_in_transaction(transaction, doc_ref, customer)
-        
-        if result == "created":
-            created_count += 1
-        elif result == "updated":
-            updated_count += 1
+        return upsert_customer(db.transaction(), doc_ref, customer)
+
+    # Cada cliente es una transacción independiente: con WRITE_CONCURRENCY > 1 se ejecutan en paralelo.
+    if WRITE_CONCURRENCY > 1:
+        with ThreadPoolExecutor(max_workers=WRITE_CONCURRENCY) as pool:
+            results = list(pool.map(upsert, customers_data))
+    else:
+        results = [upsert(customer) for customer in customers_data]
+    created_count, updated_count = results.count("created"), results.count("updated")
     
     summary = (
         f"Resumen de Carga para 'customers':\n"
@@ -226,41 +378,178 @@ def load_customers_denormalized(customers_data: list, logger=st.info):
     )
     logger(summary)
 
+# ==========================================================
+# ===        TABLA RFM PRECALCULADA POR CLIENTE           ===
+# ==========================================================
+# 'customer_rfm' guarda por cliente la fecha del primer y último pedido, la
+# cantidad de pedidos y el gasto total de sus órdenes en 'orders'. El backend solo
+# vuelve a puntuar estos agregados en lugar de recorrer todos los pedidos en cada
+# consulta. El nombre de la colección y los estados que cuentan como compra los
+# define rfm_service.
+
+def _as_utc(value):
+    """Las fechas del transform son UTC sin zona; las leídas de Firestore traen zona."""
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+def _order_key(created_at, order_id: str) -> tuple:
+    """Orden total de las órdenes: fecha y, en empate, ID (numérico si lo es)."""
+    return (_as_utc(created_at), len(order_id), order_id)
+
+def _is_counted(order_id: str, created_at, current: dict) -> bool:
+    """
+    Si la orden ya está contabilizada en el documento 'current'. Los documentos guardan
+    como marca la última orden contada (lastOrderAt, lastOrderId): todo lo anterior ya
+    se sumó. Los documentos antiguos aún traen el arreglo 'orderIds' y se consultan por ID.
+    """
+    if "orderIds" in current:
+        return order_id in current["orderIds"]
+    if not current.get("lastOrderAt"):
+        return False
+    if not current.get("lastOrderId"):
+        return _as_utc(created_at) <= _as_utc(current["lastOrderAt"])
+    return _order_key(created_at, order_id) <= _order_key(current["lastOrderAt"], str(current["lastOrderId"]))
+
+def update_customer_rfm(orders_data: list, customers_data: list = None, logger=log.info) -> dict:
+    """
+    Actualiza de forma incremental la tabla 'customer_rfm' con las órdenes cargadas.
+    Cada documento recuerda la última orden contabilizada (no la lista de IDs, que
+    crecería sin límite hacia el máximo de 1 MiB por documento): volver a cargar las
+    mismas órdenes no duplica conteos ni montos. Una orden más antigua que esa marca
+    se considera ya contada; las cargas traen las órdenes pagadas completas, así que
+    solo quedaría fuera una orden pagada después de otra más reciente del cliente.
+    'customers_data' (clientes o usuarios con 'id' y 'email') es opcional y solo
+    aporta el email que se muestra en las muestras de segmentos.
+    """
+    from backend.services.rfm_service import RFM_COLLECTION, RFM_ORDER_STATUSES
+    summary = {"written": 0, "skipped": 0}
+    emails = {str(c.get("id")): c.get("email") for c in customers_data or [] if c.get("id")}
+
+    orders_by_customer = {}
+    for order in orders_data or []:
+        if order.get("status") not in RFM_ORDER_STATUSES:
+            continue
+        customer_id = order.get("customerId") or order.get("userId")
+        if not customer_id or not order.get("id") or not order.get("createdAt"):
+            continue
+        orders_by_customer.setdefault(str(customer_id), {})[str(order["id"])] = order
+
+    if not orders_by_customer:
+        logger(f"🧘 No hay órdenes pagadas para actualizar '{RFM_COLLECTION}'.")
+        return summary
+
+    from firebase_admin.firestore import SERVER_TIMESTAMP
+    db = get_db_client()
+    logger(f"🚀 Actualizando '{RFM_COLLECTION}'... {len(orders_by_customer)} clientes con órdenes.")
+    customer_ids = list(orders_by_customer)
+    writes = []
+    for start in range(0, len(customer_ids), FIRESTORE_BATCH_LIMIT):
+        refs = [db.collection(RFM_COLLECTION).document(cid) for cid in customer_ids[start:start + FIRESTORE_BATCH_LIMIT]]
+        for snapshot in db.get_all(refs):
+            customer_id = snapshot.id
+            current = snapshot.to_dict() if snapshot.exists else {}
+            if "orderIds" in current:
+                current["orderIds"] = set(current["orderIds"])
+            customer_orders = orders_by_customer[customer_id]
+            new_orders = [order for order_id, order in customer_orders.items()
+                          if not _is_counted(order_id, order["createdAt"], current)]
+            email = emails.get(customer_id) or current.get("email")
+            if not new_orders and email == current.get("email") and "orderIds" not in current:
+                summary["skipped"] += 1
+                continue
+
+            # Todas las órdenes cargadas del cliente (también las ya contadas) definen la nueva marca.
+            keys = [_order_key(order["createdAt"], order_id) for order_id, order in customer_orders.items()]
+            if current.get("lastOrderAt"):
+                keys.append(_order_key(current["lastOrderAt"], str(current.get("lastOrderId") or "")))
+            dates = [key[0] for key in keys] + ([_as_utc(current["firstOrderAt"])] if current.get("firstOrderAt") else [])
+            last_key = max(keys)
+            payload = {
+                "orderCount": current.get("orderCount", 0) + len(new_orders),
+                "totalSpend": current.get("totalSpend", 0) + sum(float(order.get("total") or 0) for order in new_orders),
+                "firstOrderAt": min(dates),
+                "lastOrderAt": last_key[0],
+                "lastOrderId": last_key[2] or current.get("lastOrderId"),
+                "email": email,
+                "updatedAt": SERVER_TIMESTAMP,
+            }
+            writes.append((snapshot.reference, payload, False))
+            summary["written"] += 1
+
+    _commit_writes(db, writes)
+    logger(f"✅ '{RFM_COLLECTION}' actualizada. ✍️ Escritos: {summary['written']} | ⏭️ Sin cambios: {summary['skipped']}")
+    return summary
+
+# ==========================================================
+# ===     CATEGORÍAS DESNORMALIZADAS EN ÍTEMS DE ÓRDENES  ===
+# ==========================================================
+
+def build_category_lookup(logger=log.info) -> dict:
+    """
+    Construye {serviceId: {"categoryId", "categoryName"}} leyendo 'services' y
+    'categories' una sola vez. Se pasa a las transformaciones de órdenes para
+    guardar la categoría de cada ítem sin consultar Firestore por orden.
+    """
+    db = get_db_client()
+    category_names = {doc.id: (doc.to_dict() or {}).get("name") for doc in db.collection("categories").select(["name"]).stream()}
+    lookup = {}
+    for doc in db.collection("services").select(["category", "categoryId"]).stream():
+        service = doc.to_dict() or {}
+        category = service.get("category")
+        category_id = str(category["id"]) if isinstance(category, dict) and category.get("id") else service.get("categoryId")
+        category_id = str(category_id) if category_id else None
+        lookup[doc.id] = {"categoryId": category_id, "categoryName": category_names.get(category_id) if category_id else None}
+    logger(f"🗂️ Catálogo de categorías cargado: {len(lookup)} servicios, {len(category_names)} categorías.")
+    return lookup
+
+def backfill_order_item_categories(collection_name: str = "orders", category_lookup: dict = None,
+                                   logger=log.info, dry_run: bool = False) -> dict:
+    """
+    Completa 'categoryId'/'categoryName' en los ítems de las órdenes ya cargadas.
+    Solo reescribe el campo 'items' de las órdenes cuyo valor cambia.
+    """
+    db = get_db_client()
+    category_lookup = category_lookup if category_lookup is not None else build_category_lookup(logger=logger)
+    summary = {"scanned": 0, "updated": 0}
+    writes = []
+    for doc in db.collection(collection_name).select(["items"]).stream():
+        summary["scanned"] += 1
+        items = (doc.to_dict() or {}).get("items") or []
+        new_items = []
+        for item in items:
+            if not isinstance(item, dict):
+                new_items.append(item)
+                continue
+            category = category_lookup.get(str(item.get("serviceId"))) or {}
+            new_items.append({**item, "categoryId": category.get("categoryId"), "categoryName": category.get("categoryName")})
+        if new_items != items:
+            writes.append((doc.reference, {"items": new_items}, True))
+            summary["updated"] += 1
+    if not dry_run:
+        _commit_writes(db, writes)
+    mode = " (simulación)" if dry_run else ""
+    logger(f"✅ Backfill de categorías en '{collection_name}'{mode}: {summary['scanned']} órdenes revisadas, {summary['updated']} actualizadas.")
+    return summary
+
 # ==========================================================
 # ===         FUNCIONES DE CARGA HÍBRIDA DE SERVICIOS     ===
 # ==========================================================
-def load_services_hybrid(services_data: list, categories_data: list, logger=st.info):
+def load_services_hybrid(services_data: list, categories_data: list, logger=log.info,
+                         skip_unchanged: bool = True, prune: bool = False) -> dict:
     """
     Carga los datos del modelo de servicio híbrido. Primero asegura que las categorías
-    existan (crea o actualiza) y luego carga los documentos de servicio.
+    existan (crea o actualiza) y luego carga los documentos de servicio. 'prune' solo
+    aplica a los servicios.
+    Devuelve el resumen de escritos/omitidos/eliminados por colección.
     """
-    db = get_db_client()
-    
     # --- Carga de Categorías (Idempotente) ---
-    if categories_data:
-        logger(f"🚀 Procesando 'categories'... {len(categories_data)} registros únicos encontrados.")
-        batch_cat = db.batch()
-        for cat in categories_data:
-            cat_id = str(cat.get("id"))
-            if not cat_id: continue
-            doc_ref = db.collection('categories').document(cat_id)
-            # Usamos set con merge=True para crear si no existe o actualizar si ya existe.
-            batch_cat.set(doc_ref, cat, merge=True)
-        batch_cat.commit()
-        logger("✅ Carga de categorías completada.")
-    else:
-        logger("🧘 No hay nuevas categorías para cargar.")
+    # Usamos set con merge=True para crear si no existe o actualizar si ya existe.
+    # Nunca se podan: aquí solo vienen las categorías con productos y la colección la
+    # mantiene completa la sincronización de categorías ('python -m etl categories').
+    categories_summary = load_data_to_firestore("categories", categories_data, "id", logger=logger, merge=True,
+                                                skip_unchanged=skip_unchanged)
 
     # --- Carga de Servicios ---
-    if services_data:
-        logger(f"🚀 Procesando 'services'... {len(services_data)} registros.")
-        batch_srv = db.batch()
-        for srv in services_data:
-            srv_id = str(srv.get("id"))
-            if not srv_id: continue
-            doc_ref = db.collection('services').document(srv_id)
-            batch_srv.set(doc_ref, srv)
-        batch_srv.commit()
-        logger("✅ Carga de servicios completada.")
-    else:
-        logger("🧘 No hay nuevos servicios para cargar.")
\ No newline at end of file
+    services_summary = load_data_to_firestore("services", services_data, "id", logger=logger,
+                                              skip_unchanged=skip_unchanged, prune=prune)
+
+    return {"categories": categories_summary, "services": services_summary}
@@ -0,0 +1,73 @@
+# etl/modules/metrics.py
+"""
+Duración de las etapas del ETL en formato Prometheus.
+
+El ETL corre fuera de la API, así que cada pipeline escribe sus métricas en un
+archivo de texto ('etl/data/metrics/<pipeline>.prom') que la API reexpone en
+/metrics. Cada archivo se reescribe de forma atómica al cerrar una etapa.
+"""
+
+import os
+import time
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry, Gauge, write_to_textfile
+
+METRICS_DIR = Path(__file__).resolve().parents[1] / "data" / "metrics"
+
+
+class StageTimer:
+    """
+    Mide las etapas de una ejecución del ETL:
+
+        timer = StageTimer("orders_normalized")
+        ...extracción...
+        timer.lap("extract")
+        ...
+        timer.finish()          # o timer.finish(success=False) ante un error
+    """
+
+    def __init__(self, pipeline: str, directory: Path = METRICS_DIR):
+        self.pipeline = pipeline
+        self.path = directory / f"{pipeline}.prom"
+        self._registry = CollectorRegistry()
+        self._stage_duration = Gauge(
+            "liliapp_etl_stage_duration_seconds", "Duración de cada etapa en la última ejecución del ETL.",
+            ["pipeline", "stage"], registry=self._registry,
+        )
+        self._run_duration = Gauge(
+            "liliapp_etl_run_duration_seconds", "Duración total de la última ejecución del ETL.",
+            ["pipeline"], registry=self._registry,
+        )
+        self._last_run = Gauge(
+            "liliapp_etl_last_run_timestamp_seconds", "Fin de la última ejecución del ETL (epoch).",
+            ["pipeline"], registry=self._registry,
+        )
+        self._last_success = Gauge(
+            "liliapp_etl_last_run_success", "1 si la última ejecución del ETL terminó sin errores.",
+            ["pipeline"], registry=self._registry,
+        )
+        self._started = self._lap_started = time.perf_counter()
+
+    def lap(self, stage: str) -> float:
+        """Registra la duración de 'stage' (desde el lap anterior) y la publica."""
+        now = time.perf_counter()
+        elapsed = now - self._lap_started
+        self._lap_started = now
+        self._stage_duration.labels(self.pipeline, stage).set(elapsed)
+        self._write()
+        return elapsed
+
+    def finish(self, success: bool = True) -> None:
+        self._run_duration.labels(self.pipeline).set(time.perf_counter() - self._started)
+        self._last_run.labels(self.pipeline).set(time.time())
+        self._last_success.labels(self.pipeline).set(1 if success else 0)
+        self._write()
+
+    def _write(self) -> None:
+        # Las métricas nunca deben interrumpir una carga.
+        try:
+            os.makedirs(self.path.parent, exist_ok=True)
+            write_to_textfile(str(self.path), self._registry)
+        except OSError as e:
+            print(f"⚠️ No se pudieron escribir las métricas del ETL en {self.path}: {e}")
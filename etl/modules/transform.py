@@ -1,8 +1,6 @@
 # etl/modules/transform.py
-import streamlit as st
 from datetime import datetime
 from typing import List, Dict, Any, Tuple
-from bs4 import BeautifulSoup
 
 # ===================================================================
 # ===               FUNCIONES AUXILIARES (PRIVADAS)               ===
@@ -18,6 +16,21 @@ def _parse_utc_string(date_string: str) -> datetime:
         except ValueError:
             return None
 
+def _order_items(order: Dict[str, Any], category_lookup: Dict[str, Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Ítems de una orden con la categoría del servicio ya resuelta ('categoryId'/'categoryName'),
+    para que las analíticas por categoría no tengan que cruzar con 'services' al consultar.
+    'category_lookup' es {serviceId: {"categoryId", "categoryName"}}, construido una vez por ejecución.
+    """
+    category_lookup = category_lookup or {}
+    items = []
+    for p in order.get("products", []):
+        service_id = str(p.get("id"))
+        category = category_lookup.get(service_id) or {}
+        items.append({"serviceId": service_id, "serviceName": p.get("name"), "quantity": p.get("qty"), "price": p.get("price"),
+                      "categoryId": category.get("categoryId"), "categoryName": category.get("categoryName")})
+    return items
+
 def _create_order_status_history(source_order: Dict[str, Any]) -> List[Dict[str, Any]]:
     history = []
     created_at = _parse_utc_string(source_order.get("created_at"))
@@ -37,6 +50,8 @@ def _extract_contact_on_site(source_order: Dict[str, Any]) -> Dict[str, str]:
 
 def _clean_html(raw_html: str) -> str:
     if not raw_html: return ""
+    # bs4 se importa al usarse: el CLI del ETL no lo carga si no hay HTML que limpiar.
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(raw_html, "html.parser")
     return soup.get_text(separator="\n").strip()
 
@@ -116,12 +131,11 @@ def transform_single_product(product: Dict[str, Any]) -> Tuple[Dict, Dict, List[
         "requirements": requirements if 'requirements' in locals() else {},
         "stats": {"viewCount": 0, "purchaseCount": 0, "averageRating": 0.0}
     }
-def transform_single_order(order: Dict[str, Any]) -> Tuple[Dict, Dict, Dict, Dict]:
+def transform_single_order(order: Dict[str, Any], category_lookup: Dict[str, Dict[str, Any]] = None) -> Tuple[Dict, Dict, Dict, Dict]:
     if not order: return None, None, None, None
     customer_data = order.get("customer") or {}
     shipping_address = order.get("shipping_address") or {}
     billing_address = order.get("billing_address") or {}
-    payment_method = order.get("payment_method") or {}
     customer_id = str(customer_data.get("id"))
     if not customer_id or customer_id == 'None': return None, None, None, None
     full_name_str = (customer_data.get("fullname") or "").strip()
@@ -131,10 +145,11 @@ def transform_single_order(order: Dict[str, Any]) -> Tuple[Dict, Dict, Dict, Dic
     customer_profile_payload = {"id": customer_id, "userId": customer_id, "firstName": first_name, "lastName": last_name, "displayName": full_name_str, "rut": billing_address.get("taxid"), "rutVerified": False, "primaryAddressRegion": shipping_address.get("region"), "totalSpending": 0, "serviceHistoryCount": 0, "metadata": {"createdAt": _parse_utc_string(order.get("created_at")), "updatedAt": datetime.now()}}
     address_id = f"addr_{order.get('id')}"
     address_payload = {"id": address_id, "userId": customer_id, "alias": "Principal", "street": shipping_address.get("address"), "number": shipping_address.get("street_number") or "S/N", "commune": shipping_address.get("municipality"), "region": shipping_address.get("region"), "isPrimary": True, "timesUsed": 1}
-    order_payload = {"id": str(order.get("id")), "userId": customer_id, "addressId": address_id, "total": order.get("total", 0), "status": order.get("status"), "createdAt": _parse_utc_string(order.get("created_at")), "updatedAt": datetime.now(), "items": [{"serviceId": str(p.get("id")), "serviceName": p.get("name"), "quantity": p.get("qty"), "price": p.get("price")} for p in order.get("products", [])], "paymentDetails": {"type": payment_method.get('type'), "transactionId": order.get("payment_notification_id")}, "serviceAddress": {"commune": shipping_address.get("municipality"), "region": shipping_address.get("region")}, "contactOnSite": _extract_contact_on_site(order), "statusHistory": _create_order_status_history(order)}
+    order_payload = {"id": str(order.get("id")), "userId": customer_id, "addressId": address_id, "total": order.get("total", 0), "status": order.get("status"), "createdAt": _parse_utc_string(order.get("created_at")), "updatedAt": datetime.now(), "items": _order_items(order, category_lookup), "paymentDetails": {"type": order.get("payment_method_type"), "transactionId": order.get("payment_notification_id")}, "serviceAddress": {"commune": shipping_address.get("municipality"), "region": shipping_address.get("region")}, "contactOnSite": _extract_contact_on_site(order), "statusHistory": _create_order_status_history(order)}
     return user_payload, customer_profile_payload, address_payload, order_payload
 
-def transform_orders(source_orders: List[Dict[str, Any]], existing_user_emails: set, logger) -> Tuple[List, List, List, List]:
+def transform_orders(source_orders: List[Dict[str, Any]], existing_user_emails: set, logger,
+                     category_lookup: Dict[str, Dict[str, Any]] = None) -> Tuple[List, List, List, List]:
     logger("🔄 Transformando datos de Órdenes (Modelo Normalizado)...")
     cleaned_source_orders = [order for order in source_orders if order is not None]
     if len(cleaned_source_orders) < len(source_orders): logger(f"🧹 Se eliminaron {len(source_orders) - len(cleaned_source_orders)} registros nulos.")
@@ -142,7 +157,7 @@ def transform_orders(source_orders: List[Dict[str, Any]], existing_user_emails:
     processed_count, skipped_count = 0, 0
     for order in cleaned_source_orders:
         order_id = order.get('id', 'ID Desconocido')
-        user, profile, address, transformed_order = transform_single_order(order)
+        user, profile, address, transformed_order = transform_single_order(order, category_lookup)
         if not all((user, profile, address, transformed_order)): logger(f"⚠️ Saltando orden ID {order_id} por datos internos inválidos."); skipped_count += 1; continue
         customer_id, customer_email = user.get("id"), user.get("email")
         if customer_id not in unique_users and customer_email not in existing_user_emails: unique_users[customer_id] = user; unique_profiles[customer_id] = profile
@@ -175,7 +190,7 @@ def transform_products(source_products: List[Dict[str, Any]], logger) -> Tuple[L
 
 # --- NUEVAS FUNCIONES PARA EL MODELO CUSTOMER-CENTRIC (CON DEPURACIÓN) ---
 
-def transform_order_to_customer_model(order: Dict[str, Any]) -> Tuple[Dict, Dict]:
+def transform_order_to_customer_model(order: Dict[str, Any], category_lookup: Dict[str, Dict[str, Any]] = None) -> Tuple[Dict, Dict]:
     """Transforma una única orden. Devuelve (None, None) si no es válida."""
     
     print(f"\n--- [DEBUG] Intentando transformar Orden ID: {order.get('id', 'N/A')} ---")
@@ -206,11 +221,12 @@ def transform_order_to_customer_model(order: Dict[str, Any]) -> Tuple[Dict, Dict
     print(f"[DEBUG] ACEPTADO: La orden ID {order.get('id')} ha pasado todas las validaciones.")
 
     customer_payload = { "id": customer_id, "email": customer_data.get("email"), "phone": f"+{customer_data.get('phone_prefix', '56')}{customer_data.get('phone', '')}", "accountType": "customer", "accountStatus": "verified", "createdAt": _parse_utc_string(order.get("created_at")), "lastLoginAt": datetime.now(), "isDeleted": False, "onboardingCompleted": True, "firstName": first_name, "lastName": last_name, "displayName": full_name_str, "rut": billing_address.get("taxid"), "rutVerified": False, "addresses": [{"id": f"addr_{order.get('id')}", "alias": "Principal", "street": shipping_address.get("address"), "number": shipping_address.get("street_number") or "S/N", "commune": shipping_address.get("municipality"), "region": shipping_address.get("region"), "isPrimary": True}], "totalSpending": order.get("total", 0), "serviceHistoryCount": 1 }
-    order_payload = { "id": str(order.get("id")), "customerId": customer_id, "addressId": f"addr_{order.get('id')}", "total": order.get("total", 0), "status": order.get("status"), "createdAt": _parse_utc_string(order.get("created_at")), "updatedAt": datetime.now(), "items": [{"serviceId": str(p.get("id")), "serviceName": p.get("name"), "quantity": p.get("qty"), "price": p.get("price")} for p in order.get("products", [])] }
+    order_payload = { "id": str(order.get("id")), "customerId": customer_id, "addressId": f"addr_{order.get('id')}", "total": order.get("total", 0), "status": order.get("status"), "createdAt": _parse_utc_string(order.get("created_at")), "updatedAt": datetime.now(), "items": _order_items(order, category_lookup) }
     
     return customer_payload, order_payload
 
-def transform_orders_for_customer_model(source_orders: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+def transform_orders_for_customer_model(source_orders: List[Dict[str, Any]],
+                                        category_lookup: Dict[str, Dict[str, Any]] = None) -> Tuple[List[Dict], List[Dict]]:
     """Toma una lista de órdenes y las consolida en documentos de 'customer' únicos."""
     
     # --- DEPURACIÓN FINAL ---
@@ -221,7 +237,7 @@ def transform_orders_for_customer_model(source_orders: List[Dict[str, Any]]) ->
     # Hemos eliminado el 'sorted' para simplificar la depuración.
     # El ordenamiento no es crítico para la funcionalidad.
     for order in source_orders:
-        customer_payload, order_payload = transform_order_to_customer_model(order)
+        customer_payload, order_payload = transform_order_to_customer_model(order, category_lookup)
         
         if not customer_payload or not order_payload:
             continue # Salta órdenes inválidas